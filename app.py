@@ -1,17 +1,37 @@
 import os
+import io
 import logging
-from flask import Flask, render_template, request, redirect, url_for, jsonify, session, flash
+import json
+from flask import Flask, Request, Response, make_response, render_template, request, redirect, url_for, jsonify, session, flash, stream_with_context, send_file
 
 from wikipedia_api import (
-    search_wikipedia, 
+    search_articles,
+    prewarm_articles,
+    get_article_bundle,
     get_article_summary, 
     get_article_content, 
     get_article_images,
-    get_random_articles,
-    get_article_languages
+    get_article_langlinks,
+    get_article_cache_stats,
+    get_article_outline,
+    get_article_section,
+    get_search_cache_stats
+)
+from autocomplete import get_completions, get_autocomplete_stats
+from translation_api import translate_text, translate_sections, get_translation_cache_stats, get_provider_stats
+from http_client import http_client
+from async_http_client import async_http_client, run_async
+from wikipedia_async import get_article_bundle_async
+from translation_async import translate_text_async
+from wikitok_feed import get_feed_cards, get_feed_page, get_feed_stats
+from docx_generator import get_docx_cache_stats
+from article_export import build_export, EXPORT_PARTS, SectionNotFound
+from export_jobs import export_jobs, generate_export, ExportQueueFull, DONE, FAILED
+from bulk_export import stream_zip, build_merged_docx, BULK_EXPORT_MAX_ARTICLES
+from werkzeug.exceptions import RequestEntityTooLarge
+from http_caching import (
+    apply_http_caching, article_etag, content_digest, has_pending_flashes, parse_timestamp, is_not_modified, not_modified
 )
-from translation_api import translate_text
-from docx_generator import generate_docx
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -20,6 +40,9 @@ logging.basicConfig(level=logging.DEBUG)
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "wikitruth-dev-key")
 
+# Cache-Control, conditional requests and compression for HTML and JSON responses
+app.after_request(apply_http_caching)
+
 # Available languages for search and display
 LANGUAGES = {
     'en': 'English',
@@ -35,6 +58,35 @@ LANGUAGES = {
     'it': 'Italian'
 }
 
+# Render long articles as summary plus table of contents, loading section bodies on demand.
+# Can be overridden per request with ?lazy=1 or ?lazy=0
+ARTICLE_LAZY_SECTIONS = os.environ.get("ARTICLE_LAZY_SECTIONS", "0") == "1"
+
+# Largest free-form body accepted by /download; articles are exported by reference through /export
+DOWNLOAD_MAX_BODY_BYTES = int(os.environ.get("DOWNLOAD_MAX_BODY_BYTES", 1024 * 1024))
+BODY_LIMITED_ENDPOINTS = {'download', 'submit_export_job'}
+
+class LimitedBodyRequest(Request):
+    """
+    Request that caps the body of the export endpoints at DOWNLOAD_MAX_BODY_BYTES
+    Werkzeug enforces the limit while reading the stream, so chunked bodies without
+    a Content-Length are capped too
+    """
+
+    @property
+    def max_content_length(self):
+        if self.endpoint in BODY_LIMITED_ENDPOINTS:
+            return DOWNLOAD_MAX_BODY_BYTES
+        return super().max_content_length
+
+app.request_class = LimitedBodyRequest
+
+# Run article fetches and translations on the shared asyncio event loop instead of
+# blocking this worker's thread on every upstream call
+ASYNC_FETCH = os.environ.get("ASYNC_FETCH", "0") == "1"
+
+DOCX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
 @app.route('/')
 def home():
     # Set default language if not already set
@@ -55,12 +107,15 @@ def search():
         flash('Please enter a search query', 'error')
         return redirect(url_for('home'))
     
-    # Search Wikipedia
+    # Search Wikipedia, with extract and thumbnail of every result in one request
     try:
-        search_results = search_wikipedia(query, language)
+        search_results = search_articles(query, language)
         if not search_results:
             flash('No results found', 'info')
             return redirect(url_for('home'))
+        
+        # Start loading the top results so opening one is fast
+        prewarm_articles(search_results, language)
             
         return render_template('tag_results.html', 
                               results=search_results, 
@@ -72,6 +127,38 @@ def search():
         flash(f"Error searching Wikipedia: {str(e)}", 'error')
         return redirect(url_for('home'))
 
+@app.route('/api/search')
+def search_api():
+    try:
+        query = request.args.get('q', '')
+        language = request.args.get('lang', 'en')
+        if language not in LANGUAGES:
+            language = 'en'
+        limit = min(request.args.get('limit', 10, type=int), 20)
+        if not query:
+            return jsonify({'error': 'Please enter a search query'}), 400
+        
+        results = search_articles(query, language, limit)
+        prewarm_articles(results, language)
+        return jsonify({'query': query, 'results': results})
+    except Exception as e:
+        logging.error(f"Search error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/autocomplete')
+def autocomplete():
+    try:
+        query = request.args.get('q', '')
+        language = request.args.get('lang', 'en')
+        if language not in LANGUAGES:
+            language = 'en'
+        limit = request.args.get('limit', 8, type=int)
+        
+        return jsonify({'query': query, 'completions': get_completions(query, language, limit)})
+    except Exception as e:
+        logging.error(f"Autocomplete error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/article/<lang>/<title>')
 def article(lang, title):
     try:
@@ -79,11 +166,33 @@ def article(lang, title):
         if lang not in LANGUAGES:
             lang = 'en'  # Default to English if invalid language
         
-        # Get article summary and content
-        summary = get_article_summary(title, lang)
-        content = get_article_content(title, lang)
-        images = get_article_images(title, lang)
-        available_languages = get_article_languages(title, lang)
+        # In lazy mode only the summary and table of contents are fetched up front
+        lazy = request.args.get('lazy', '1' if ARTICLE_LAZY_SECTIONS else '0') == '1'
+        if lazy:
+            return _render_lazy_article(lang, title)
+        
+        # Fetch the article once and share it across summary, content, images and languages.
+        # Images and language links are optional and may be degraded under the fetch deadline
+        if ASYNC_FETCH:
+            bundle = run_async(get_article_bundle_async(title, lang))
+        else:
+            bundle = get_article_bundle(title, lang)
+        
+        # The page only changes with the revision, images and language links, so a current
+        # client copy needs no rendering. Degraded pages are missing optional parts and pages
+        # showing flash messages are personal; neither gets validators
+        personal = has_pending_flashes()
+        etag = last_modified = None
+        if not bundle['degraded'] and not personal:
+            etag = article_etag(lang, bundle['lastrevid'], 'full', content_digest(bundle['images'], bundle['langlinks']))
+            last_modified = parse_timestamp(bundle.get('touched'))
+        if is_not_modified(etag, last_modified):
+            return not_modified(etag, last_modified)
+        
+        summary = get_article_summary(title, lang, bundle=bundle)
+        content = get_article_content(title, lang, bundle=bundle)
+        images = get_article_images(title, lang, bundle=bundle)
+        available_languages = get_article_langlinks(title, lang, bundle=bundle)
         
         # Get main image for top of article
         main_image = None
@@ -97,9 +206,10 @@ def article(lang, title):
                     main_image = img.get('url')
                     break
                 
-            # If no main image found, use the first one
+            # If no main image found, use the largest one we know the size of
             if not main_image and images:
-                main_image = images[0]['url'] if isinstance(images[0], dict) else images[0]
+                largest = max(images, key=lambda img: img.get('width', 0) * img.get('height', 0))
+                main_image = largest['url']
             
             # Add remaining images to content images
             for img in images:
@@ -107,36 +217,100 @@ def article(lang, title):
                 if img_url != main_image:
                     content_images.append(img_url)
         
-        # Filter available languages to only include those we support
-        # Make sure we have the current language in the available options
-        filtered_languages = {k: v for k, v in available_languages.items() if k in LANGUAGES}
+        filtered_languages = _filter_languages(available_languages, lang, title)
+        wiki_lang_url = _wiki_lang_url(title, lang)
         
-        # If current language isn't in filtered_languages, add it
-        if lang not in filtered_languages:
-            filtered_languages[lang] = LANGUAGES[lang]
-        
-        # Get additional Wikipedia language links to show all available languages
-        try:
-            # Format URL for more translations on Wikipedia
-            wiki_lang_url = f"https://{lang}.wikipedia.org/wiki/{title.replace(' ', '_')}"
-        except Exception:
-            wiki_lang_url = None
-        
-        return render_template('article.html',
-                              title=title,
-                              summary=summary,
-                              content=content,
-                              main_image=main_image,
-                              content_images=content_images,
-                              language=lang,
-                              languages=LANGUAGES,
-                              available_languages=filtered_languages,
-                              wiki_lang_url=wiki_lang_url)
+        response = make_response(render_template('article.html',
+                                                 title=title,
+                                                 summary=summary,
+                                                 content=content,
+                                                 main_image=main_image,
+                                                 content_images=content_images,
+                                                 language=lang,
+                                                 languages=LANGUAGES,
+                                                 available_languages=filtered_languages,
+                                                 wiki_lang_url=wiki_lang_url,
+                                                 degraded=bundle['degraded']))
+        return _with_validators(response, etag, last_modified, personal, bundle['degraded'])
     except Exception as e:
         logging.error(f"Article retrieval error: {str(e)}")
         flash(f"Error retrieving article: {str(e)}", 'error')
         return redirect(url_for('home'))
 
+def _filter_languages(available_languages, lang, title):
+    # Filter available languages to only include those we support
+    # Make sure we have the current language in the available options
+    filtered_languages = {k: v for k, v in available_languages.items() if k in LANGUAGES}
+    
+    # If current language isn't in filtered_languages, add it
+    if lang not in filtered_languages:
+        filtered_languages[lang] = {'title': title, 'name': LANGUAGES[lang]}
+    return filtered_languages
+
+def _wiki_lang_url(title, lang):
+    # Get additional Wikipedia language links to show all available languages
+    try:
+        # Format URL for more translations on Wikipedia
+        return f"https://{lang}.wikipedia.org/wiki/{title.replace(' ', '_')}"
+    except Exception:
+        return None
+
+def _render_lazy_article(lang, title):
+    # Render the summary and table of contents now; section bodies are
+    # fetched by the page through the section API when they are needed
+    outline = get_article_outline(title, lang)
+    personal = has_pending_flashes()
+    etag = last_modified = None
+    if not outline['degraded'] and not personal:
+        etag = article_etag(lang, outline['lastrevid'], 'lazy', content_digest(outline['langlinks']))
+        last_modified = parse_timestamp(outline.get('touched'))
+    if is_not_modified(etag, last_modified):
+        return not_modified(etag, last_modified)
+    
+    response = make_response(render_template('article.html',
+                                             title=title,
+                                             summary=outline['summary'],
+                                             content={section['title']: '' for section in outline['sections']},
+                                             section_indexes={section['title']: section['index'] for section in outline['sections']},
+                                             revision=outline['lastrevid'],
+                                             lazy=True,
+                                             main_image=None,
+                                             content_images=[],
+                                             language=lang,
+                                             languages=LANGUAGES,
+                                             available_languages=_filter_languages(outline['langlinks'], lang, title),
+                                             wiki_lang_url=_wiki_lang_url(title, lang),
+                                             degraded=outline['degraded']))
+    return _with_validators(response, etag, last_modified, personal, outline['degraded'])
+
+def _with_validators(response, etag, last_modified, personal=False, degraded=()):
+    # Strong ETag from the revision, page parts and template version, Last-Modified from the page's touch time.
+    # A page that rendered flash messages must not be stored by shared caches or reused, and a
+    # degraded page, which the server does not cache either, must be refetched on the next view
+    if personal:
+        response.headers['Cache-Control'] = 'private, no-store'
+    elif degraded:
+        response.headers['Cache-Control'] = 'no-cache'
+    if etag is not None:
+        response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
+@app.route('/api/article/<lang>/<title>/section/<int:index>')
+def get_section(lang, title, index):
+    try:
+        # Validate language code
+        if lang not in LANGUAGES:
+            lang = 'en'  # Default to English if invalid language
+        
+        revision = request.args.get('rev', type=int)
+        sections = get_article_section(title, index, lang, revision)
+        return jsonify({'index': index, 'sections': sections})
+    except Exception as e:
+        logging.error(f"Section retrieval error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/translate', methods=['POST'])
 def translate():
     try:
@@ -144,27 +318,206 @@ def translate():
         source_lang = request.form.get('source_lang', 'en')
         target_lang = request.form.get('target_lang', 'en')
         
-        translated_text = translate_text(text, source_lang, target_lang)
+        if ASYNC_FETCH:
+            translated_text = run_async(translate_text_async(text, source_lang, target_lang))
+        else:
+            translated_text = translate_text(text, source_lang, target_lang)
         return jsonify({'translated_text': translated_text})
     except Exception as e:
         logging.error(f"Translation error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/translate/article', methods=['POST'])
+def translate_article():
+    try:
+        # Either an article reference (lang and title) or a dict of sections with their source language
+        data = request.get_json(silent=True) or {}
+        target_lang = data.get('target_lang', 'en')
+        if data.get('title'):
+            source_lang = data.get('lang', 'en')
+            if source_lang not in LANGUAGES:
+                source_lang = 'en'
+            sections = get_article_bundle(data['title'], source_lang)['sections']
+        elif isinstance(data.get('sections'), dict):
+            source_lang = data.get('source_lang', 'en')
+            sections = {str(title): str(text) for title, text in data['sections'].items()}
+        else:
+            return jsonify({'error': 'Provide a lang and title, or a dict of sections'}), 400
+    except Exception as e:
+        logging.error(f"Article translation error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    
+    order = {title: i for i, title in enumerate(sections)}
+    
+    def generate():
+        # One JSON object per line, written as soon as each section is translated
+        try:
+            for title, translated_text in translate_sections(sections, source_lang, target_lang):
+                yield json.dumps({'section': title, 'index': order[title], 'translated_text': translated_text}) + '\n'
+            yield json.dumps({'done': True, 'sections': len(sections)}) + '\n'
+        except Exception as e:
+            logging.error(f"Article translation error: {str(e)}")
+            yield json.dumps({'error': str(e)}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def _read_limited_body():
+    # Read the body up front: an announced length over the limit fails at once. Form fields
+    # stay parsed and JSON bodies cached for the view. Werkzeug cuts a raw body without a
+    # Content-Length off at the limit instead of refusing it, so one that reaches it is refused here
+    try:
+        data = request.get_data(parse_form_data=True)
+    except RequestEntityTooLarge:
+        return False
+    return request.content_length is not None or len(data) < request.max_content_length
+
 @app.route('/download', methods=['POST'])
 def download():
+    # Refuse oversized bodies before the view uses them
+    if not _read_limited_body():
+        return jsonify({'error': 'Request body too large, export the article by reference instead'}), 413
+    
     try:
         title = request.form.get('title', '')
         content = request.form.get('content', '')
         language = request.form.get('language', 'en')
         
-        # Generate the DOCX file and send it
-        docx_file = generate_docx(title, content)
+        # Generate the DOCX file in memory and send it
+        docx_file, filename = generate_export(title, content)
         
-        return jsonify({'docx_url': docx_file})
+        return send_file(docx_file, mimetype=DOCX_MIMETYPE, as_attachment=True, download_name=filename)
+    except ExportQueueFull as e:
+        return _queue_full_response(e)
     except Exception as e:
         logging.error(f"Download error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/export/<lang>/<title>')
+def export(lang, title):
+    try:
+        reference, error = _export_reference(lang, title, request.args)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        # Build the document from the article and translations the server already holds
+        doc_title, content = build_export(**reference)
+        docx_file, filename = generate_export(doc_title, content)
+        
+        return send_file(docx_file, mimetype=DOCX_MIMETYPE, as_attachment=True, download_name=filename)
+    except SectionNotFound as e:
+        return jsonify({'error': str(e)}), 404
+    except ExportQueueFull as e:
+        return _queue_full_response(e)
+    except Exception as e:
+        logging.error(f"Export error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+def _export_reference(lang, title, params):
+    # Validate an export reference; returns (build_export arguments, error message)
+    if lang not in LANGUAGES:
+        lang = 'en'  # Default to English if invalid language
+    translated_to = params.get('translated_to')
+    if translated_to and translated_to not in LANGUAGES:
+        return None, f"Unsupported language: {translated_to}"
+    
+    part = params.get('part', 'full')
+    if part not in EXPORT_PARTS:
+        return None, f"Unknown export part: {part}"
+    
+    return {'title': title, 'language': lang, 'part': part,
+            'section': params.get('section'), 'translated_to': translated_to}, None
+
+@app.route('/api/export/jobs', methods=['POST'])
+def submit_export_job():
+    # Refuse oversized bodies before the view uses them
+    if not _read_limited_body():
+        return jsonify({'error': 'Request body too large, export the article by reference instead'}), 413
+    
+    try:
+        # Either an article reference (lang, title, part, section, translated_to) or a title and content
+        data = request.get_json(silent=True) or {}
+        if 'content' in data:
+            job = export_jobs.submit(title=str(data.get('title', '')), content=data['content'])
+        elif data.get('title'):
+            reference, error = _export_reference(data.get('lang', 'en'), data['title'], data)
+            if error:
+                return jsonify({'error': error}), 400
+            job = export_jobs.submit(reference=reference)
+        else:
+            return jsonify({'error': 'Provide an article reference or a title and content'}), 400
+        
+        return jsonify(_job_response(job)), 202
+    except ExportQueueFull as e:
+        return _queue_full_response(e)
+    except Exception as e:
+        logging.error(f"Export job error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/export/jobs/<job_id>')
+def get_export_job(job_id):
+    # ?wait=N long-polls for up to N seconds until the job finishes
+    job = export_jobs.get(job_id, wait=request.args.get('wait', 0, type=float))
+    if job is None:
+        return jsonify({'error': 'Unknown or expired export job'}), 404
+    return jsonify(_job_response(job))
+
+@app.route('/api/export/jobs/<job_id>/result')
+def get_export_job_result(job_id):
+    job = export_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired export job'}), 404
+    if job.status == FAILED:
+        return jsonify(_job_response(job)), 500
+    if job.status != DONE:
+        return jsonify(_job_response(job)), 409
+    
+    return send_file(io.BytesIO(job.data), mimetype=DOCX_MIMETYPE, as_attachment=True, download_name=job.filename)
+
+def _queue_full_response(error):
+    # Exports are admitted against one bound, whether queued as jobs or built while the client waits
+    response = jsonify({'error': str(error)})
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
+def _job_response(job):
+    response = job.to_dict()
+    response['status_url'] = url_for('get_export_job', job_id=job.id)
+    response['result_url'] = url_for('get_export_job_result', job_id=job.id)
+    return response
+
+@app.route('/api/export/bulk', methods=['POST'])
+def bulk_export():
+    try:
+        # A list of {lang, title} references, with format 'zip' (default) or 'docx' for one merged document
+        data = request.get_json(silent=True) or {}
+        references = []
+        for article in data.get('articles') or []:
+            if isinstance(article, dict) and article.get('title'):
+                lang = article.get('lang', 'en')
+                references.append({'language': lang if lang in LANGUAGES else 'en', 'title': str(article['title'])})
+        if not references:
+            return jsonify({'error': 'Provide a list of articles with lang and title'}), 400
+        if len(references) > BULK_EXPORT_MAX_ARTICLES:
+            return jsonify({'error': f"At most {BULK_EXPORT_MAX_ARTICLES} articles can be exported at once"}), 413
+        
+        translated_to = data.get('translated_to')
+        if translated_to and translated_to not in LANGUAGES:
+            return jsonify({'error': f"Unsupported language: {translated_to}"}), 400
+        
+        if data.get('format', 'zip') == 'docx':
+            docx_data, filename = build_merged_docx(references, translated_to)
+            return send_file(io.BytesIO(docx_data), mimetype=DOCX_MIMETYPE, as_attachment=True, download_name=filename)
+        
+        # Stream the archive as the documents finish
+        return Response(stream_with_context(stream_zip(references, translated_to)),
+                        mimetype='application/zip',
+                        headers={'Content-Disposition': 'attachment; filename="wikitruth-articles.zip"'})
+    except ExportQueueFull as e:
+        return _queue_full_response(e)
+    except Exception as e:
+        logging.error(f"Bulk export error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/wikitok')
 def wikitok():
     # Get languages from query parameter or default to English
@@ -194,12 +547,11 @@ def get_wikitok_articles():
             language = 'en'
             
         images_only = request.args.get('images_only', 'true') == 'true'
-        offset = int(request.args.get('offset', 0))
         limit = int(request.args.get('limit', 5))
         
-        # Get random articles for the requested language
+        # Serve cards from the prefetch buffer for the requested language
         # Use a smaller limit to improve performance
-        articles = get_random_articles(language, min(limit, 10), images_only, offset)
+        articles = get_feed_cards(language, min(limit, 10), images_only)
         
         # Add language name to each article
         for article in articles:
@@ -210,6 +562,47 @@ def get_wikitok_articles():
         logging.error(f"WikiTok articles error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/wikitok/feed')
+def get_wikitok_feed():
+    try:
+        # Get the selected languages as a comma-separated list
+        languages = request.args.get('languages', 'en').split(',')
+        languages = [lang for lang in dict.fromkeys(languages) if lang in LANGUAGES]
+        if not languages:
+            languages = ['en']
+            
+        images_only = request.args.get('images_only', 'true') == 'true'
+        limit = int(request.args.get('limit', 5))
+        cursor = request.args.get('cursor')
+        
+        # Fetch all languages on the server and interleave them into one page
+        articles, next_cursor = get_feed_page(languages, min(limit, 20), images_only, cursor)
+        
+        # Add language name to each article
+        for article in articles:
+            article['language_name'] = LANGUAGES.get(article['language'], 'Unknown')
+            
+        return jsonify({'articles': articles, 'cursor': next_cursor})
+    except Exception as e:
+        logging.error(f"WikiTok feed error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/stats')
+def get_stats():
+    # Expose runtime statistics used to size pools and caches
+    return jsonify({
+        'http_pools': http_client.pool_stats(),
+        'async_http': async_http_client.pool_stats(),
+        'article_cache': get_article_cache_stats(),
+        'search_cache': get_search_cache_stats(),
+        'autocomplete': get_autocomplete_stats(),
+        'wikitok_feed': get_feed_stats(),
+        'translation_cache': get_translation_cache_stats(),
+        'translation_providers': get_provider_stats(),
+        'docx_cache': get_docx_cache_stats(),
+        'export_jobs': export_jobs.stats()
+    })
+
 @app.errorhandler(404)
 def page_not_found(e):
     return render_template('base.html', error="Page not found"), 404
@@ -0,0 +1,82 @@
+import json
+import logging
+
+from wikipedia_api import get_article_summary, get_article_content, get_article_outline, get_article_section
+from translation_api import translate_text, translate_sections
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+
+# Parts of an article that can be exported
+EXPORT_PARTS = ('summary', 'full', 'section')
+
+class SectionNotFound(LookupError):
+    """Raised when an export asks for a section the article does not have"""
+
+def build_export(title, language='en', part='full', section=None, translated_to=None):
+    """
+    Build the title and content of an export from the article data held on the server,
+    so clients only send a reference instead of the article text
+
+    Args:
+        title (str): Article title
+        language (str): Article language code
+        part (str): 'summary', 'full' or 'section'
+        section (str): Section title, when part is 'section'
+        translated_to (str): Target language code, or None for the original text
+
+    Returns:
+        tuple: (document title, content) ready for generate_docx
+    """
+    if part not in EXPORT_PARTS:
+        raise ValueError(f"Unknown export part: {part}")
+
+    translate = translated_to and translated_to != language
+
+    if part == 'summary':
+        doc_title = f"{title} - Summary"
+        content = get_article_summary(title, language)
+        if translate:
+            content = translate_text(content, language, translated_to)
+    elif part == 'section':
+        doc_title = f"{title} - {section}"
+        sections = _export_section(title, language, section)
+        if len(sections) == 1:
+            content = next(iter(sections.values()))
+            if translate:
+                content = translate_text(content, language, translated_to)
+        else:
+            if translate:
+                translated = dict(translate_sections(sections, language, translated_to))
+                sections = {name: translated[name] for name in sections}
+            content = json.dumps(sections)
+    else:
+        doc_title = f"{title} - Full Article"
+        sections = get_article_content(title, language)
+        if translate:
+            translated = dict(translate_sections(sections, language, translated_to))
+            sections = {name: translated[name] for name in sections}
+        # Sections are passed as JSON, the same format the article page used to post
+        content = json.dumps(sections)
+
+    if translate:
+        doc_title = f"{doc_title} (Translated to {translated_to})"
+    return doc_title, content
+
+def _export_section(title, language, section):
+    """
+    Get one section the way the lazy article view loads it: a top-level section comes
+    with its subsections, from the revision the table of contents was built from.
+    A subsection title is exported on its own
+    Returns a dictionary with section titles as keys and content as values
+    """
+    outline = get_article_outline(title, language)
+    index = next((s['index'] for s in outline['sections'] if s['title'] == section), None)
+    if index is not None:
+        sections = get_article_section(title, index, language, outline['lastrevid'])
+    else:
+        content = get_article_content(title, language)
+        sections = {section: content[section]} if section in content else {}
+    if not sections:
+        raise SectionNotFound(f"Section not found: {section}")
+    return sections
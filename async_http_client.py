@@ -0,0 +1,177 @@
+import os
+import json
+import random
+import asyncio
+import logging
+import threading
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from http_client import (
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_MAX_RETRIES, HTTP_BACKOFF_FACTOR,
+    HTTP_RETRY_AFTER_MAX, RETRY_STATUS_CODES, USER_AGENT
+)
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+
+# Connections kept open in total, and requests allowed in flight to any one upstream host;
+# requests above the per-host bound wait on the event loop instead of holding a thread
+ASYNC_HTTP_MAX_CONNECTIONS = int(os.environ.get("ASYNC_HTTP_MAX_CONNECTIONS", 100))
+ASYNC_HTTP_MAX_PER_HOST = int(os.environ.get("ASYNC_HTTP_MAX_PER_HOST", 20))
+
+# Longest a Flask view waits on a coroutine handed to the event loop bridge, in seconds
+ASYNC_BRIDGE_TIMEOUT = float(os.environ.get("ASYNC_BRIDGE_TIMEOUT", 30))
+
+class AsyncResponse:
+    """Fully read response, with the parts of the requests.Response interface callers use"""
+
+    def __init__(self, status_code, headers, text):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(f"HTTP {self.status_code} error")
+
+class AsyncHttpClient:
+    """
+    Shared keep-alive aiohttp client with one connection pool, a concurrency bound
+    per upstream host, timeouts and bounded retries that honour Retry-After
+    The session is created on first use and bound to the event loop that made it,
+    so all requests should run on the shared bridge loop
+    """
+
+    def __init__(self, max_connections=ASYNC_HTTP_MAX_CONNECTIONS, max_per_host=ASYNC_HTTP_MAX_PER_HOST,
+                 max_retries=HTTP_MAX_RETRIES):
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.max_retries = max_retries
+        self.timeout = aiohttp.ClientTimeout(sock_connect=HTTP_CONNECT_TIMEOUT, sock_read=HTTP_READ_TIMEOUT)
+        self._session = None
+        self._pid = None
+        self._host_limits = {}
+        self._in_flight = {}
+        self._requests = {}
+
+    def _get_session(self):
+        # A forked worker starts over instead of reusing its parent's connections
+        if self._session is None or self._session.closed or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._host_limits = {}
+            connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.max_per_host)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers={'User-Agent': USER_AGENT, 'Accept-Encoding': 'gzip, deflate'}
+            )
+        return self._session
+
+    def _host_limit(self, host):
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        return self._host_limits[host]
+
+    async def request(self, method, url, **kwargs):
+        """Send a request through the shared session, retrying connection errors, 429 and 5xx responses"""
+        host = urlsplit(url).netloc
+        session = self._get_session()
+        for attempt in range(self.max_retries + 1):
+            async with self._host_limit(host):
+                self._in_flight[host] = self._in_flight.get(host, 0) + 1
+                self._requests[host] = self._requests.get(host, 0) + 1
+                try:
+                    async with session.request(method, url, **kwargs) as response:
+                        result = AsyncResponse(response.status, dict(response.headers), await response.text())
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                    if attempt == self.max_retries:
+                        raise
+                    result = None
+                finally:
+                    self._in_flight[host] -= 1
+
+            if result is None:
+                await asyncio.sleep(self._backoff(attempt, None))
+                continue
+            if result.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                # Hand the last response back so callers can inspect it
+                return result
+            await asyncio.sleep(self._backoff(attempt, result.headers.get('Retry-After')))
+
+    def _backoff(self, attempt, retry_after):
+        # Retry-After in seconds wins, up to HTTP_RETRY_AFTER_MAX; otherwise jittered exponential backoff
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), HTTP_RETRY_AFTER_MAX)
+        return random.uniform(0, HTTP_BACKOFF_FACTOR * (2 ** attempt))
+
+    async def get(self, url, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request('POST', url, **kwargs)
+
+    def pool_stats(self):
+        """
+        Get in-flight and total request counts for each upstream host
+        Returns a dictionary keyed by host
+        """
+        return {
+            host: {
+                'max_in_flight': self.max_per_host,
+                'in_flight': self._in_flight.get(host, 0),
+                'requests': count
+            }
+            for host, count in list(self._requests.items())
+        }
+
+class EventLoopBridge:
+    """
+    One event loop running in a background thread per worker process, so
+    synchronous Flask views can run coroutines on the shared async client
+    The thread is started on first use, after the server has forked its workers
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_loop(self):
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._pid = os.getpid()
+                threading.Thread(target=self._loop.run_forever, name='async-bridge', daemon=True).start()
+            return self._loop
+
+    def submit(self, coroutine):
+        """
+        Schedule a coroutine on the bridge loop
+        Returns a concurrent.futures.Future; async views can await asyncio.wrap_future of it
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self._get_loop())
+
+    def run(self, coroutine, timeout=ASYNC_BRIDGE_TIMEOUT):
+        """
+        Run a coroutine on the bridge loop and wait for its result
+        Returns the result of the coroutine
+        """
+        future = self.submit(coroutine)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Async call did not finish within {timeout:.0f}s")
+
+# Module-level client and bridge shared by all async outbound calls
+async_http_client = AsyncHttpClient()
+event_loop_bridge = EventLoopBridge()
+
+def run_async(coroutine, timeout=ASYNC_BRIDGE_TIMEOUT):
+    """Run a coroutine from synchronous code on the shared event loop bridge"""
+    return event_loop_bridge.run(coroutine, timeout)
@@ -0,0 +1,109 @@
+import os
+import logging
+import threading
+
+from cache import LRUCache
+from wikipedia_api import get_client, normalize_query
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+
+# Completions fetched per prefix; requests may ask for fewer but never more
+AUTOCOMPLETE_LIMIT = int(os.environ.get("AUTOCOMPLETE_LIMIT", 10))
+
+# Hot completions kept in memory: size bound in bytes and lifetime in seconds
+AUTOCOMPLETE_CACHE_MAX_BYTES = int(os.environ.get("AUTOCOMPLETE_CACHE_MAX_BYTES", 8 * 1024 * 1024))
+AUTOCOMPLETE_CACHE_TTL = float(os.environ.get("AUTOCOMPLETE_CACHE_TTL", 3600))
+
+class PrefixIndex:
+    """
+    In-memory index of completions per (language, prefix)
+    When Wikipedia returned fewer titles than were asked for, all of them starting with
+    the prefix, the list is complete, so every longer prefix is answered locally by filtering it
+    """
+
+    def __init__(self, max_bytes=AUTOCOMPLETE_CACHE_MAX_BYTES, ttl=AUTOCOMPLETE_CACHE_TTL):
+        self.entries = LRUCache(max_bytes, ttl=ttl)
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.derived_hits = 0
+        self.misses = 0
+
+    def lookup(self, language, prefix):
+        """
+        Find the completions of a normalized prefix without asking Wikipedia
+        Returns a list of titles or None
+        """
+        entry = self.entries.get((language, prefix))
+        if entry is not None:
+            self._count(exact_hits=1)
+            return entry['titles']
+
+        # A complete list for a shorter prefix contains every completion of this one
+        for length in range(len(prefix) - 1, 0, -1):
+            shorter = self.entries.get((language, prefix[:length]))
+            if shorter is None:
+                continue
+            if not shorter['complete']:
+                break
+            titles = [title for title in shorter['titles'] if normalize_query(title).startswith(prefix)]
+            self.entries.set((language, prefix), {'titles': titles, 'complete': True})
+            self._count(derived_hits=1)
+            return titles
+
+        self._count(misses=1)
+        return None
+
+    def add(self, language, prefix, titles, complete):
+        self.entries.set((language, prefix), {'titles': titles, 'complete': complete})
+
+    def _count(self, exact_hits=0, derived_hits=0, misses=0):
+        with self._lock:
+            self.exact_hits += exact_hits
+            self.derived_hits += derived_hits
+            self.misses += misses
+
+    def stats(self):
+        with self._lock:
+            lookups = self.exact_hits + self.derived_hits + self.misses
+            stats = {
+                'exact_hits': self.exact_hits,
+                'derived_hits': self.derived_hits,
+                'misses': self.misses,
+                'hit_rate': (self.exact_hits + self.derived_hits) / lookups if lookups else 0.0
+            }
+        stats['entries'] = self.entries.stats()
+        return stats
+
+_prefix_index = PrefixIndex()
+
+def get_completions(prefix, language='en', limit=AUTOCOMPLETE_LIMIT):
+    """
+    Get article titles starting with the prefix, for search type-ahead
+    Repeated and extended prefixes are answered from the in-memory index
+    Returns a list of article titles
+    """
+    key = normalize_query(prefix)
+    if not key:
+        return []
+    limit = max(1, min(limit, AUTOCOMPLETE_LIMIT))
+
+    titles = _prefix_index.lookup(language, key)
+    if titles is None:
+        try:
+            titles = get_client(language).prefix_search(prefix.strip(), limit=AUTOCOMPLETE_LIMIT)
+        except Exception as e:
+            logging.error(f"Wikipedia autocomplete error: {str(e)}")
+            raise Exception(f"Failed to get completions: {str(e)}")
+        # Redirects and accent-folded matches may not start with the prefix as typed, and a
+        # longer prefix filtered from such a list would miss them, so only literal lists are complete
+        complete = len(titles) < AUTOCOMPLETE_LIMIT and all(normalize_query(title).startswith(key) for title in titles)
+        _prefix_index.add(language, key, titles, complete=complete)
+    return titles[:limit]
+
+def get_autocomplete_stats():
+    """
+    Get hit counters of the prefix index
+    Returns a dictionary
+    """
+    return _prefix_index.stats()
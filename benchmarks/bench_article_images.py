@@ -0,0 +1,136 @@
+"""
+Upstream requests and wall time to collect the images of one article:
+the old per-image lookups against the batched generator=images query
+
+The legacy variant replays the request pattern of the old get_article_images
+(wikipedia.page, page.images, prop=images, then one prop=imageinfo request per file)
+against a local stand-in that answers after a simulated round trip
+
+Usage: python benchmarks/bench_article_images.py [--images N] [--latency SECONDS]
+"""
+import argparse
+
+import requests
+
+from common import StandInServer, with_latency, query_pages, point_clients_at, measure, report
+import wikipedia_api
+
+TITLE = 'Benchmark article'
+
+def article_files(count):
+    """
+    Files used on the stand-in article: mostly photos, with the icons, logos and
+    SVG diagrams a typical article also embeds
+    Returns a dictionary of file title to imageinfo
+    """
+    files = {}
+    for i in range(count):
+        kind = i % 6
+        if kind == 4:
+            name = f"File:Diagram {i}.svg"
+        elif kind == 5:
+            name = f"File:Commons-logo {i}.png" if i % 12 == 5 else f"File:Edit icon {i}.png"
+        else:
+            name = f"File:Photo {i}.jpg"
+        extension = name.rsplit('.', 1)[1]
+        files[name] = {
+            'url': f"https://upload.example.org/{name[5:].replace(' ', '_')}",
+            'width': 120 if kind == 5 else 800 + i,
+            'height': 120 if kind == 5 else 600 + i,
+            'mime': 'image/svg+xml' if extension == 'svg' else f"image/{'jpeg' if extension == 'jpg' else 'png'}"
+        }
+    return files
+
+def wikipedia_handler(files):
+    names = list(files)
+
+    def handler(method, path, params, body):
+        if params.get('list') == 'search':
+            return 200, {'query': {'search': [{'title': TITLE}]}}
+        if params.get('generator') == 'images':
+            limit = len(names) if params.get('gimlimit') == 'max' else int(params.get('gimlimit', 10))
+            start = int(params.get('gimcontinue', 0))
+            batch = names[start:start + limit]
+            props = params.get('iiprop', 'url').split('|')
+            pages = [
+                {'pageid': start + i + 1, 'ns': 6, 'title': name,
+                 'imageinfo': [{key: value for key, value in files[name].items()
+                                if key in props or (key in ('width', 'height') and 'size' in props)}]}
+                for i, name in enumerate(batch)
+            ]
+            data = query_pages(params, pages)
+            if start + limit < len(names):
+                data['continue'] = {'gimcontinue': str(start + limit), 'continue': 'gimcontinue||'}
+            return 200, data
+        if params.get('prop') == 'images':
+            # Without imlimit the API returns the first ten files
+            images = [{'ns': 6, 'title': name} for name in names[:int(params.get('imlimit', 10))]]
+            return 200, query_pages(params, [{'pageid': 1, 'title': TITLE, 'images': images}])
+        if params.get('prop') == 'imageinfo':
+            name = params['titles']
+            info = {key: value for key, value in files[name].items() if key in ('url', 'width', 'height')}
+            return 200, query_pages(params, [{'pageid': 2, 'title': name, 'imageinfo': [info]}])
+        # prop=info|pageprops page load
+        return 200, query_pages(params, [{'pageid': 1, 'ns': 0, 'title': TITLE, 'pageprops': {}}])
+    return handler
+
+def legacy_images(api_url, title):
+    """
+    The request pattern of the old get_article_images, one fresh connection per request
+    Returns the list of image URLs it found
+    """
+    # wikipedia.page(title): suggestion search, then the page load
+    requests.get(api_url, params={'action': 'query', 'list': 'search', 'srsearch': title, 'srlimit': 1,
+                                  'srinfo': 'suggestion', 'format': 'json'})
+    requests.get(api_url, params={'action': 'query', 'prop': 'info|pageprops', 'titles': title,
+                                  'redirects': '', 'format': 'json'})
+    # page.images
+    urls = []
+    continue_params = {}
+    while True:
+        data = requests.get(api_url, params={'action': 'query', 'generator': 'images', 'gimlimit': 'max',
+                                             'prop': 'imageinfo', 'iiprop': 'url', 'titles': title,
+                                             'format': 'json', **continue_params}).json()
+        urls.extend(page['imageinfo'][0]['url'] for page in data['query']['pages'].values() if 'imageinfo' in page)
+        if 'continue' not in data:
+            break
+        continue_params = data['continue']
+    # prop=images, then one imageinfo request per content image
+    data = requests.get(api_url, params={'action': 'query', 'prop': 'images', 'titles': title,
+                                         'format': 'json'}).json()
+    for img_data in next(iter(data['query']['pages'].values())).get('images', []):
+        img_title = img_data['title']
+        if ('File:Commons-' in img_title or 'icon' in img_title.lower() or
+                'logo' in img_title.lower() or img_title.lower().endswith('.svg')):
+            continue
+        requests.get(api_url, params={'action': 'query', 'titles': img_title, 'prop': 'imageinfo',
+                                      'iiprop': 'url|dimensions', 'format': 'json'})
+    return urls
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--images', type=int, default=60, help="files used on the article")
+    parser.add_argument('--latency', type=float, default=0.05, help="simulated round trip in seconds")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    files = article_files(args.images)
+    rows = []
+    with StandInServer(with_latency(wikipedia_handler(files), args.latency)) as server:
+        point_clients_at(server, ['en'])
+        client = wikipedia_api.get_client('en')
+
+        variants = [
+            ('legacy per-image lookups', lambda: legacy_images(client.api_url, TITLE)),
+            ('batched generator=images', lambda: wikipedia_api.fetch_images(client, [TITLE]))
+        ]
+        for name, run in variants:
+            server.requests.clear()
+            elapsed, images = measure(run, args.repeat)
+            rows.append((name, len(server.requests) // args.repeat, len(images), f"{elapsed * 1000:.1f}"))
+
+    report(f"Images of one article with {args.images} files, {args.latency * 1000:.0f} ms simulated latency",
+           rows, ('variant', 'requests', 'images', 'median ms'))
+
+if __name__ == '__main__':
+    main()
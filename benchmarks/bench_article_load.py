@@ -0,0 +1,92 @@
+"""
+Article page throughput of one worker under concurrent requests: the bundle parts
+fetched on the thread pool, blocking a thread per upstream call, against ASYNC_FETCH
+sending them from the shared event loop
+
+Every request asks for a different article so each one goes upstream; the stand-in
+answers after a simulated round trip
+
+Usage: python benchmarks/bench_article_load.py [--requests N] [--concurrency N] [--latency SECONDS]
+"""
+import time
+import argparse
+import itertools
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+from common import StandInServer, with_latency, query_pages, point_clients_at, report
+import app as app_module
+import wikipedia_async
+
+SECTION_HTML = ''.join(
+    f"<h2>Section {i}</h2><p>{'Paragraph text about the article subject. ' * 30}</p>" for i in range(1, 11)
+)
+
+def wikipedia_handler(method, path, params, body):
+    if params.get('action') == 'parse':
+        return 200, {'parse': {'text': '<p>Lead paragraph.</p>' + SECTION_HTML}}
+    title = params['titles']
+    if params.get('generator') == 'images':
+        return 200, query_pages(params, [{
+            'pageid': 1000 + i, 'ns': 6, 'title': f"File:{title} {i}.jpg",
+            'imageinfo': [{'url': f"https://upload.example.org/{title}_{i}.jpg", 'width': 800, 'height': 600,
+                           'mime': 'image/jpeg'}]
+        } for i in range(3)])
+    if 'langlinks' in params.get('prop', ''):
+        return 200, query_pages(params, [{
+            'pageid': 1, 'title': title, 'lastrevid': 42,
+            'langlinks': [{'lang': code, 'title': f"{title} ({code})", 'langname': code} for code in ('de', 'fr', 'es')]
+        }])
+    return 200, query_pages(params, [{
+        'pageid': 1, 'title': title, 'lastrevid': 42, 'touched': '2024-01-01T00:00:00Z',
+        'extract': 'Lead paragraph.', 'fullurl': f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"
+    }])
+
+def run_load(titles, concurrency):
+    """
+    Request the article pages from as many threads as a worker would serve them on
+    Returns a tuple of (wall time, per-request latencies, error count)
+    """
+    client = app_module.app.test_client()
+
+    def fetch(title):
+        started = time.perf_counter()
+        response = client.get(f"/article/en/{title}?lazy=0")
+        return time.perf_counter() - started, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(fetch, titles))
+    elapsed = time.perf_counter() - started
+    return elapsed, [latency for latency, _ in results], sum(status != 200 for _, status in results)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=32, help="requests served at once, as worker threads")
+    parser.add_argument('--latency', type=float, default=0.1, help="simulated round trip in seconds")
+    args = parser.parse_args()
+
+    serial = itertools.count()
+    rows = []
+    with StandInServer(with_latency(wikipedia_handler, args.latency)) as server:
+        point_clients_at(server, ['en'])
+        wikipedia_async.get_async_client.cache_clear()
+        wikipedia_async.get_async_client('en').api_url = f"{server.url}/en/w/api.php"
+
+        for name, async_fetch in (('thread pool', False), ('ASYNC_FETCH event loop', True)):
+            app_module.ASYNC_FETCH = async_fetch
+            # Warm up connections, the event loop and template compilation on one article
+            run_load([f"Warm-up {next(serial)}"], 1)
+            titles = [f"Load test {next(serial)}" for _ in range(args.requests)]
+            elapsed, latencies, errors = run_load(titles, args.concurrency)
+            latencies.sort()
+            rows.append((name, f"{args.requests / elapsed:.1f}", f"{statistics.median(latencies) * 1000:.0f}",
+                         f"{latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f}", errors))
+
+    report(f"{args.requests} article pages, {args.concurrency} at a time, "
+           f"{args.latency * 1000:.0f} ms simulated latency", rows,
+           ('variant', 'pages/s', 'p50 ms', 'p95 ms', 'errors'))
+
+if __name__ == '__main__':
+    main()
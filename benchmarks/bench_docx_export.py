@@ -0,0 +1,146 @@
+"""
+Time and peak memory to build a long article export: the old per-run formatting
+with python-docx's object API against the pre-styled template writing paragraphs
+straight into the body XML
+
+The article is synthetic: sections of paragraphs and bulleted lists, sized like a
+long featured article by default (500 sections, about 2 MB of text)
+
+Usage: python benchmarks/bench_docx_export.py [--sections N] [--kilobytes N]
+"""
+import io
+import json
+import datetime
+import argparse
+import resource
+import multiprocessing
+
+from docx import Document
+from docx.shared import Pt, RGBColor, Inches
+from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
+
+from common import measure, report
+from docx_generator import build_docx
+
+def build_article(section_count, kilobytes):
+    """
+    Sections of paragraphs with a bulleted list every few sections, about the requested size
+    Returns the sections as a JSON string, as exports pass them
+    """
+    sentence = "The river carries sediment from the mountains down to the plains and the sea. "
+    paragraph_chars = max(200, kilobytes * 1024 // section_count // 3)
+    paragraph = (sentence * (paragraph_chars // len(sentence) + 1))[:paragraph_chars].strip()
+    sections = {'Introduction': paragraph + '\n\n'}
+    for i in range(1, section_count):
+        text = '\n\n'.join([paragraph] * 3) + '\n\n'
+        if i % 4 == 0:
+            text += ''.join(f"• Item {j} of section {i}\n" for j in range(8)) + '\n'
+        sections[f"Section {i}"] = text
+    return json.dumps(sections)
+
+def legacy_build_docx(title, content):
+    """
+    The document builder the template replaced, for JSON section content:
+    every paragraph is added through the object API and formatted run by run
+    Returns the document as bytes
+    """
+    doc = Document()
+    for section in doc.sections:
+        section.left_margin = Inches(1)
+        section.right_margin = Inches(1)
+        section.top_margin = Inches(1)
+        section.bottom_margin = Inches(1)
+
+    title_heading = doc.add_heading(title, level=1)
+    title_heading.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    for run in title_heading.runs:
+        run.font.size = Pt(18)
+        run.font.color.rgb = RGBColor(0, 0, 0)
+
+    now = datetime.datetime.now()
+    for text in (f"Generated on: {now.strftime('%Y-%m-%d %H:%M:%S')}", "Source: WikiTruth"):
+        para = doc.add_paragraph()
+        para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        run = para.add_run(text)
+        run.font.size = Pt(10)
+        run.font.italic = True
+        run.font.color.rgb = RGBColor(100, 100, 100)
+
+    separator = doc.add_paragraph()
+    separator.paragraph_format.space_before = Pt(10)
+    separator.paragraph_format.space_after = Pt(10)
+    separator.add_run("_" * 50).font.color.rgb = RGBColor(200, 200, 200)
+
+    for section, text in json.loads(content).items():
+        if section == 'Introduction':
+            intro_para = doc.add_paragraph()
+            intro_para.paragraph_format.space_after = Pt(12)
+            intro_para.paragraph_format.line_spacing_rule = WD_LINE_SPACING.SINGLE
+            intro_para.add_run(text).font.size = Pt(12)
+            continue
+        section_heading = doc.add_heading(section, level=2)
+        for run in section_heading.runs:
+            run.font.size = Pt(14)
+            run.font.color.rgb = RGBColor(0, 0, 0)
+        for p_text in text.split('\n\n'):
+            if not p_text.strip():
+                continue
+            if p_text.strip().startswith('•'):
+                for item in p_text.strip().split('\n'):
+                    if item.strip():
+                        list_para = doc.add_paragraph(item.strip().lstrip('• '), style='List Bullet')
+                        list_para.paragraph_format.space_after = Pt(6)
+                        for run in list_para.runs:
+                            run.font.size = Pt(12)
+            else:
+                section_para = doc.add_paragraph()
+                section_para.paragraph_format.space_after = Pt(12)
+                section_para.paragraph_format.line_spacing_rule = WD_LINE_SPACING.SINGLE
+                section_para.add_run(p_text.strip()).font.size = Pt(12)
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+def _peak_growth(function, title, content, results):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    function(title, content)
+    results.put(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before)
+
+def peak_memory(function, title, content):
+    """
+    Run a build once in a fresh process; the XML tree lives in lxml's C heap, which
+    tracemalloc does not see, so the growth of the peak resident set size is measured
+    Returns the peak growth in bytes
+    """
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=_peak_growth, args=(function, title, content, results))
+    process.start()
+    growth = results.get()
+    process.join()
+    return growth * 1024  # ru_maxrss is in kilobytes on Linux
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sections', type=int, default=500)
+    parser.add_argument('--kilobytes', type=int, default=2048, help="approximate article text size")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    title = 'Benchmark article - Full Article'
+    content = build_article(args.sections, args.kilobytes)
+    variants = [('object API, per-run formatting', legacy_build_docx), ('template styles, direct XML', build_docx)]
+    # Linux carries the peak resident set size across fork and exec, so the memory runs go
+    # first, while this process is still small
+    peaks = [peak_memory(function, title, content) for _, function in variants]
+    rows = []
+    for (name, function), peak in zip(variants, peaks):
+        elapsed, data = measure(lambda: function(title, content), args.repeat)
+        rows.append((name, f"{elapsed * 1000:.0f}", f"{peak / 2 ** 20:.1f}", f"{len(data) // 1024}"))
+
+    report(f"DOCX export of {args.sections} sections, {len(content) // 1024} KiB of text",
+           rows, ('variant', 'median ms', 'peak MiB', 'document KiB'))
+
+if __name__ == '__main__':
+    main()
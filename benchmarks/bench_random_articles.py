@@ -0,0 +1,123 @@
+"""
+Upstream requests per WikiTok card: the old list=random query followed by
+wikipedia.page, page.summary and page.images for every title, against the
+generator=random query that returns extracts, thumbnails and URLs together
+
+Both variants run against a local stand-in that answers after a simulated round trip;
+a share of the stand-in's pages have no usable image, as on the real wikis
+
+Usage: python benchmarks/bench_random_articles.py [--cards N] [--latency SECONDS]
+"""
+import random
+import argparse
+
+import requests
+
+from common import StandInServer, with_latency, query_pages, point_clients_at, measure, report
+import wikipedia_api
+
+def random_pages(count, image_share, seed=7):
+    """
+    Pages the stand-in draws random articles from
+    Returns a list of page dictionaries
+    """
+    rng = random.Random(seed)
+    pages = []
+    for i in range(count):
+        title = f"Random article {i}"
+        page = {
+            'pageid': i + 1, 'ns': 0, 'title': title,
+            'extract': f"{title} is a stand-in article. " * 20,
+            'fullurl': f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"
+        }
+        if rng.random() < image_share:
+            page['pageimage'] = f"Photo_{i}.jpg"
+            page['thumbnail'] = {'source': f"https://upload.example.org/640px-Photo_{i}.jpg", 'width': 640, 'height': 480}
+        pages.append(page)
+    return pages
+
+def wikipedia_handler(pages, seed=11):
+    by_title = {page['title']: page for page in pages}
+    rng = random.Random(seed)
+
+    def handler(method, path, params, body):
+        if params.get('generator') == 'random':
+            return 200, query_pages(params, rng.sample(pages, int(params['grnlimit'])))
+        if params.get('list') == 'random':
+            sample = rng.sample(pages, int(params['rnlimit']))
+            return 200, {'query': {'random': [{'id': page['pageid'], 'ns': 0, 'title': page['title']} for page in sample]}}
+        if params.get('list') == 'search':
+            return 200, {'query': {'search': [{'title': params['srsearch']}]}}
+        page = by_title[params['titles']]
+        if params.get('prop') == 'extracts':
+            return 200, query_pages(params, [{key: page[key] for key in ('pageid', 'title', 'extract')}])
+        if params.get('generator') == 'images':
+            files = [{'pageid': 10 ** 6 + page['pageid'], 'ns': 6, 'title': f"File:{page['pageimage']}",
+                      'imageinfo': [{'url': page['thumbnail']['source']}]}] if 'pageimage' in page else []
+            return 200, query_pages(params, files)
+        # prop=info|pageprops page load
+        return 200, query_pages(params, [{key: page[key] for key in ('pageid', 'ns', 'title', 'fullurl')}])
+    return handler
+
+def legacy_random_articles(api_url, limit=10, images_only=True):
+    """
+    The request pattern of the old get_random_articles, one fresh connection per request
+    Returns the list of cards
+    """
+    data = requests.get(api_url, params={'action': 'query', 'format': 'json', 'list': 'random',
+                                         'rnlimit': limit * 2, 'rnnamespace': 0}).json()
+    articles = []
+    for article in data['query']['random']:
+        title = article['title']
+        # wikipedia.page(title): suggestion search, then the page load
+        requests.get(api_url, params={'action': 'query', 'list': 'search', 'srsearch': title, 'srlimit': 1,
+                                      'srinfo': 'suggestion', 'format': 'json'})
+        page = requests.get(api_url, params={'action': 'query', 'prop': 'info|pageprops', 'inprop': 'url',
+                                             'titles': title, 'redirects': '', 'format': 'json'}).json()
+        page = next(iter(page['query']['pages'].values()))
+        # page.summary, then page.images
+        summary = requests.get(api_url, params={'action': 'query', 'prop': 'extracts', 'explaintext': '',
+                                                'exintro': '', 'titles': title, 'format': 'json'}).json()
+        summary = next(iter(summary['query']['pages'].values()))['extract']
+        images = requests.get(api_url, params={'action': 'query', 'generator': 'images', 'gimlimit': 'max',
+                                               'prop': 'imageinfo', 'iiprop': 'url', 'titles': title,
+                                               'format': 'json'}).json()
+        images = [info['url'] for image in images['query']['pages'].values() for info in image['imageinfo']]
+        image_url = next((img for img in images if not img.lower().endswith('.svg')), None)
+        if images_only and not image_url:
+            continue
+        articles.append({'title': title, 'summary': summary[:300], 'image': image_url, 'url': page['fullurl']})
+        if len(articles) >= limit:
+            break
+    return articles
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cards', type=int, default=10, help="cards requested per feed page")
+    parser.add_argument('--image-share', type=float, default=0.6, help="share of pages with a usable image")
+    parser.add_argument('--latency', type=float, default=0.03, help="simulated round trip in seconds")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    with StandInServer(with_latency(wikipedia_handler(random_pages(2000, args.image_share)), args.latency)) as server:
+        point_clients_at(server, ['en'])
+        api_url = wikipedia_api.get_client('en').api_url
+
+        variants = [
+            ('legacy list=random + page loads', lambda: legacy_random_articles(api_url, args.cards)),
+            ('generator=random batches', lambda: wikipedia_api.get_random_articles('en', args.cards))
+        ]
+        for name, run in variants:
+            server.requests.clear()
+            counts = []
+            elapsed, _ = measure(lambda: counts.append(len(run())), args.repeat)
+            cards = sum(counts)
+            rows.append((name, f"{len(server.requests) / cards:.2f}", f"{cards / args.repeat:.1f}",
+                         f"{elapsed * 1000:.1f}"))
+
+    report(f"WikiTok cards, {args.cards} per page, {args.latency * 1000:.0f} ms simulated latency",
+           rows, ('variant', 'requests/card', 'cards/page', 'median ms'))
+
+if __name__ == '__main__':
+    main()
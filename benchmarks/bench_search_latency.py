@@ -0,0 +1,109 @@
+"""
+Latency of search and autocomplete on a repeat-heavy workload: every request going
+to Wikipedia, as before, against the search cache and the local prefix index
+
+Queries are drawn from a Zipf-like distribution, and autocomplete replays users
+typing titles one keystroke at a time; the stand-in answers after a simulated round trip
+
+Usage: python benchmarks/bench_search_latency.py [--requests N] [--latency SECONDS]
+"""
+import time
+import random
+import argparse
+import statistics
+
+from common import StandInServer, with_latency, point_clients_at, report
+import wikipedia_api
+import autocomplete
+
+SYLLABLES = ['ka', 'ri', 'to', 'mel', 'an', 'sor', 'vi', 'len', 'du', 'ast', 'or', 'pe', 'lin', 'go', 'mar']
+
+def make_titles(count, seed=3):
+    """
+    Article titles the stand-in wiki knows
+    Returns a sorted list of titles
+    """
+    rng = random.Random(seed)
+    titles = set()
+    while len(titles) < count:
+        words = [''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(rng.randint(1, 2))]
+        titles.add(' '.join(words).capitalize())
+    return sorted(titles)
+
+def wikipedia_handler(titles):
+    def handler(method, path, params, body):
+        if params.get('list') == 'prefixsearch':
+            prefix = params['pssearch'].casefold()
+            found = [title for title in titles if title.casefold().startswith(prefix)][:int(params['pslimit'])]
+            return 200, {'query': {'prefixsearch': [{'title': title} for title in found]}}
+        query = params['srsearch'].casefold()
+        found = [title for title in titles if query in title.casefold()][:int(params.get('srlimit', 10))]
+        return 200, {'query': {'search': [{'title': title} for title in found]}}
+    return handler
+
+def zipf_queries(titles, count, seed=5):
+    # Popular queries repeat often, with a long tail of rare ones
+    rng = random.Random(seed)
+    popular = rng.sample(titles, 200)
+    weights = [1 / rank for rank in range(1, len(popular) + 1)]
+    return [query.split()[0].lower() for query in rng.choices(popular, weights, k=count)]
+
+def typing_sessions(titles, count, seed=9):
+    # Each session types the start of a popular title, one keystroke per request
+    rng = random.Random(seed)
+    popular = rng.sample(titles, 100)
+    weights = [1 / rank for rank in range(1, len(popular) + 1)]
+    prefixes = []
+    for title in rng.choices(popular, weights, k=count):
+        prefixes.extend(title[:length] for length in range(1, min(len(title), 8) + 1))
+    return prefixes
+
+def run(server, calls):
+    """
+    Time each call separately
+    Returns a tuple of (per-call latencies, upstream requests made)
+    """
+    server.requests.clear()
+    latencies = []
+    for call in calls:
+        started = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - started)
+    return latencies, len(server.requests)
+
+def row(name, latencies, upstream):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    return (name, len(latencies), upstream, f"{statistics.median(latencies) * 1000:.2f}", f"{p95 * 1000:.2f}",
+            f"{sum(latencies):.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=400, help="search queries, and typing sessions / 4")
+    parser.add_argument('--latency', type=float, default=0.05, help="simulated round trip in seconds")
+    args = parser.parse_args()
+
+    titles = make_titles(5000)
+    queries = zipf_queries(titles, args.requests)
+    prefixes = typing_sessions(titles, args.requests // 4)
+    rows = []
+    with StandInServer(with_latency(wikipedia_handler(titles), args.latency)) as server:
+        point_clients_at(server, ['en'])
+        client = wikipedia_api.get_client('en')
+
+        rows.append(row('search, uncached', *run(server, [lambda q=q: client.search(q) for q in queries])))
+        rows.append(row('search, cached', *run(server, [lambda q=q: wikipedia_api.search_wikipedia(q) for q in queries])))
+        rows.append(row('autocomplete, per keystroke', *run(server, [
+            lambda p=p: client.prefix_search(p, limit=autocomplete.AUTOCOMPLETE_LIMIT) for p in prefixes
+        ])))
+        rows.append(row('autocomplete, prefix index', *run(server, [
+            lambda p=p: autocomplete.get_completions(p) for p in prefixes
+        ])))
+
+    report(f"Search and autocomplete, {args.latency * 1000:.0f} ms simulated latency", rows,
+           ('variant', 'requests', 'upstream', 'p50 ms', 'p95 ms', 'total s'))
+    print(f"prefix index: {autocomplete.get_autocomplete_stats()['hit_rate']:.0%} hit rate, "
+          f"search cache: {wikipedia_api.get_search_cache_stats()}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Time and peak memory to split article HTML into sections: the old BeautifulSoup
+walk against the single-pass section_extractor
+
+The input is the saved parser output from tests/fixtures, repeated with distinct
+headings until it reaches the requested size, so long articles can be measured
+
+Usage: python benchmarks/bench_section_extractor.py [--kilobytes N]
+"""
+import os
+import re
+import argparse
+import tracemalloc
+
+from common import REPO_ROOT, measure, report
+from section_extractor import extract_sections
+from tests.legacy_sections import legacy_extract_sections
+
+FIXTURE_PATH = os.path.join(REPO_ROOT, 'tests', 'fixtures', 'article_parser_output.html')
+
+def build_article(kilobytes):
+    """
+    Repeat the body of the saved article, numbering its headings so each copy adds sections
+    Returns the article HTML
+    """
+    with open(FIXTURE_PATH, encoding='utf-8') as f:
+        html = f.read()
+    start = html.index('>') + 1
+    end = html.rindex('</div>')
+    body = html[start:end]
+
+    copies = []
+    size = 0
+    while size < kilobytes * 1024:
+        copy = re.sub(r'(<h[23] id="[^"]*">)([^<]*)', lambda m: f"{m.group(1)}{m.group(2)} {len(copies) + 1}", body)
+        copies.append(copy)
+        size += len(copy)
+    return html[:start] + ''.join(copies) + html[end:]
+
+def peak_memory(function, html):
+    """
+    Run the extraction once under tracemalloc
+    Returns the peak traced allocation in bytes
+    """
+    tracemalloc.start()
+    try:
+        function(html)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--kilobytes', type=int, nargs='+', default=[50, 500, 2000], help="article sizes")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    variants = [('BeautifulSoup walk', legacy_extract_sections), ('single-pass extractor', extract_sections)]
+    rows = []
+    for kilobytes in args.kilobytes:
+        html = build_article(kilobytes)
+        expected = None
+        for name, function in variants:
+            elapsed, sections = measure(lambda: function(html), args.repeat)
+            if expected is None:
+                expected = sections
+            rows.append((
+                f"{len(html) // 1024} KiB", name, len(sections), f"{elapsed * 1000:.1f}",
+                f"{peak_memory(function, html) / 2 ** 20:.2f}", 'yes' if sections == expected else 'NO'
+            ))
+
+    report("Section extraction", rows, ('article', 'variant', 'sections', 'median ms', 'peak MiB', 'same output'))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+import statistics
+
+# The application modules live at the repository root; the stand-in server is shared with the tests
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from tests.standin import StandInServer  # noqa: E402
+
+def with_latency(handler, latency):
+    """
+    Wrap a stand-in handler so every response is delayed by the given number of seconds,
+    standing in for the round trip to the real upstream
+    Returns the wrapped handler
+    """
+    def delayed(method, path, params, body):
+        time.sleep(latency)
+        return handler(method, path, params, body)
+    return delayed
+
+def query_pages(params, pages):
+    """
+    Shape a list of page dictionaries as an action=query response in the format the
+    request asked for: a list with formatversion=2, a dictionary keyed by page id otherwise
+    Returns the response payload
+    """
+    if params.get('formatversion') == '2':
+        return {'query': {'pages': pages}}
+    return {'query': {'pages': {str(page.get('pageid', -1 - i)): page for i, page in enumerate(pages)}}}
+
+def point_clients_at(server, languages):
+    """Send the shared Wikipedia clients of the given language editions to a stand-in server"""
+    import wikipedia_api
+    wikipedia_api.get_client.cache_clear()
+    for language in languages:
+        wikipedia_api.get_client(language).api_url = f"{server.url}/{language}/w/api.php"
+
+def measure(function, repeat=5):
+    """
+    Run a function several times
+    Returns a tuple of (median wall time in seconds, last result)
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+def report(title, rows, columns):
+    """Print benchmark results as an aligned table, one row per variant"""
+    print(title)
+    widths = [max(len(str(column)), *(len(str(row[i])) for row in rows)) for i, column in enumerate(columns)]
+    print('  '.join(str(column).ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print('  '.join(str(value).ljust(width) for value, width in zip(row, widths)))
+    print()
@@ -0,0 +1,127 @@
+import os
+import time
+import zipfile
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from article_export import build_export
+from docx_generator import docx_filename, build_docx_chapters
+from export_jobs import export_jobs, generate_export
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+
+# Most articles in one bulk export, and how many are fetched and built at once;
+# only that many finished documents are ever held in memory by a ZIP export
+BULK_EXPORT_MAX_ARTICLES = int(os.environ.get("BULK_EXPORT_MAX_ARTICLES", 50))
+BULK_EXPORT_WINDOW = int(os.environ.get("BULK_EXPORT_WINDOW", 4))
+
+_bulk_executor = ThreadPoolExecutor(max_workers=BULK_EXPORT_WINDOW * 4, thread_name_prefix='bulk-export')
+
+class _StreamWriter:
+    """Write-only, unseekable file object that collects ZIP output for the response"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def _windowed(references, task):
+    """
+    Run task over the references with at most BULK_EXPORT_WINDOW running at once
+    Yields (reference, future) pairs in order of completion
+    """
+    references = iter(references)
+    running = {}
+    for reference in references:
+        running[_bulk_executor.submit(task, reference)] = reference
+        if len(running) >= BULK_EXPORT_WINDOW:
+            break
+    while running:
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield running.pop(future), future
+            # Refill the window as entries finish
+            reference = next(references, None)
+            if reference is not None:
+                running[_bulk_executor.submit(task, reference)] = reference
+
+def _export_article(reference, translated_to):
+    title, content = build_export(reference['title'], reference['language'], 'full', translated_to=translated_to)
+    buffer, filename = generate_export(title, content)
+    return buffer.getvalue()
+
+def stream_zip(references, translated_to=None):
+    """
+    Export several articles into a ZIP archive, streamed as the documents finish
+    Articles are fetched and built concurrently within a bounded window, and each
+    document is released as soon as it has been written to the archive
+
+    Args:
+        references (list): Dictionaries with 'language' and 'title'
+        translated_to (str): Target language code, or None for the original text
+
+    Yields:
+        bytes: Consecutive pieces of the ZIP archive
+    """
+    stream = _StreamWriter()
+    names = set()
+    errors = []
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for reference, future in _windowed(references, lambda ref: _export_article(ref, translated_to)):
+            try:
+                data = future.result()
+            except Exception as e:
+                logging.error(f"Bulk export error for {reference['title']}: {str(e)}")
+                errors.append(f"{reference['language']}/{reference['title']}: {str(e)}")
+                continue
+
+            # Keep entry names unique when two references share a title
+            name = f"{reference['language']}-{docx_filename(reference['title'])}"
+            base, counter = name[:-len('.docx')], 2
+            while name in names:
+                name = f"{base} ({counter}).docx"
+                counter += 1
+            names.add(name)
+
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, data)
+            yield stream.drain()
+
+        if errors:
+            archive.writestr('errors.txt', '\n'.join(errors) + '\n')
+    yield stream.drain()
+
+def build_merged_docx(references, translated_to=None, title="WikiTruth Articles"):
+    """
+    Export several articles into one document with a chapter per article, in request order
+    Returns a tuple of (document bytes, download filename)
+    """
+    def fetch(reference):
+        return build_export(reference['title'], reference['language'], 'full', translated_to=translated_to)
+
+    contents = {}
+    for reference, future in _windowed(references, fetch):
+        try:
+            contents[id(reference)] = future.result()[1]
+        except Exception as e:
+            logging.error(f"Bulk export error for {reference['title']}: {str(e)}")
+
+    chapters = [(reference['title'], contents[id(reference)]) for reference in references if id(reference) in contents]
+    if not chapters:
+        raise Exception("None of the requested articles could be exported")
+
+    # The merged document is always large enough to be built on the export process pool
+    data = export_jobs.build(title, chapters, builder=build_docx_chapters)
+    return data, docx_filename(title)
@@ -0,0 +1,112 @@
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+def estimate_size(value):
+    """
+    Roughly estimate the memory held by a value built from dicts, lists and strings
+    Returns a size in bytes
+    """
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+class LRUCache:
+    """
+    Thread-safe LRU cache bounded by an approximate size in bytes, with an optional TTL
+    Expired entries are kept until evicted so callers can revalidate them cheaply
+    """
+
+    def __init__(self, max_bytes, ttl=None, sizeof=estimate_size):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self._entries = OrderedDict()  # key -> (value, size, stored_at)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _is_fresh(self, stored_at):
+        return self.ttl is None or time.monotonic() - stored_at < self.ttl
+
+    def get(self, key):
+        """
+        Look up a fresh entry, counting a hit or a miss
+        Returns the cached value or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if not self._is_fresh(entry[2]):
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get_stale(self, key):
+        """
+        Look up an entry regardless of its age, without touching the counters
+        Returns the cached value or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry else None
+
+    def set(self, key, value):
+        """Store a value, evicting least recently used entries to stay within max_bytes"""
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            # Values larger than the whole cache are never stored
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size, time.monotonic())
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def touch(self, key):
+        """Mark an entry as fresh again after it has been revalidated"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], entry[1], time.monotonic())
+                self._entries.move_to_end(key)
+
+    def delete(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.current_bytes -= entry[1]
+
+    def stats(self):
+        """
+        Get cache counters for tuning
+        Returns a dictionary
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
@@ -1,188 +1,312 @@
 import os
 import io
+import time
+import hashlib
 import logging
 import datetime
 import json
-import tempfile
-from flask import send_file, url_for
+import threading
+import functools
 from docx import Document
 from docx.shared import Pt, RGBColor, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
+from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+
+from cache import LRUCache
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 
-# Directory to store generated files temporarily
-TEMP_DIR = os.path.join('static', 'downloads')
-os.makedirs(TEMP_DIR, exist_ok=True)
+# Bump whenever the document layout changes so cached documents are rebuilt
+TEMPLATE_VERSION = 2
+
+# Pre-styled template; when no path is set, one is built in memory on first use
+DOCX_TEMPLATE_PATH = os.environ.get("DOCX_TEMPLATE_PATH", "")
+
+# Named styles defined by the template
+STYLE_META = 'WikiTruth Meta'
+STYLE_SEPARATOR = 'WikiTruth Separator'
+STYLE_BODY = 'WikiTruth Body'
+STYLE_LIST = 'WikiTruth List'
+STYLE_FOOTER = 'WikiTruth Footer'
+
+# Finished documents kept in memory by content hash, and for how many seconds
+DOCX_CACHE_MAX_BYTES = int(os.environ.get("DOCX_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+DOCX_CACHE_TTL = float(os.environ.get("DOCX_CACHE_TTL", 3600))
+
+_docx_cache = LRUCache(DOCX_CACHE_MAX_BYTES, ttl=DOCX_CACHE_TTL, sizeof=len)
+
+# Optional copy of every document on disk; the janitor keeps the directory within
+# a total size and deletes files older than the maximum age (in seconds)
+DOCX_DISK_OUTPUT = os.environ.get("DOCX_DISK_OUTPUT", "0") == "1"
+DOCX_OUTPUT_DIR = os.environ.get("DOCX_OUTPUT_DIR", os.path.join('static', 'downloads'))
+DOCX_DISK_MAX_BYTES = int(os.environ.get("DOCX_DISK_MAX_BYTES", 256 * 1024 * 1024))
+DOCX_DISK_MAX_AGE = float(os.environ.get("DOCX_DISK_MAX_AGE", 24 * 3600))
+DOCX_JANITOR_INTERVAL = float(os.environ.get("DOCX_JANITOR_INTERVAL", 60))
+
+_janitor_lock = threading.Lock()
+_last_janitor_run = 0.0
 
-def generate_docx(title, content):
+def docx_cache_key(title, content):
+    """
+    Build the content address of a document
+    Returns a hex digest of the template version, title and content
+    """
+    if not isinstance(content, str):
+        content = json.dumps(content, sort_keys=True, ensure_ascii=False)
+    material = '\0'.join([str(TEMPLATE_VERSION), title, content])
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+def docx_filename(title):
+    """Create a safe download filename from a document title"""
+    safe_title = "".join([c for c in title if c.isalnum() or c in ' .-_']).rstrip()
+    if not safe_title:
+        safe_title = "document"
+    return f"{safe_title}.docx"
+
+def generate_docx(title, content, build=None):
     """
     Generate a .docx file from the given title and content
+    Identical exports are served from the document cache instead of being rebuilt
     
     Args:
         title (str): Document title
         content (str): Document content or JSON string of content
+        build (callable): Builds the document bytes from title and content;
+            defaults to building in this process with build_docx
         
     Returns:
-        str: URL path to the generated .docx file
+        tuple: (io.BytesIO with the .docx file, download filename)
+    """
+    key = docx_cache_key(title, content)
+    data = _docx_cache.get(key)
+    if data is None:
+        data = (build or build_docx)(title, content)
+        _docx_cache.set(key, data)
+        if DOCX_DISK_OUTPUT:
+            _write_to_disk(key, title, data)
+    return io.BytesIO(data), docx_filename(title)
+
+def get_docx_cache_stats():
+    """
+    Get hit and size counters of the document cache
+    Returns a dictionary
+    """
+    return _docx_cache.stats()
+
+def build_docx(title, content):
+    """
+    Build a .docx document from the given title and content in memory
+    All formatting comes from the named styles of the template
+    Returns the document as bytes
+    """
+    return build_docx_chapters(title, [(None, content)])
+
+def build_docx_chapters(title, chapters):
+    """
+    Build one .docx document with a chapter per (chapter title, content) pair;
+    a chapter without a title continues the title page
+    Returns the document as bytes
     """
     try:
-        # Create a new Document
-        doc = Document()
+        doc = Document(io.BytesIO(_load_template()))
+        style_ids = {name: doc.styles[name].style_id for name in (
+            'Heading 1', 'Heading 2', STYLE_META, STYLE_SEPARATOR, STYLE_BODY, STYLE_LIST
+        )}
         
-        # Set default font and margins
-        sections = doc.sections
-        for section in sections:
-            section.left_margin = Inches(1)
-            section.right_margin = Inches(1)
-            section.top_margin = Inches(1)
-            section.bottom_margin = Inches(1)
+        # Paragraphs are written straight into the body XML in front of the section
+        # properties; assigning a style through the object API rescans all styles each time
+        sect_pr = doc.element.body.find(qn('w:sectPr'))
+        def add(text, style):
+            sect_pr.addprevious(_paragraph(text, style_ids[style]))
         
-        # Add title with formatting
-        title_heading = doc.add_heading(title, level=1)
-        title_heading.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        for run in title_heading.runs:
-            run.font.size = Pt(18)
-            run.font.color.rgb = RGBColor(0, 0, 0)  # Black
-        
-        # Add timestamp with styling
+        # Title, timestamp, source and a separator line
         now = datetime.datetime.now()
-        timestamp_para = doc.add_paragraph()
-        timestamp_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        timestamp_run = timestamp_para.add_run(f"Generated on: {now.strftime('%Y-%m-%d %H:%M:%S')}")
-        timestamp_run.font.size = Pt(10)
-        timestamp_run.font.italic = True
-        timestamp_run.font.color.rgb = RGBColor(100, 100, 100)  # Dark gray
-        
-        # Add source with styling
-        source_para = doc.add_paragraph()
-        source_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        source_run = source_para.add_run("Source: WikiTruth")
-        source_run.font.size = Pt(10)
-        source_run.font.italic = True
-        source_run.font.color.rgb = RGBColor(100, 100, 100)  # Dark gray
-        
-        # Add a horizontal line/separator
-        separator = doc.add_paragraph()
-        separator.paragraph_format.space_before = Pt(10)
-        separator.paragraph_format.space_after = Pt(10)
-        separator_run = separator.add_run("_" * 50)
-        separator_run.font.color.rgb = RGBColor(200, 200, 200)  # Light gray
-        
-        # Parse and add content
-        if isinstance(content, str) and (content.startswith('{') and content.endswith('}')):
-            try:
-                content_dict = json.loads(content)
-                if isinstance(content_dict, dict):
-                    # This is a dictionary of sections
-                    for section, text in content_dict.items():
-                        if section == 'Introduction':
-                            # Format the introduction paragraph
-                            intro_para = doc.add_paragraph()
-                            intro_para.paragraph_format.space_after = Pt(12)
-                            intro_para.paragraph_format.line_spacing_rule = WD_LINE_SPACING.SINGLE
-                            intro_run = intro_para.add_run(text)
-                            intro_run.font.size = Pt(12)
-                        else:
-                            # Format section headings
-                            section_heading = doc.add_heading(section, level=2)
-                            for run in section_heading.runs:
-                                run.font.size = Pt(14)
-                                run.font.color.rgb = RGBColor(0, 0, 0)  # Black
-                            
-                            # Format section content with paragraph breaks
-                            paragraphs = text.split('\n\n')
-                            for p_text in paragraphs:
-                                if p_text.strip():
-                                    # Check if this is a list item
-                                    if p_text.strip().startswith('•'):
-                                        list_items = p_text.strip().split('\n')
-                                        for item in list_items:
-                                            if item.strip():
-                                                list_para = doc.add_paragraph(
-                                                    item.strip().lstrip('• '), 
-                                                    style='List Bullet'
-                                                )
-                                                list_para.paragraph_format.space_after = Pt(6)
-                                                for run in list_para.runs:
-                                                    run.font.size = Pt(12)
-                                    else:
-                                        section_para = doc.add_paragraph()
-                                        section_para.paragraph_format.space_after = Pt(12)
-                                        section_para.paragraph_format.line_spacing_rule = WD_LINE_SPACING.SINGLE
-                                        section_run = section_para.add_run(p_text.strip())
-                                        section_run.font.size = Pt(12)
-                else:
-                    # It's JSON but not a dictionary - use as plain text
-                    para = doc.add_paragraph()
-                    para.paragraph_format.space_after = Pt(12)
-                    para.paragraph_format.line_spacing_rule = WD_LINE_SPACING.SINGLE
-                    para_run = para.add_run(content)
-                    para_run.font.size = Pt(12)
-            except json.JSONDecodeError:
-                # Not valid JSON, use as plain text
-                para = doc.add_paragraph()
-                para.paragraph_format.space_after = Pt(12)
-                para.paragraph_format.line_spacing_rule = WD_LINE_SPACING.SINGLE
-                para_run = para.add_run(content)
-                para_run.font.size = Pt(12)
-        elif isinstance(content, dict):
-            # Direct dictionary input (not JSON string)
-            for section, text in content.items():
-                if section == 'Introduction':
-                    # Format the introduction paragraph
-                    intro_para = doc.add_paragraph()
-                    intro_para.paragraph_format.space_after = Pt(12)
-                    intro_para.paragraph_format.line_spacing_rule = WD_LINE_SPACING.SINGLE
-                    intro_run = intro_para.add_run(text)
-                    intro_run.font.size = Pt(12)
-                else:
-                    # Format section headings
-                    section_heading = doc.add_heading(section, level=2)
-                    for run in section_heading.runs:
-                        run.font.size = Pt(14)
-                        run.font.color.rgb = RGBColor(0, 0, 0)  # Black
-                    
-                    # Format section content
-                    section_para = doc.add_paragraph()
-                    section_para.paragraph_format.space_after = Pt(12)
-                    section_para.paragraph_format.line_spacing_rule = WD_LINE_SPACING.SINGLE
-                    section_run = section_para.add_run(text)
-                    section_run.font.size = Pt(12)
-        else:
-            # Simple string content (e.g., for summary)
-            para = doc.add_paragraph()
-            para.paragraph_format.space_after = Pt(12)
-            para.paragraph_format.line_spacing_rule = WD_LINE_SPACING.SINGLE
-            para_run = para.add_run(content)
-            para_run.font.size = Pt(12)
-        
-        # Add footer with page numbers
-        footer = doc.sections[0].footer
-        footer_para = footer.paragraphs[0] if footer.paragraphs else footer.add_paragraph()
-        footer_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        footer_run = footer_para.add_run("Page ")
-        footer_run.font.size = Pt(9)
-        footer_run.font.color.rgb = RGBColor(128, 128, 128)  # Gray
+        add(title, 'Heading 1')
+        add(f"Generated on: {now.strftime('%Y-%m-%d %H:%M:%S')}", STYLE_META)
+        add("Source: WikiTruth", STYLE_META)
+        add("_" * 50, STYLE_SEPARATOR)
         
-        # Create a safe filename
-        safe_title = "".join([c for c in title if c.isalnum() or c in ' .-_']).rstrip()
-        if not safe_title:
-            safe_title = "document"
-        timestamp = now.strftime('%Y%m%d%H%M%S')
-        filename = f"{safe_title}_{timestamp}.docx"
+        for chapter_title, content in chapters:
+            if chapter_title is not None:
+                sect_pr.addprevious(_page_break())
+                add(chapter_title, 'Heading 1')
+            
+            # Plain text, JSON strings and dicts all become a list of (section title, text)
+            for section, text in _content_sections(content):
+                if section is not None and section != 'Introduction':
+                    add(section, 'Heading 2')
+                for p_text in str(text).split('\n\n'):
+                    p_text = p_text.strip()
+                    if not p_text:
+                        continue
+                    # Bulleted lists become one list paragraph per item
+                    if p_text.startswith('•'):
+                        for item in p_text.split('\n'):
+                            if item.strip():
+                                add(item.strip().lstrip('• '), STYLE_LIST)
+                    else:
+                        add(p_text, STYLE_BODY)
         
-        # Ensure downloads directory exists
-        os.makedirs(TEMP_DIR, exist_ok=True)
-        
-        # Save to a physical file in the static/downloads directory
-        file_path = os.path.join(TEMP_DIR, filename)
-        doc.save(file_path)
-        
-        # Return the URL to the file
-        return url_for('static', filename=f'downloads/{filename}')
+        # Write into a memory buffer instead of a file
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        return buffer.getvalue()
     
     except Exception as e:
         logging.error(f"DOCX generation error: {str(e)}")
         raise Exception(f"Failed to generate DOCX file: {str(e)}")
+
+def _paragraph(text, style_id):
+    # <w:p><w:pPr><w:pStyle/></w:pPr><w:r>text, with line breaks as <w:br/></w:r></w:p>
+    p = OxmlElement('w:p')
+    p_pr = OxmlElement('w:pPr')
+    p_style = OxmlElement('w:pStyle')
+    p_style.set(qn('w:val'), style_id)
+    p_pr.append(p_style)
+    p.append(p_pr)
+    r = OxmlElement('w:r')
+    for i, line in enumerate(text.split('\n')):
+        if i:
+            r.append(OxmlElement('w:br'))
+        t = OxmlElement('w:t')
+        t.set(qn('xml:space'), 'preserve')
+        t.text = line
+        r.append(t)
+    p.append(r)
+    return p
+
+def _page_break():
+    # <w:p><w:r><w:br w:type="page"/></w:r></w:p>
+    p = OxmlElement('w:p')
+    r = OxmlElement('w:r')
+    br = OxmlElement('w:br')
+    br.set(qn('w:type'), 'page')
+    r.append(br)
+    p.append(r)
+    return p
+
+def _content_sections(content):
+    # A JSON object or a dict is a set of sections; anything else is one untitled section
+    if isinstance(content, str) and content.startswith('{') and content.endswith('}'):
+        try:
+            content = json.loads(content)
+        except json.JSONDecodeError:
+            pass
+    if isinstance(content, dict):
+        return list(content.items())
+    return [(None, content)]
+
+@functools.lru_cache(maxsize=None)
+def _load_template():
+    """
+    Load the pre-styled template once per process, from DOCX_TEMPLATE_PATH if set
+    Returns the template document as bytes
+    """
+    if DOCX_TEMPLATE_PATH:
+        with open(DOCX_TEMPLATE_PATH, 'rb') as f:
+            return f.read()
+    
+    doc = Document()
+    
+    # Set margins
+    for section in doc.sections:
+        section.left_margin = Inches(1)
+        section.right_margin = Inches(1)
+        section.top_margin = Inches(1)
+        section.bottom_margin = Inches(1)
+    
+    # Headings in black, the title centered
+    title_style = doc.styles['Heading 1']
+    title_style.font.size = Pt(18)
+    title_style.font.color.rgb = RGBColor(0, 0, 0)  # Black
+    title_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    heading_style = doc.styles['Heading 2']
+    heading_style.font.size = Pt(14)
+    heading_style.font.color.rgb = RGBColor(0, 0, 0)  # Black
+    
+    # Timestamp and source lines
+    meta_style = doc.styles.add_style(STYLE_META, WD_STYLE_TYPE.PARAGRAPH)
+    meta_style.base_style = doc.styles['Normal']
+    meta_style.font.size = Pt(10)
+    meta_style.font.italic = True
+    meta_style.font.color.rgb = RGBColor(100, 100, 100)  # Dark gray
+    meta_style.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    separator_style = doc.styles.add_style(STYLE_SEPARATOR, WD_STYLE_TYPE.PARAGRAPH)
+    separator_style.base_style = doc.styles['Normal']
+    separator_style.font.color.rgb = RGBColor(200, 200, 200)  # Light gray
+    separator_style.paragraph_format.space_before = Pt(10)
+    separator_style.paragraph_format.space_after = Pt(10)
+    
+    # Article text and bulleted list items
+    body_style = doc.styles.add_style(STYLE_BODY, WD_STYLE_TYPE.PARAGRAPH)
+    body_style.base_style = doc.styles['Normal']
+    body_style.font.size = Pt(12)
+    body_style.paragraph_format.space_after = Pt(12)
+    body_style.paragraph_format.line_spacing_rule = WD_LINE_SPACING.SINGLE
+    
+    list_style = doc.styles.add_style(STYLE_LIST, WD_STYLE_TYPE.PARAGRAPH)
+    list_style.base_style = doc.styles['List Bullet']
+    list_style.font.size = Pt(12)
+    list_style.paragraph_format.space_after = Pt(6)
+    
+    # Footer with a gray character style
+    footer_style = doc.styles.add_style(STYLE_FOOTER, WD_STYLE_TYPE.CHARACTER)
+    footer_style.font.size = Pt(9)
+    footer_style.font.color.rgb = RGBColor(128, 128, 128)  # Gray
+    footer = doc.sections[0].footer
+    footer_para = footer.paragraphs[0] if footer.paragraphs else footer.add_paragraph()
+    footer_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    footer_para.add_run("Page ", footer_style)
+    
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+def _write_to_disk(key, title, data):
+    # Named by content hash, so repeated exports of a document share one file
+    try:
+        os.makedirs(DOCX_OUTPUT_DIR, exist_ok=True)
+        file_path = os.path.join(DOCX_OUTPUT_DIR, f"{key[:16]}_{docx_filename(title)}")
+        with open(file_path, 'wb') as f:
+            f.write(data)
+    except OSError as e:
+        logging.error(f"DOCX disk output error: {str(e)}")
+    _run_janitor()
+
+def _run_janitor():
+    global _last_janitor_run
+    # Runs at most once per interval, and never in two threads at once
+    if not _janitor_lock.acquire(blocking=False):
+        return
+    try:
+        now = time.time()
+        if now - _last_janitor_run < DOCX_JANITOR_INTERVAL:
+            return
+        _last_janitor_run = now
+        
+        files = []
+        for entry in os.scandir(DOCX_OUTPUT_DIR):
+            if entry.is_file() and entry.name.endswith('.docx'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        
+        # Delete expired files, then the oldest ones until the directory fits its size limit
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        for mtime, size, path in files:
+            if now - mtime <= DOCX_DISK_MAX_AGE and total <= DOCX_DISK_MAX_BYTES:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError as e:
+                logging.error(f"DOCX janitor error: {str(e)}")
+    except OSError as e:
+        logging.error(f"DOCX janitor error: {str(e)}")
+    finally:
+        _janitor_lock.release()
@@ -0,0 +1,245 @@
+import os
+import time
+import uuid
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from docx_generator import generate_docx, build_docx
+from article_export import build_export
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+
+# Processes building documents, jobs allowed to wait or run at once, and seconds a job may take
+EXPORT_JOB_WORKERS = int(os.environ.get("EXPORT_JOB_WORKERS", 2))
+EXPORT_JOB_MAX_QUEUED = int(os.environ.get("EXPORT_JOB_MAX_QUEUED", 20))
+EXPORT_JOB_TIMEOUT = float(os.environ.get("EXPORT_JOB_TIMEOUT", 120))
+
+# Seconds a finished job and its document are kept, and the longest status long-poll
+EXPORT_JOB_RESULT_TTL = float(os.environ.get("EXPORT_JOB_RESULT_TTL", 600))
+EXPORT_JOB_MAX_WAIT = float(os.environ.get("EXPORT_JOB_MAX_WAIT", 25))
+
+# Documents with less content than this are built in the request thread
+EXPORT_SYNC_MAX_CHARS = int(os.environ.get("EXPORT_SYNC_MAX_CHARS", 200000))
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+class ExportQueueFull(Exception):
+    """Raised when too many export jobs are waiting or running"""
+
+class ExportJob:
+    """One export request and, once finished, its document"""
+
+    def __init__(self, reference=None, title=None, content=None):
+        self.id = uuid.uuid4().hex
+        self.reference = reference  # keyword arguments for build_export
+        self.title = title
+        self.content = content
+        self.status = QUEUED
+        self.error = None
+        self.data = None
+        self.filename = None
+        self.created = time.monotonic()
+        self.finished = None
+        self.done_event = threading.Event()
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'error': self.error,
+            'filename': self.filename,
+            'size': len(self.data) if self.data is not None else None
+        }
+
+class ExportJobQueue:
+    """
+    Builds documents on a bounded process pool so CPU-bound python-docx work does not
+    hold the GIL of the web worker; each job has a thread that gathers the article
+    content, hands the build to the pool and waits for it under the job timeout
+    """
+
+    def __init__(self, workers=EXPORT_JOB_WORKERS, max_queued=EXPORT_JOB_MAX_QUEUED, timeout=EXPORT_JOB_TIMEOUT):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._pool = None
+        self._direct_builds = 0
+        self._threads = ThreadPoolExecutor(max_workers=max_queued, thread_name_prefix='export-job')
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _get_pool(self):
+        # Created on first use so every web worker process gets its own pool; spawned
+        # children do not inherit the threads and locks of the web worker
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def build(self, title, content, timeout=None, builder=build_docx, admitted=False):
+        """
+        Build a document on the process pool and wait for it. Builds that do not come
+        from a queued job count against max_queued like jobs do
+        Returns the document as bytes; raises ExportQueueFull when the queue is at its limit
+        """
+        if not admitted:
+            with self._lock:
+                active = self._active()
+                if active >= self.max_queued:
+                    self.rejected += 1
+                    raise ExportQueueFull(f"{active} exports are already queued")
+                self._direct_builds += 1
+        try:
+            return self._build(title, content, timeout or self.timeout, builder)
+        finally:
+            if not admitted:
+                with self._lock:
+                    self._direct_builds -= 1
+
+    def _build(self, title, content, timeout, builder):
+        deadline = time.monotonic() + timeout
+        for attempt in range(2):
+            pool = self._get_pool()
+            try:
+                future = pool.submit(builder, title, content)
+                return future.result(timeout=max(0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                # A running build cannot be cancelled, so its pool is stopped and replaced
+                self._recycle_pool(pool)
+                raise TimeoutError(f"Export did not finish within {timeout:.0f}s")
+            except BrokenProcessPool:
+                # A worker died or the pool was recycled after another build timed out;
+                # retry once on a fresh pool if there is time left
+                with self._lock:
+                    if self._pool is pool:
+                        self._pool = None
+                if attempt or deadline <= time.monotonic():
+                    raise
+
+    def _recycle_pool(self, pool):
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        processes = list((pool._processes or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    def _active(self):
+        # Jobs waiting or running plus builds sent straight to the pool; called with the lock held
+        return self._direct_builds + sum(1 for job in self.jobs.values() if job.status in (QUEUED, RUNNING))
+
+    def submit(self, reference=None, title=None, content=None):
+        """
+        Queue an export, either by article reference or from a title and content
+        Returns the new ExportJob; raises ExportQueueFull when the queue is at its limit
+        """
+        self._prune()
+        job = ExportJob(reference, title, content)
+        with self._lock:
+            active = self._active()
+            if active >= self.max_queued:
+                self.rejected += 1
+                raise ExportQueueFull(f"{active} exports are already queued")
+            self.jobs[job.id] = job
+        self._threads.submit(self._run, job)
+        return job
+
+    def _run(self, job):
+        started = time.monotonic()
+        job.status = RUNNING
+        try:
+            if job.reference is not None:
+                job.title, job.content = build_export(**job.reference)
+
+            # Time spent gathering content counts against the job timeout
+            remaining = self.timeout - (time.monotonic() - started)
+            if remaining <= 0:
+                raise TimeoutError(f"Export did not finish within {self.timeout:.0f}s")
+            buffer, job.filename = generate_docx(
+                job.title, job.content,
+                build=lambda title, content: self.build(title, content, timeout=remaining, admitted=True)
+            )
+            job.data = buffer.getvalue()
+            job.status = DONE
+        except Exception as e:
+            logging.error(f"Export job {job.id} error: {str(e)}")
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            # The content is only needed while building
+            job.content = None
+            job.finished = time.monotonic()
+            with self._lock:
+                if job.status == DONE:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+            job.done_event.set()
+
+    def get(self, job_id, wait=0):
+        """
+        Look up a job, waiting up to wait seconds for it to finish
+        Returns the ExportJob or None if it is unknown or expired
+        """
+        self._prune()
+        with self._lock:
+            job = self.jobs.get(job_id)
+        if job is not None and wait > 0:
+            job.done_event.wait(min(wait, EXPORT_JOB_MAX_WAIT))
+        return job
+
+    def _prune(self):
+        # Forget finished jobs and their documents once they are past their TTL
+        now = time.monotonic()
+        with self._lock:
+            expired = [job_id for job_id, job in self.jobs.items()
+                       if job.finished is not None and now - job.finished > EXPORT_JOB_RESULT_TTL]
+            for job_id in expired:
+                del self.jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self.jobs.values()]
+            return {
+                'workers': self.workers,
+                'max_queued': self.max_queued,
+                'queued': statuses.count(QUEUED),
+                'running': statuses.count(RUNNING),
+                'direct_builds': self._direct_builds,
+                'finished_kept': statuses.count(DONE) + statuses.count(FAILED),
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected
+            }
+
+export_jobs = ExportJobQueue()
+
+def content_size(content):
+    """Get the number of characters an export would have to lay out"""
+    if isinstance(content, dict):
+        return sum(len(str(title)) + len(str(text)) for title, text in content.items())
+    return len(content or '')
+
+def generate_export(title, content):
+    """
+    Generate an export, building small documents in the calling thread and large
+    ones on the export process pool so the caller waits without holding the GIL
+    Returns a tuple of (io.BytesIO with the .docx file, download filename); raises
+    ExportQueueFull when a large build finds the export queue at its limit
+    """
+    if content_size(content) <= EXPORT_SYNC_MAX_CHARS:
+        return generate_docx(title, content)
+    return generate_docx(title, content, build=export_jobs.build)
@@ -0,0 +1,173 @@
+import os
+import gzip
+import json
+import hashlib
+import logging
+import datetime
+
+from flask import request, session, Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; responses fall back to gzip
+    brotli = None
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+
+# Bump whenever the HTML templates change so article ETags no longer match old pages
+HTML_TEMPLATE_VERSION = 1
+
+# HTML and JSON responses smaller than this are sent uncompressed; compression levels
+HTTP_COMPRESSION_MIN_BYTES = int(os.environ.get("HTTP_COMPRESSION_MIN_BYTES", 1024))
+HTTP_GZIP_LEVEL = int(os.environ.get("HTTP_GZIP_LEVEL", 6))
+HTTP_BROTLI_QUALITY = int(os.environ.get("HTTP_BROTLI_QUALITY", 5))
+
+COMPRESSIBLE_MIMETYPES = ('text/html', 'application/json')
+
+# Cache-Control per endpoint, each overridable with its own environment variable, so a
+# CDN or reverse proxy can absorb repeat traffic; an empty value leaves the header unset
+CACHE_POLICIES = {
+    'article': os.environ.get("CACHE_CONTROL_ARTICLE", "public, max-age=60, stale-while-revalidate=600"),
+    'get_section': os.environ.get("CACHE_CONTROL_SECTION", "public, max-age=300"),
+    'search_api': os.environ.get("CACHE_CONTROL_SEARCH", "public, max-age=300"),
+    'autocomplete': os.environ.get("CACHE_CONTROL_AUTOCOMPLETE", "public, max-age=3600"),
+    # Feed cards are random, so a stored copy would repeat them; clients revalidate instead
+    'get_wikitok_articles': os.environ.get("CACHE_CONTROL_WIKITOK", "private, no-cache"),
+    'get_wikitok_feed': os.environ.get("CACHE_CONTROL_WIKITOK", "private, no-cache")
+}
+
+# Suffixes that keep strong ETags distinct per content encoding
+ENCODING_ETAG_SUFFIXES = {'br': '-br', 'gzip': '-gzip'}
+
+def article_etag(language, lastrevid, *variant):
+    """
+    Build the strong ETag of an article page from its revision id, the variant parts and
+    the template version
+    Returns the ETag value without quotes, or None if the revision is unknown
+    """
+    if lastrevid is None:
+        return None
+    return '-'.join([language, str(lastrevid), *map(str, variant), f"v{HTML_TEMPLATE_VERSION}"])
+
+def content_digest(*parts):
+    """
+    Hash JSON-serializable page parts that can change without a new revision, such as
+    the images and language links of an article, so they can be part of its ETag
+    Returns a short hex digest
+    """
+    data = json.dumps(parts, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha1(data).hexdigest()[:16]
+
+def has_pending_flashes():
+    """
+    Check whether flash messages are waiting to be rendered into the next page; such a
+    page is personal and must neither be shared by caches nor answered with a 304
+    Returns True when messages are pending
+    """
+    return bool(session.get('_flashes'))
+
+def parse_timestamp(timestamp):
+    """
+    Parse a MediaWiki ISO 8601 timestamp such as 2024-01-31T12:00:00Z
+    Returns an aware datetime, or None
+    """
+    if not timestamp:
+        return None
+    try:
+        return datetime.datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=datetime.timezone.utc)
+    except ValueError:
+        return None
+
+def is_not_modified(etag=None, last_modified=None):
+    """
+    Check the request's conditional headers; If-None-Match wins over If-Modified-Since
+    Returns True when the client's copy is current
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if request.if_none_match:
+        if request.if_none_match.star_tag:
+            return True
+        return etag is not None and any(
+            request.if_none_match.contains(etag + suffix) for suffix in ('', *ENCODING_ETAG_SUFFIXES.values())
+        )
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+def not_modified(etag=None, last_modified=None):
+    """
+    Build a 304 response carrying the validators of the unchanged representation
+    Returns a Response
+    """
+    response = Response(status=304)
+    response.vary.add('Accept-Encoding')
+    if etag is not None:
+        # Echo the tag of the encoding the client holds
+        for suffix in ENCODING_ETAG_SUFFIXES.values():
+            if request.if_none_match.contains(etag + suffix):
+                etag += suffix
+                break
+        response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
+def apply_http_caching(response):
+    """
+    after_request hook: set the endpoint's Cache-Control policy, give cacheable JSON a
+    content-hash ETag, answer conditional requests with 304 and compress HTML and JSON
+    Streamed and pass-through responses (NDJSON, exports, static files) are left alone
+    Returns the response to send
+    """
+    if request.method not in ('GET', 'HEAD') or response.is_streamed or response.direct_passthrough:
+        return response
+
+    policy = CACHE_POLICIES.get(request.endpoint)
+    if policy and response.status_code in (200, 304) and 'Cache-Control' not in response.headers:
+        response.headers['Cache-Control'] = policy
+
+    if response.status_code != 200:
+        return response
+
+    if policy and response.mimetype == 'application/json' and not response.get_etag()[0]:
+        response.add_etag()
+    etag, weak = response.get_etag()
+    if etag and not weak and is_not_modified(etag, response.last_modified):
+        cached = not_modified(etag, response.last_modified)
+        if 'Cache-Control' in response.headers:
+            cached.headers['Cache-Control'] = response.headers['Cache-Control']
+        return cached
+
+    return compress_response(response)
+
+def compress_response(response):
+    """
+    Compress an HTML or JSON response with brotli when available, otherwise gzip,
+    if the client accepts it and the body is above HTTP_COMPRESSION_MIN_BYTES
+    Returns the response
+    """
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES or 'Content-Encoding' in response.headers:
+        return response
+    response.vary.add('Accept-Encoding')
+
+    data = response.get_data()
+    if len(data) < HTTP_COMPRESSION_MIN_BYTES:
+        return response
+
+    if brotli is not None and request.accept_encodings['br']:
+        encoding = 'br'
+        compressed = brotli.compress(data, quality=HTTP_BROTLI_QUALITY)
+    elif request.accept_encodings['gzip']:
+        encoding = 'gzip'
+        compressed = gzip.compress(data, compresslevel=HTTP_GZIP_LEVEL)
+    else:
+        return response
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(etag + ENCODING_ETAG_SUFFIXES[encoding], weak=weak)
+    return response
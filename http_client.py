@@ -0,0 +1,110 @@
+import os
+import random
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+
+# Connection pool sizing: number of per-host pools kept, and connections per host
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", 10))
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", 10))
+
+# Timeouts in seconds
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 3.05))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 10))
+
+# Retries on 429 and 5xx responses
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", 3))
+HTTP_BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF_FACTOR", 0.5))
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Longest Retry-After honoured, in seconds; a longer requested delay is cut to this so a
+# throttled upstream cannot park a request thread for minutes
+HTTP_RETRY_AFTER_MAX = float(os.environ.get("HTTP_RETRY_AFTER_MAX", 5))
+
+# Wikimedia asks API clients to identify themselves with a descriptive User-Agent
+USER_AGENT = os.environ.get(
+    "HTTP_USER_AGENT",
+    "WikiTruth/0.1 (https://github.com/khorkina/WikiTruthMobile) python-requests/" + requests.__version__
+)
+
+class JitteredRetry(Retry):
+    """
+    Retry policy that randomizes the exponential backoff to avoid synchronized retries
+    and caps the delay a Retry-After header may ask for at HTTP_RETRY_AFTER_MAX
+    """
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return random.uniform(0, backoff) if backoff else 0
+
+    def parse_retry_after(self, retry_after):
+        return min(super().parse_retry_after(retry_after), HTTP_RETRY_AFTER_MAX)
+
+class HttpClient:
+    """
+    Shared keep-alive HTTP client with per-host connection pools, timeouts
+    and bounded retries that honour Retry-After
+    """
+
+    def __init__(self, pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE,
+                 timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), max_retries=HTTP_MAX_RETRIES):
+        self.timeout = timeout
+
+        retry = JitteredRetry(
+            total=max_retries,
+            backoff_factor=HTTP_BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(['GET', 'POST']),
+            respect_retry_after_header=True,
+            raise_on_status=False  # Hand the last response back so callers can inspect it
+        )
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry
+        )
+
+        self.session = requests.Session()
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept-Encoding': 'gzip, deflate'
+        })
+
+    def request(self, method, url, **kwargs):
+        """Send a request through the shared session, applying the default timeouts"""
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def pool_stats(self):
+        """
+        Get usage statistics for each per-host connection pool
+        Returns a dictionary keyed by host
+        """
+        pools = self.adapter.poolmanager.pools
+        with pools.lock:
+            items = list(pools._container.items())
+
+        stats = {}
+        for key, pool in items:
+            stats[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = {
+                'maxsize': pool.pool.maxsize if pool.pool else 0,
+                'idle': pool.pool.qsize() if pool.pool else 0,
+                'connections_opened': pool.num_connections,
+                'requests': pool.num_requests
+            }
+        return stats
+
+# Module-level client shared by all outbound calls
+http_client = HttpClient()
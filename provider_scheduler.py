@@ -0,0 +1,254 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+
+# Rolling window of recent calls kept per provider
+PROVIDER_WINDOW_SIZE = int(os.environ.get("PROVIDER_WINDOW_SIZE", 50))
+
+# Circuit breaker: open after this many consecutive failures, or when the error rate over
+# at least PROVIDER_MIN_CALLS recent calls reaches PROVIDER_ERROR_THRESHOLD; retry after the cooldown
+PROVIDER_FAILURE_THRESHOLD = int(os.environ.get("PROVIDER_FAILURE_THRESHOLD", 5))
+PROVIDER_ERROR_THRESHOLD = float(os.environ.get("PROVIDER_ERROR_THRESHOLD", 0.5))
+PROVIDER_MIN_CALLS = int(os.environ.get("PROVIDER_MIN_CALLS", 10))
+PROVIDER_COOLDOWN = float(os.environ.get("PROVIDER_COOLDOWN", 30))
+
+# Hedge delay in seconds: the primary provider's recent p90 latency, clamped to these bounds
+HEDGE_MIN_DELAY = float(os.environ.get("HEDGE_MIN_DELAY", 0.5))
+HEDGE_MAX_DELAY = float(os.environ.get("HEDGE_MAX_DELAY", 2.0))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class ProviderHealth:
+    """Rolling latency and error rate of one provider, with a circuit breaker"""
+
+    def __init__(self, name):
+        self.name = name
+        self.window = deque(maxlen=PROVIDER_WINDOW_SIZE)  # (succeeded, latency)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.calls = 0
+        self.hedged_wins = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Check whether a call may be sent now; an open breaker lets one trial call
+        through once its cooldown has passed
+        Returns True if the call may proceed
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= PROVIDER_COOLDOWN:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def is_available(self):
+        with self._lock:
+            if self.state == OPEN:
+                return time.monotonic() - self.opened_at >= PROVIDER_COOLDOWN
+            return self.state == CLOSED or not self.trial_in_flight
+
+    def record(self, succeeded, latency):
+        with self._lock:
+            self.calls += 1
+            self.window.append((succeeded, latency))
+            self.trial_in_flight = False
+            if succeeded:
+                self.consecutive_failures = 0
+                if self.state != CLOSED:
+                    logging.info(f"Translation provider {self.name} recovered")
+                self.state = CLOSED
+                return
+
+            self.consecutive_failures += 1
+            errors = sum(1 for ok, _ in self.window if not ok)
+            tripped = (
+                self.state == HALF_OPEN or
+                self.consecutive_failures >= PROVIDER_FAILURE_THRESHOLD or
+                (len(self.window) >= PROVIDER_MIN_CALLS and errors / len(self.window) >= PROVIDER_ERROR_THRESHOLD)
+            )
+            if tripped and self.state != OPEN:
+                logging.warning(f"Opening circuit breaker for translation provider {self.name}")
+            if tripped:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def record_hedged_win(self):
+        with self._lock:
+            self.hedged_wins += 1
+
+    def hedge_delay(self):
+        """Wait this long for the provider before hedging to the next one"""
+        with self._lock:
+            latencies = sorted(latency for ok, latency in self.window if ok)
+        if not latencies:
+            return HEDGE_MIN_DELAY
+        p90 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.9))]
+        return min(HEDGE_MAX_DELAY, max(HEDGE_MIN_DELAY, p90))
+
+    def stats(self):
+        with self._lock:
+            window = list(self.window)
+            errors = sum(1 for ok, _ in window if not ok)
+            latencies = sorted(latency for ok, latency in window if ok)
+            return {
+                'state': self.state,
+                'calls': self.calls,
+                'hedged_wins': self.hedged_wins,
+                'window_calls': len(window),
+                'error_rate': errors / len(window) if window else 0.0,
+                'consecutive_failures': self.consecutive_failures,
+                'latency_p50': latencies[len(latencies) // 2] if latencies else None,
+                'latency_p90': latencies[min(len(latencies) - 1, int(len(latencies) * 0.9))] if latencies else None
+            }
+
+class ProviderScheduler:
+    """
+    Sends each request to the preferred healthy provider and, if it has not answered
+    within the hedge delay, also to the next healthy one; the first good answer wins
+    """
+
+    def __init__(self, providers, max_workers=16):
+        self.providers = providers  # list of (name, function) in order of preference
+        self.health = {name: ProviderHealth(name) for name, _ in providers}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='translate-provider')
+        self._tasks = set()  # hedged async calls still running after another provider won
+
+    def _run(self, name, function, args):
+        started = time.monotonic()
+        try:
+            result = function(*args)
+            if not result:
+                raise Exception("No translation returned")
+        except Exception as e:
+            self.health[name].record(False, time.monotonic() - started)
+            logging.error(f"Translation provider {name} error: {str(e)}")
+            raise
+        self.health[name].record(True, time.monotonic() - started)
+        return result
+
+    def call(self, *args):
+        """
+        Run the request with hedging across healthy providers
+        Returns a tuple of (result, provider name)
+        """
+        remaining = [(name, function) for name, function in self.providers if self.health[name].is_available()]
+        if not remaining:
+            raise Exception("All translation providers are unavailable (circuit breakers open)")
+
+        running = {}
+        errors = []
+        primary = None
+        while remaining or running:
+            # Launch the next provider that the breaker lets through
+            while remaining:
+                name, function = remaining.pop(0)
+                if self.health[name].acquire():
+                    running[self.executor.submit(self._run, name, function, args)] = name
+                    primary = primary or name
+                    break
+            if not running:
+                break
+
+            # Give the running providers the hedge delay before adding another one
+            timeout = self.health[primary].hedge_delay() if remaining else None
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(f"{name}: {str(e)}")
+                    continue
+                if name != primary:
+                    self.health[name].record_hedged_win()
+                return result, name
+
+        raise Exception('; '.join(errors) or "All translation providers are unavailable")
+
+    async def _run_async(self, name, function, args):
+        started = time.monotonic()
+        try:
+            result = await function(*args)
+            if not result:
+                raise Exception("No translation returned")
+        except Exception as e:
+            self.health[name].record(False, time.monotonic() - started)
+            logging.error(f"Translation provider {name} error: {str(e)}")
+            raise
+        self.health[name].record(True, time.monotonic() - started)
+        return result
+
+    def _forget_task(self, task):
+        # Errors were already logged and recorded; mark them retrieved for asyncio
+        self._tasks.discard(task)
+        if not task.cancelled():
+            task.exception()
+
+    async def call_async(self, functions, *args):
+        """
+        Run the request with hedging on the event loop, sharing provider health and
+        circuit breakers with call; functions maps provider names to coroutine functions
+        Returns a tuple of (result, provider name)
+        """
+        remaining = [(name, functions[name]) for name, _ in self.providers
+                     if name in functions and self.health[name].is_available()]
+        if not remaining:
+            raise Exception("All translation providers are unavailable (circuit breakers open)")
+
+        running = {}
+        errors = []
+        primary = None
+        while remaining or running:
+            # Launch the next provider that the breaker lets through
+            while remaining:
+                name, function = remaining.pop(0)
+                if self.health[name].acquire():
+                    # Losing calls run to completion like the threaded ones, so their
+                    # outcome is still recorded and a half-open trial is always released
+                    task = asyncio.ensure_future(self._run_async(name, function, args))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._forget_task)
+                    running[task] = name
+                    primary = primary or name
+                    break
+            if not running:
+                break
+
+            # Give the running providers the hedge delay before adding another one
+            timeout = self.health[primary].hedge_delay() if remaining else None
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = running.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    errors.append(f"{name}: {str(e)}")
+                    continue
+                if name != primary:
+                    self.health[name].record_hedged_win()
+                return result, name
+
+        raise Exception('; '.join(errors) or "All translation providers are unavailable")
+
+    def stats(self):
+        """
+        Get rolling latency, error rate and breaker state of every provider
+        Returns a dictionary keyed by provider name
+        """
+        return {name: health.stats() for name, health in self.health.items()}
@@ -0,0 +1,242 @@
+from html.parser import HTMLParser
+
+# Elements whose text becomes article content
+HEADING_TAGS = ('h1', 'h2', 'h3')
+LIST_TAGS = ('ul', 'ol')
+
+# Containers whose content is never extracted (table of contents, references, navigation)
+SKIPPED_CONTAINER_CLASSES = {'toc', 'reflist', 'navbox'}
+
+# Tables that are not article content
+SKIPPED_TABLE_CLASSES = {'infobox', 'navbox', 'metadata'}
+
+# Headings that end the readable part of an article
+SKIPPED_HEADING_PREFIXES = ('See also', 'References', 'External links', 'Notes')
+
+# Only the first rows of a table are kept as a preview
+TABLE_PREVIEW_ROWS = 5
+
+# Elements that never have an end tag
+VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr'
+}
+
+# Elements whose text is not readable content
+NON_TEXT_ELEMENTS = {'style', 'script', 'template'}
+
+class _Capture:
+    """An open element of interest and the text collected for it"""
+    __slots__ = ('seq', 'kind', 'text', 'items', 'rows')
+
+    def __init__(self, seq, kind):
+        self.seq = seq
+        self.kind = kind
+        self.text = []
+        self.items = []  # list items, each a list of text pieces
+        self.rows = []   # table rows, each a list of cells made of text pieces
+
+class SectionExtractor(HTMLParser):
+    """
+    Single-pass, event-driven section extractor for article HTML
+    Skipped containers are tracked with a depth counter and text is accumulated
+    into lists, so no tree is built and no node is walked twice
+    """
+
+    def __init__(self, restrict_to_content=False):
+        super().__init__(convert_charrefs=True)
+        # When the HTML is a full page, only the mw-content-text div is read
+        self.restrict_to_content = restrict_to_content
+        self.in_content = not restrict_to_content
+        self.content_found = False
+        self.stack = []        # open elements as (tag, flags, capture)
+        self.skip_depth = 0    # open skipped containers
+        self.non_text_depth = 0
+        self.seq = 0
+        self.captures = []     # open captures of every kind
+        self.sinks = []        # open text buffers (headings, paragraphs, list items, table cells)
+        self.row_owners = []   # open table captures collecting rows
+        self.open_rows = []    # open rows, each a list of cells
+        self.list_owners = []  # open list captures collecting items
+        self.finished = []     # closed captures waiting to be applied in document order
+        self.sections = {'Introduction': []}
+        self.current_section = 'Introduction'
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_ELEMENTS:
+            return
+        attrs = dict(attrs)
+        classes = set((attrs.get('class') or '').split())
+        flags = set()
+
+        if self.restrict_to_content and not self.content_found and tag == 'div' and attrs.get('id') == 'mw-content-text':
+            self.content_found = True
+            self.in_content = True
+            flags.add('content')
+        if tag in NON_TEXT_ELEMENTS:
+            self.non_text_depth += 1
+            flags.add('non_text')
+
+        capture = None
+        if self.in_content:
+            capture = self._open_capture(tag, classes)
+            self._open_parts(tag, flags)
+
+        # Skipping applies to the descendants of the container, not the container itself
+        if tag == 'div' and classes & SKIPPED_CONTAINER_CLASSES:
+            self.skip_depth += 1
+            flags.add('skip')
+
+        self.stack.append((tag, flags, capture))
+
+    def handle_startendtag(self, tag, attrs):
+        # Self-closing syntax never opens an element
+        if tag not in VOID_ELEMENTS:
+            self.handle_starttag(tag, attrs)
+            self.handle_endtag(tag)
+
+    def _open_capture(self, tag, classes):
+        if self.skip_depth:
+            return None
+        if tag in HEADING_TAGS or tag == 'p':
+            kind = 'heading' if tag in HEADING_TAGS else 'paragraph'
+        elif tag in LIST_TAGS:
+            kind = 'list'
+        elif tag == 'table' and not classes & SKIPPED_TABLE_CLASSES:
+            kind = 'table'
+        else:
+            return None
+
+        capture = _Capture(self.seq, kind)
+        self.seq += 1
+        self.captures.append(capture)
+        if kind in ('heading', 'paragraph'):
+            self.sinks.append(capture.text)
+        elif kind == 'list':
+            self.list_owners.append(capture)
+        else:
+            self.row_owners.append(capture)
+        return capture
+
+    def _open_parts(self, tag, flags):
+        # List items and table cells belong to every enclosing list or table, as with find_all
+        if tag == 'li' and self.list_owners:
+            item = []
+            for owner in self.list_owners:
+                owner.items.append(item)
+            self.sinks.append(item)
+            flags.add('part')
+        elif tag == 'tr' and self.row_owners:
+            row = []
+            for owner in self.row_owners:
+                if len(owner.rows) < TABLE_PREVIEW_ROWS:
+                    owner.rows.append(row)
+            self.open_rows.append(row)
+            flags.add('row')
+        elif tag in ('th', 'td') and self.open_rows:
+            cell = []
+            for row in self.open_rows:
+                row.append(cell)
+            self.sinks.append(cell)
+            flags.add('part')
+
+    def handle_endtag(self, tag):
+        # Ignore end tags without a matching open element, like the tree builder does
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index][0] == tag:
+                break
+        else:
+            return
+        while len(self.stack) > index:
+            self._close(*self.stack.pop())
+
+    def _close(self, tag, flags, capture):
+        if 'skip' in flags:
+            self.skip_depth -= 1
+        if 'non_text' in flags:
+            self.non_text_depth -= 1
+        if 'content' in flags:
+            self.in_content = False
+        if 'part' in flags:
+            self.sinks.pop()
+        if 'row' in flags:
+            self.open_rows.pop()
+
+        if capture is not None:
+            self.captures.remove(capture)
+            if capture.kind in ('heading', 'paragraph'):
+                # Elements close in stack order, so the capture's buffer is the newest sink
+                self.sinks.pop()
+            elif capture.kind == 'list':
+                self.list_owners.remove(capture)
+            else:
+                self.row_owners.remove(capture)
+            self.finished.append(capture)
+            # Nested captures close before their parents; apply once the outermost one is done
+            if not self.captures:
+                self._flush()
+
+    def handle_data(self, data):
+        if self.non_text_depth:
+            return
+        for sink in self.sinks:
+            sink.append(data)
+
+    def _flush(self):
+        self.finished.sort(key=lambda capture: capture.seq)
+        for capture in self.finished:
+            self._apply(capture)
+        self.finished = []
+
+    def _apply(self, capture):
+        section = self.sections[self.current_section]
+        if capture.kind == 'heading':
+            # Skip empty or special sections
+            section_text = ''.join(capture.text).strip()
+            if section_text and not section_text.startswith(SKIPPED_HEADING_PREFIXES):
+                self.current_section = section_text
+                self.sections.setdefault(section_text, [])
+        elif capture.kind == 'paragraph':
+            text = ''.join(capture.text).strip()
+            if text:
+                section.append(text + '\n\n')
+        elif capture.kind == 'list':
+            if capture.items:
+                section.append(''.join("• " + ''.join(item).strip() + "\n" for item in capture.items) + '\n')
+        else:
+            table_text = ["Table: "]
+            for row in capture.rows:
+                if row:
+                    table_text.append(" | ".join(''.join(cell).strip() for cell in row) + "\n")
+            section.append(''.join(table_text) + "\n")
+
+    def close(self):
+        super().close()
+        # Close anything left open by truncated HTML
+        while self.stack:
+            self._close(*self.stack.pop())
+        self._flush()
+
+    def result(self):
+        """
+        Get the extracted sections, without empty ones
+        Returns a dictionary with section titles as keys and content as values
+        """
+        sections = {title: ''.join(parts) for title, parts in self.sections.items()}
+        return {k: v for k, v in sections.items() if v.strip()}
+
+def extract_sections(html_content):
+    """
+    Split article HTML into sections in a single pass
+    Returns a dictionary with section titles as keys and content as values
+    """
+    extractor = SectionExtractor(restrict_to_content='mw-content-text' in html_content)
+    extractor.feed(html_content)
+    extractor.close()
+    
+    # Fall back to the whole document if the content div was not actually there
+    if extractor.restrict_to_content and not extractor.content_found:
+        extractor = SectionExtractor()
+        extractor.feed(html_content)
+        extractor.close()
+    return extractor.result()
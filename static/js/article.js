@@ -4,6 +4,13 @@ let articleLanguage;
 let articleSummary;
 let articleContent = {};
 let currentTranslation = '';
+let currentTranslationExport = null;  // export parameters of the current translation
+
+// Lazy mode: section bodies are fetched from the section API when needed
+let lazySections = false;
+let articleRevision = '';
+const loadedSections = new Set();
+const pendingSectionLoads = {};
 
 // Initialize the article page
 document.addEventListener('DOMContentLoaded', function() {
@@ -19,6 +26,13 @@ document.addEventListener('DOMContentLoaded', function() {
         articleContent[sectionName] = input.value;
     });
     
+    // In lazy mode, fetch each section as it scrolls into view
+    lazySections = document.getElementById('article-data').getAttribute('data-lazy') === 'true';
+    articleRevision = document.getElementById('article-revision').value;
+    if (lazySections) {
+        setUpLazySections();
+    }
+    
     // Set up view mode switching
     const summaryMode = document.getElementById('summary-mode');
     const fullMode = document.getElementById('full-mode');
@@ -47,6 +61,12 @@ document.addEventListener('DOMContentLoaded', function() {
             const currentPath = window.location.pathname;
             const pathParts = currentPath.split('/');
             
+            // Link straight to the article's own title in the new language
+            const selected = this.options[this.selectedIndex];
+            if (selected && selected.dataset.title) {
+                pathParts[3] = encodeURIComponent(selected.dataset.title);
+            }
+            
             // Replace language code in path
             pathParts[2] = newLanguage;
             
@@ -148,26 +168,98 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
+// Load sections when they come close to the viewport
+function setUpLazySections() {
+    const observer = new IntersectionObserver(entries => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                loadSection(entry.target.getAttribute('data-section-name'));
+                observer.unobserve(entry.target);
+            }
+        });
+    }, { rootMargin: '300px' });
+    
+    document.querySelectorAll('.article-section[data-section-index]').forEach(section => {
+        observer.observe(section);
+    });
+}
+
+// Check whether a section's text is available
+function isSectionLoaded(sectionName) {
+    return !lazySections || loadedSections.has(sectionName);
+}
+
+// Fetch one section from the server and render it; returns a promise of its text
+function loadSection(sectionName) {
+    if (isSectionLoaded(sectionName)) {
+        return Promise.resolve(articleContent[sectionName]);
+    }
+    if (pendingSectionLoads[sectionName]) {
+        return pendingSectionLoads[sectionName];
+    }
+    
+    const sectionElement = Array.from(document.querySelectorAll('.article-section[data-section-index]'))
+        .find(element => element.getAttribute('data-section-name') === sectionName);
+    const index = sectionElement.getAttribute('data-section-index');
+    const url = `/api/article/${encodeURIComponent(articleLanguage)}/${encodeURIComponent(articleTitle)}/section/${index}?rev=${articleRevision}`;
+    
+    pendingSectionLoads[sectionName] = fetch(url)
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) {
+                throw new Error(data.error);
+            }
+            
+            // Subsections come back with their own headings; show them inline
+            const container = sectionElement.querySelector('.section-content');
+            container.innerHTML = '';
+            const textParts = [];
+            Object.entries(data.sections).forEach(([name, text], i) => {
+                if (i > 0 || name !== sectionName) {
+                    const heading = document.createElement('h4');
+                    heading.textContent = name;
+                    container.appendChild(heading);
+                    textParts.push(name);
+                }
+                const paragraph = document.createElement('p');
+                paragraph.textContent = text;
+                container.appendChild(paragraph);
+                textParts.push(text);
+            });
+            
+            // Make the text available to translation and download
+            articleContent[sectionName] = textParts.join('\n\n');
+            document.querySelectorAll('[id^="article-section-"]').forEach(input => {
+                if (input.getAttribute('data-section') === sectionName) {
+                    input.value = articleContent[sectionName];
+                }
+            });
+            loadedSections.add(sectionName);
+            return articleContent[sectionName];
+        })
+        .catch(error => {
+            console.error('Section load error:', error);
+            sectionElement.querySelector('.section-content').innerHTML = 
+                '<div class="alert alert-warning">Could not load this section. Please try again.</div>';
+            delete pendingSectionLoads[sectionName];
+            throw error;
+        });
+    
+    return pendingSectionLoads[sectionName];
+}
+
+// Build the export URL for a part of this article
+function exportUrl(params) {
+    const base = `/export/${encodeURIComponent(articleLanguage)}/${encodeURIComponent(articleTitle)}`;
+    return `${base}?${new URLSearchParams(params)}`;
+}
+
 // Download article content
 function downloadContent(type) {
     const title = document.getElementById('article-title').value;
-    const language = document.getElementById('article-language').value;
-    let content = '';
-    let downloadTitle = title;
-    
-    if (type === 'summary') {
-        content = document.getElementById('article-summary').value;
-        downloadTitle = `${title} - Summary`;
-    } else if (type === 'full') {
-        // Combine all sections into a single document
-        const sections = {};
-        document.querySelectorAll('[id^="article-section-"]').forEach(input => {
-            const sectionName = input.getAttribute('data-section');
-            sections[sectionName] = input.value;
-        });
-        content = JSON.stringify(sections);
-        downloadTitle = `${title} - Full Article`;
-    }
+    
+    // The server builds the document from the article it already has, so only a reference is sent
+    const part = type === 'summary' ? 'summary' : 'full';
     
     // Show loading indicator
     const downloadButton = event.target.closest('button');
@@ -175,58 +267,39 @@ function downloadContent(type) {
     downloadButton.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Generating...';
     downloadButton.disabled = true;
     
-    // Send request to server to generate DOCX
-    fetch('/download', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/x-www-form-urlencoded',
-        },
-        body: new URLSearchParams({
-            'title': downloadTitle,
-            'content': content,
-            'language': language
-        })
-    })
-    .then(response => response.json())
-    .then(data => {
+    // Full articles are built as a background export job; the summary is small enough to build right away
+    const filename = `${title.replace(/[^a-zA-Z0-9]/g, '_')}.docx`;
+    const download = part === 'full'
+        ? downloadExportJob({'lang': articleLanguage, 'title': articleTitle, 'part': part}, filename)
+        : downloadDocument(exportUrl({'part': part}), {}, filename);
+    download
+    .then(() => {
         // Reset button state
         downloadButton.innerHTML = originalInnerHTML;
         downloadButton.disabled = false;
         
-        if (data.error) {
-            alert('Error generating document: ' + data.error);
-        } else {
-            // Create a temporary link to download the file
-            const downloadLink = document.createElement('a');
-            downloadLink.href = data.docx_url;
-            downloadLink.download = `${title.replace(/[^a-zA-Z0-9]/g, '_')}.docx`;
-            document.body.appendChild(downloadLink);
-            downloadLink.click();
-            document.body.removeChild(downloadLink);
-            
-            // Show success message
-            const successToast = document.createElement('div');
-            successToast.className = 'toast-container position-fixed bottom-0 end-0 p-3';
-            successToast.innerHTML = `
-                <div class="toast align-items-center text-white bg-success border-0" role="alert" aria-live="assertive" aria-atomic="true">
-                    <div class="d-flex">
-                        <div class="toast-body">
-                            <i class="fas fa-check-circle me-2"></i> Document downloaded successfully!
-                        </div>
-                        <button type="button" class="btn-close btn-close-white me-2 m-auto" data-bs-dismiss="toast" aria-label="Close"></button>
+        // Show success message
+        const successToast = document.createElement('div');
+        successToast.className = 'toast-container position-fixed bottom-0 end-0 p-3';
+        successToast.innerHTML = `
+            <div class="toast align-items-center text-white bg-success border-0" role="alert" aria-live="assertive" aria-atomic="true">
+                <div class="d-flex">
+                    <div class="toast-body">
+                        <i class="fas fa-check-circle me-2"></i> Document downloaded successfully!
                     </div>
+                    <button type="button" class="btn-close btn-close-white me-2 m-auto" data-bs-dismiss="toast" aria-label="Close"></button>
                 </div>
-            `;
-            document.body.appendChild(successToast);
-            const toastEl = successToast.querySelector('.toast');
-            const toast = new bootstrap.Toast(toastEl, { delay: 3000 });
-            toast.show();
-            
-            // Remove toast after it's hidden
-            toastEl.addEventListener('hidden.bs.toast', () => {
-                document.body.removeChild(successToast);
-            });
-        }
+            </div>
+        `;
+        document.body.appendChild(successToast);
+        const toastEl = successToast.querySelector('.toast');
+        const toast = new bootstrap.Toast(toastEl, { delay: 3000 });
+        toast.show();
+        
+        // Remove toast after it's hidden
+        toastEl.addEventListener('hidden.bs.toast', () => {
+            document.body.removeChild(successToast);
+        });
     })
     .catch(error => {
         // Reset button state
@@ -241,23 +314,9 @@ function downloadContent(type) {
 // Download a specific section
 function downloadSection(sectionName) {
     const title = document.getElementById('article-title').value;
-    const language = document.getElementById('article-language').value;
-    
-    // Find the section content
-    let sectionContent = '';
-    document.querySelectorAll('[id^="article-section-"]').forEach(input => {
-        if (input.getAttribute('data-section') === sectionName) {
-            sectionContent = input.value;
-        }
-    });
-    
-    if (!sectionContent) {
-        alert('Section content not found');
-        return;
-    }
     
-    // Create a download title that includes the section name
-    const downloadTitle = `${title} - ${sectionName}`;
+    // The server builds the document from the article it already has, so only a reference is sent
+    const downloadUrl = exportUrl({'part': 'section', 'section': sectionName});
     
     // Show loading indicator
     const downloadButton = event.target.closest('button');
@@ -265,60 +324,38 @@ function downloadSection(sectionName) {
     downloadButton.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Generating...';
     downloadButton.disabled = true;
     
-    // Send request to server to generate DOCX
-    fetch('/download', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/x-www-form-urlencoded',
-        },
-        body: new URLSearchParams({
-            'title': downloadTitle,
-            'content': sectionContent,
-            'language': language
-        })
-    })
-    .then(response => response.json())
-    .then(data => {
+    // Create a safe filename
+    const safeTitle = `${title.replace(/[^a-zA-Z0-9]/g, '_')}_${sectionName.replace(/[^a-zA-Z0-9]/g, '_')}`;
+    
+    // Ask the server to generate the DOCX and save the returned file
+    downloadDocument(downloadUrl, {}, `${safeTitle}.docx`)
+    .then(() => {
         // Reset button state
         downloadButton.innerHTML = originalInnerHTML;
         downloadButton.disabled = false;
         
-        if (data.error) {
-            alert('Error generating document: ' + data.error);
-        } else {
-            // Create a temporary link to download the file
-            const downloadLink = document.createElement('a');
-            downloadLink.href = data.docx_url;
-            // Create a safe filename
-            const safeTitle = `${title.replace(/[^a-zA-Z0-9]/g, '_')}_${sectionName.replace(/[^a-zA-Z0-9]/g, '_')}`;
-            downloadLink.download = `${safeTitle}.docx`;
-            document.body.appendChild(downloadLink);
-            downloadLink.click();
-            document.body.removeChild(downloadLink);
-            
-            // Show success message
-            const successToast = document.createElement('div');
-            successToast.className = 'toast-container position-fixed bottom-0 end-0 p-3';
-            successToast.innerHTML = `
-                <div class="toast align-items-center text-white bg-success border-0" role="alert" aria-live="assertive" aria-atomic="true">
-                    <div class="d-flex">
-                        <div class="toast-body">
-                            <i class="fas fa-check-circle me-2"></i> Section "${sectionName}" downloaded!
-                        </div>
-                        <button type="button" class="btn-close btn-close-white me-2 m-auto" data-bs-dismiss="toast" aria-label="Close"></button>
+        // Show success message
+        const successToast = document.createElement('div');
+        successToast.className = 'toast-container position-fixed bottom-0 end-0 p-3';
+        successToast.innerHTML = `
+            <div class="toast align-items-center text-white bg-success border-0" role="alert" aria-live="assertive" aria-atomic="true">
+                <div class="d-flex">
+                    <div class="toast-body">
+                        <i class="fas fa-check-circle me-2"></i> Section "${sectionName}" downloaded!
                     </div>
+                    <button type="button" class="btn-close btn-close-white me-2 m-auto" data-bs-dismiss="toast" aria-label="Close"></button>
                 </div>
-            `;
-            document.body.appendChild(successToast);
-            const toastEl = successToast.querySelector('.toast');
-            const toast = new bootstrap.Toast(toastEl, { delay: 3000 });
-            toast.show();
-            
-            // Remove toast after it's hidden
-            toastEl.addEventListener('hidden.bs.toast', () => {
-                document.body.removeChild(successToast);
-            });
-        }
+            </div>
+        `;
+        document.body.appendChild(successToast);
+        const toastEl = successToast.querySelector('.toast');
+        const toast = new bootstrap.Toast(toastEl, { delay: 3000 });
+        toast.show();
+        
+        // Remove toast after it's hidden
+        toastEl.addEventListener('hidden.bs.toast', () => {
+            document.body.removeChild(successToast);
+        });
     })
     .catch(error => {
         // Reset button state
@@ -380,6 +417,21 @@ function translateSelected() {
     const targetLang = document.getElementById('translate-target').value;
     const translatePart = document.querySelector('input[name="translate-part"]:checked').value;
     
+    // The whole article is translated on the server and streamed back section by section
+    if (translatePart === 'article') {
+        translateArticle(targetLang);
+        return;
+    }
+    
+    // Make sure the chosen section has been loaded first
+    if (translatePart !== 'summary') {
+        const selectedSection = document.getElementById('translate-section-select').value;
+        if (!isSectionLoaded(selectedSection)) {
+            loadSection(selectedSection).then(() => translateSelected());
+            return;
+        }
+    }
+    
     let textToTranslate = '';
     let titlePrefix = '';
     
@@ -419,6 +471,9 @@ function translateSelected() {
         } else {
             // Display the translated text
             currentTranslation = data.translated_text;
+            currentTranslationExport = translatePart === 'summary'
+                ? {'part': 'summary', 'translated_to': targetLang}
+                : {'part': 'section', 'section': document.getElementById('translate-section-select').value, 'translated_to': targetLang};
             
             // Update modal title and content
             document.querySelector('#translationResultModal .modal-title').textContent = 
@@ -437,6 +492,100 @@ function translateSelected() {
     if (translateModal) translateModal.hide();
 }
 
+// Translate the whole article, showing each section as soon as the server streams it back
+function translateArticle(targetLang) {
+    const targetSelect = document.getElementById('translate-target');
+    const targetName = targetSelect.options[targetSelect.selectedIndex].text;
+    const translationResult = document.getElementById('translation-result');
+    translationResult.innerHTML = '<div id="article-translation"></div><div class="text-center" id="article-translation-progress"><div class="spinner-border" role="status"></div><p>Translating...</p></div>';
+    document.querySelector('#translationResultModal .modal-title').textContent = 
+        `${articleTitle} (Translated to ${targetName})`;
+    
+    const translationResultModal = new bootstrap.Modal(document.getElementById('translationResultModal'));
+    translationResultModal.show();
+    
+    const translateModal = bootstrap.Modal.getInstance(document.getElementById('translateModal'));
+    if (translateModal) translateModal.hide();
+    
+    const container = document.getElementById('article-translation');
+    const translatedSections = {};
+    currentTranslation = '';
+    currentTranslationExport = null;
+    
+    // Sections arrive in completion order; keep them in article order on screen
+    function showSection(data) {
+        translatedSections[data.section] = data.translated_text;
+        const block = document.createElement('div');
+        block.className = 'mb-3';
+        block.dataset.index = data.index;
+        const heading = document.createElement('h5');
+        heading.textContent = data.section;
+        const text = document.createElement('div');
+        text.className = 'translation-text';
+        text.innerHTML = data.translated_text.replace(/\n/g, '<br>');
+        block.appendChild(heading);
+        block.appendChild(text);
+        const next = Array.from(container.children).find(child => Number(child.dataset.index) > data.index);
+        container.insertBefore(block, next || null);
+    }
+    
+    function handleLine(line) {
+        if (!line.trim()) return;
+        const data = JSON.parse(line);
+        if (data.error) {
+            container.insertAdjacentHTML('beforeend', `<div class="alert alert-danger">${data.error}</div>`);
+        } else if (data.done) {
+            currentTranslation = JSON.stringify(translatedSections);
+            currentTranslationExport = {'part': 'full', 'translated_to': targetLang};
+        } else {
+            showSection(data);
+        }
+    }
+    
+    fetch('/api/translate/article', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            'lang': articleLanguage,
+            'title': articleTitle,
+            'target_lang': targetLang
+        })
+    })
+    .then(response => {
+        if (!response.ok) {
+            return response.json().then(data => { throw new Error(data.error); });
+        }
+        // Read the NDJSON stream line by line
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        function read() {
+            return reader.read().then(({done, value}) => {
+                buffer += decoder.decode(value || new Uint8Array(), {stream: !done});
+                const lines = buffer.split('\n');
+                buffer = lines.pop();
+                lines.forEach(handleLine);
+                if (done) {
+                    handleLine(buffer);
+                    return;
+                }
+                return read();
+            });
+        }
+        return read();
+    })
+    .catch(error => {
+        console.error('Translation error:', error);
+        container.insertAdjacentHTML('beforeend', '<div class="alert alert-danger">Error during translation. Please try again.</div>');
+    })
+    .finally(() => {
+        const progress = document.getElementById('article-translation-progress');
+        if (progress) progress.remove();
+    });
+}
+
 // Translate a specific section directly with selectable target language
 function translateSection(sectionName, sourceLang) {
     // Create dropdown for language selection
@@ -475,6 +624,12 @@ function translateSection(sectionName, sourceLang) {
         
         // Add click handler for translation
         item.addEventListener('click', function() {
+            // Make sure the section has been loaded first
+            if (!isSectionLoaded(sectionName)) {
+                loadSection(sectionName).then(() => item.click());
+                return;
+            }
+            
             // Get section text 
             let textToTranslate = '';
             for (let i = 0; i < document.querySelectorAll('[id^="article-section-"]').length; i++) {
@@ -515,6 +670,7 @@ function translateSection(sectionName, sourceLang) {
                 } else {
                     // Store translation for download
                     currentTranslation = data.translated_text;
+                    currentTranslationExport = {'part': 'section', 'section': sectionName, 'translated_to': this.value};
                     
                     // Set modal title
                     document.querySelector('#translationResultModal .modal-title').textContent = 
@@ -577,40 +733,16 @@ function translateSection(sectionName, sourceLang) {
 
 // Download the current translation
 function downloadTranslation() {
-    if (!currentTranslation) {
+    if (!currentTranslation || !currentTranslationExport) {
         alert('No translation available to download');
         return;
     }
     
     const title = document.getElementById('article-title').value;
-    const targetLang = document.getElementById('translate-target').value;
+    const targetLang = currentTranslationExport.translated_to;
     
-    // Send request to server to generate DOCX
-    fetch('/download', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/x-www-form-urlencoded',
-        },
-        body: new URLSearchParams({
-            'title': `${title} (Translated to ${targetLang})`,
-            'content': currentTranslation,
-            'language': targetLang
-        })
-    })
-    .then(response => response.json())
-    .then(data => {
-        if (data.error) {
-            alert('Error generating document: ' + data.error);
-        } else {
-            // Create a temporary link to download the file
-            const downloadLink = document.createElement('a');
-            downloadLink.href = data.docx_url;
-            downloadLink.download = `${title}_${targetLang}.docx`;
-            document.body.appendChild(downloadLink);
-            downloadLink.click();
-            document.body.removeChild(downloadLink);
-        }
-    })
+    // The server rebuilds the translation from its cache, so only a reference is sent
+    downloadDocument(exportUrl(currentTranslationExport), {}, `${title}_${targetLang}.docx`)
     .catch(error => {
         console.error('Download error:', error);
         alert('Error downloading translation. Please try again.');
@@ -97,9 +97,103 @@ document.addEventListener('DOMContentLoaded', function() {
     // Detect changes in screen size
     window.addEventListener('resize', handleResponsiveAdjustments);
     
+    // Suggest article titles while typing a search
+    setUpSearchAutocomplete();
+    
     // Initialize any Bootstrap tooltips
     const tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'));
     tooltipTriggerList.map(function (tooltipTriggerEl) {
         return new bootstrap.Tooltip(tooltipTriggerEl);
     });
 });
+
+// Request a generated document and save the returned file under the given name
+function downloadDocument(url, options, filename) {
+    return fetch(url, options)
+        .then(response => {
+            if (!response.ok) {
+                return response.json().then(data => { throw new Error(data.error || 'Download failed'); });
+            }
+            return response.blob();
+        })
+        .then(blob => {
+            const blobUrl = URL.createObjectURL(blob);
+            const downloadLink = document.createElement('a');
+            downloadLink.href = blobUrl;
+            downloadLink.download = filename;
+            document.body.appendChild(downloadLink);
+            downloadLink.click();
+            document.body.removeChild(downloadLink);
+            setTimeout(() => URL.revokeObjectURL(blobUrl), 1000);
+        });
+}
+
+// Queue an export job, long-poll until it is finished, then save the document
+function downloadExportJob(job, filename) {
+    function checkResponse(response) {
+        return response.json().then(data => {
+            if (!response.ok) {
+                throw new Error(data.error || 'Export failed');
+            }
+            return data;
+        });
+    }
+    
+    function poll(data) {
+        if (data.status === 'done') {
+            return downloadDocument(data.result_url, {}, filename);
+        }
+        if (data.status === 'failed') {
+            throw new Error(data.error || 'Export failed');
+        }
+        return fetch(`${data.status_url}?wait=20`).then(checkResponse).then(poll);
+    }
+    
+    return fetch('/api/export/jobs', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(job)
+    })
+    .then(checkResponse)
+    .then(poll);
+}
+
+// Fill the search box suggestions from the autocomplete API as the user types
+function setUpSearchAutocomplete() {
+    const queryInput = document.getElementById('query');
+    const suggestions = document.getElementById('query-suggestions');
+    const languageSelect = document.getElementById('language');
+    if (!queryInput || !suggestions) return;
+    
+    let debounceTimer = null;
+    let lastRequest = 0;
+    
+    queryInput.addEventListener('input', function() {
+        clearTimeout(debounceTimer);
+        const query = queryInput.value.trim();
+        if (query.length < 2) {
+            suggestions.innerHTML = '';
+            return;
+        }
+        
+        debounceTimer = setTimeout(() => {
+            // Ignore answers that arrive after a newer request was sent
+            const requestId = ++lastRequest;
+            const language = languageSelect ? languageSelect.value : 'en';
+            fetch(`/api/autocomplete?${new URLSearchParams({'q': query, 'lang': language})}`)
+                .then(response => response.json())
+                .then(data => {
+                    if (requestId !== lastRequest || !data.completions) return;
+                    suggestions.innerHTML = '';
+                    data.completions.forEach(title => {
+                        const option = document.createElement('option');
+                        option.value = title;
+                        suggestions.appendChild(option);
+                    });
+                })
+                .catch(error => console.error('Autocomplete error:', error));
+        }, 150);
+    });
+}
@@ -2,6 +2,7 @@
 let selectedLanguages = ['en']; // Default to English, can select multiple
 let imagesOnly = true;
 let offset = 0;
+let feedCursor = null; // Opaque server cursor so later pages never repeat cards
 let loading = false;
 let noMoreArticles = false;
 let articlesPerPage = 5;
@@ -81,6 +82,7 @@ function applyFilters() {
     
     // Reset pagination and article tracking
     offset = 0;
+    feedCursor = null;
     noMoreArticles = false;
     currentArticles = [];
     
@@ -126,38 +128,22 @@ function loadArticles() {
         document.getElementById('scroll-loader').style.display = 'block';
     }
     
-    // Set up for loading articles from multiple languages simultaneously
-    const promises = [];
-    
-    // Fetch articles for each selected language
-    selectedLanguages.forEach(language => {
-        const promise = fetch(`/api/wikitok/articles?language=${language}&images_only=${imagesOnly}&offset=${offset}&limit=${Math.ceil(articlesPerPage / selectedLanguages.length)}`)
-            .then(response => response.json())
-            .then(data => {
-                if (Array.isArray(data)) {
-                    return data;
-                } else if (data.error) {
-                    console.error(`Error fetching ${language} articles:`, data.error);
-                    return [];
-                }
-                return [];
-            })
-            .catch(error => {
-                console.error(`Error fetching ${language} articles:`, error);
-                return [];
-            });
-        
-        promises.push(promise);
+    // Fetch one page for all selected languages; the server interleaves them
+    const params = new URLSearchParams({
+        languages: selectedLanguages.join(','),
+        images_only: imagesOnly,
+        limit: articlesPerPage
     });
+    if (feedCursor) params.set('cursor', feedCursor);
     
-    // Process all language article requests simultaneously
-    Promise.all(promises)
-        .then(results => {
-            // Combine all articles from different languages
-            let allArticles = [];
-            results.forEach(articles => {
-                allArticles = allArticles.concat(articles);
-            });
+    fetch(`/api/wikitok/feed?${params.toString()}`)
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) {
+                throw new Error(data.error);
+            }
+            const allArticles = data.articles || [];
+            feedCursor = data.cursor;
             
             // Clear loader
             if (offset === 0) {
@@ -188,17 +174,14 @@ function loadArticles() {
                     noMoreArticles = true;
                 }
             } else {
-                // Sort and shuffle articles from different languages to mix them
-                allArticles.sort(() => Math.random() - 0.5);
-                
                 // Add new articles to tracking array
                 currentArticles = currentArticles.concat(allArticles);
                 
                 // Render articles
                 renderArticles(allArticles);
                 
-                // Update offset for next page
-                offset += Math.ceil(articlesPerPage / selectedLanguages.length);
+                // Update page counter for next page
+                offset += 1;
             }
             
             loading = false;
@@ -305,8 +288,8 @@ function shareWikiTokArticle(title, language) {
 
 // Download a WikiTok article summary
 function downloadWikiTokArticle(title, summary, language) {
-    // Send request to server to generate DOCX
-    fetch('/download', {
+    // Send request to server to generate DOCX and save the returned file
+    downloadDocument('/download', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/x-www-form-urlencoded',
@@ -316,21 +299,7 @@ function downloadWikiTokArticle(title, summary, language) {
             'content': summary,
             'language': language
         })
-    })
-    .then(response => response.json())
-    .then(data => {
-        if (data.error) {
-            alert('Error generating document: ' + data.error);
-        } else {
-            // Create a temporary link to download the file
-            const downloadLink = document.createElement('a');
-            downloadLink.href = data.docx_url;
-            downloadLink.download = `${decodeURIComponent(title)}.docx`;
-            document.body.appendChild(downloadLink);
-            downloadLink.click();
-            document.body.removeChild(downloadLink);
-        }
-    })
+    }, `${decodeURIComponent(title)}.docx`)
     .catch(error => {
         console.error('Download error:', error);
         alert('Error downloading content. Please try again.');
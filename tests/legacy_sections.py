@@ -0,0 +1,62 @@
+from bs4 import BeautifulSoup
+
+def legacy_extract_sections(html_content):
+    """
+    The BeautifulSoup section walk that section_extractor replaced, kept as the
+    reference for parity tests and benchmarks
+    Returns a dictionary with section titles as keys and content as values
+    """
+    # Parse the HTML content
+    soup = BeautifulSoup(html_content, 'html.parser')
+
+    # Extract sections
+    sections = {}
+    current_section = 'Introduction'
+    sections[current_section] = ''
+
+    # Get all content elements
+    content_div = soup.find('div', {'id': 'mw-content-text'})
+    if not content_div:
+        content_div = soup  # Fallback to the whole page if content div not found
+
+    # Loop through all elements in content
+    elements = content_div.find_all(['h1', 'h2', 'h3', 'p', 'ul', 'ol', 'table'])
+    for element in elements:
+        # Skip navigation, references, and other non-content sections
+        if element.find_parent('div', {'class': ['toc', 'reflist', 'navbox']}):
+            continue
+
+        # If we find a header, start a new section
+        if element.name in ['h1', 'h2', 'h3']:
+            section_text = element.get_text().strip()
+            # Skip empty or special sections
+            if section_text and not section_text.startswith(('See also', 'References', 'External links', 'Notes')):
+                current_section = section_text
+                if current_section not in sections:
+                    sections[current_section] = ''
+        # Add paragraph text to current section
+        elif element.name == 'p' and element.get_text().strip():
+            sections[current_section] += element.get_text().strip() + '\n\n'
+        # Add list items
+        elif element.name in ['ul', 'ol']:
+            list_text = ""
+            for li in element.find_all('li'):
+                list_text += "• " + li.get_text().strip() + "\n"
+            if list_text:
+                sections[current_section] += list_text + '\n'
+        # Add table data
+        elif element.name == 'table':
+            # Skip infoboxes and navigational tables
+            if element.get('class') and any(c in ['infobox', 'navbox', 'metadata'] for c in element.get('class')):
+                continue
+            table_text = "Table: "
+            # Extract some table data as text
+            for row in element.find_all('tr')[:5]:  # Limit to first few rows
+                cells = row.find_all(['th', 'td'])
+                if cells:
+                    row_text = " | ".join(cell.get_text().strip() for cell in cells)
+                    table_text += row_text + "\n"
+            sections[current_section] += table_text + "\n"
+
+    # Remove any empty sections
+    return {k: v for k, v in sections.items() if v.strip()}
@@ -0,0 +1,64 @@
+import json
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+class StandInServer:
+    """
+    Local HTTP server standing in for Wikipedia or a translation provider
+    handler(method, path, params, body) returns (status, JSON-serializable payload), or
+    (status, payload, headers) to send extra response headers; params are the query
+    string (and form) values, body the decoded JSON body or None
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _respond(self, method):
+                url = urlsplit(self.path)
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                body = None
+                if raw and self.headers.get('Content-Type', '').startswith('application/json'):
+                    body = json.loads(raw)
+                elif raw:
+                    params.update({key: values[-1] for key, values in parse_qs(raw.decode('utf-8')).items()})
+                with server._lock:
+                    server.requests.append((method, url.path, params))
+                status, payload, *extra = server.handler(method, url.path, params, body)
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                for name, value in (extra[0] if extra else {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._respond('GET')
+
+            def do_POST(self):
+                self._respond('POST')
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,77 @@
+import json
+import itertools
+
+import pytest
+
+import app as app_module
+from wikipedia_api import get_client
+from article_export import build_export, SectionNotFound
+from standin import StandInServer
+
+# Each test asks for a new title so nothing is answered from the article caches
+_titles = (f"Export test {i}" for i in itertools.count())
+
+SECTION_HTML = {
+    0: '<p>Lead paragraph.</p>',
+    1: '<h2>History</h2><p>Founded long ago.</p><h3>Early years</h3><p>Small beginnings.</p>',
+    3: '<h2>Legacy</h2><p>Still remembered.</p>'
+}
+
+def answer(method, path, params, body):
+    if params.get('action') == 'parse' and params.get('prop') == 'sections':
+        return 200, {'parse': {'sections': [
+            {'toclevel': 1, 'index': '1', 'line': 'History'},
+            {'toclevel': 2, 'index': '2', 'line': 'Early years'},
+            {'toclevel': 1, 'index': '3', 'line': 'Legacy'}
+        ]}}
+    if params.get('action') == 'parse':
+        if 'section' in params:
+            return 200, {'parse': {'text': SECTION_HTML[int(params['section'])]}}
+        return 200, {'parse': {'text': ''.join(SECTION_HTML.values())}}
+    if params.get('generator') == 'images':
+        return 200, {'query': {'pages': []}}
+    return 200, {'query': {'pages': [{
+        'pageid': 1, 'title': params['titles'], 'lastrevid': 42, 'extract': 'Lead paragraph.',
+        'fullurl': 'https://en.wikipedia.org/wiki/Export'
+    }]}}
+
+@pytest.fixture
+def wikipedia_standin():
+    with StandInServer(answer) as server:
+        get_client.cache_clear()
+        get_client('en').api_url = f"{server.url}/en/w/api.php"
+        yield server
+    get_client.cache_clear()
+
+def test_top_level_section_includes_its_subsections(wikipedia_standin):
+    title = next(_titles)
+    doc_title, content = build_export(title, 'en', 'section', section='History')
+
+    assert doc_title == f"{title} - History"
+    assert json.loads(content) == {'History': 'Founded long ago.\n\n', 'Early years': 'Small beginnings.\n\n'}
+    # The section is parsed from the revision the table of contents was built from
+    section_requests = [params for _, _, params in wikipedia_standin.requests if 'section' in params]
+    assert section_requests[0]['oldid'] == '42'
+
+def test_section_without_subsections_is_plain_text(wikipedia_standin):
+    assert build_export(next(_titles), 'en', 'section', section='Legacy')[1] == 'Still remembered.\n\n'
+
+def test_subsection_is_exported_on_its_own(wikipedia_standin):
+    assert build_export(next(_titles), 'en', 'section', section='Early years')[1] == 'Small beginnings.\n\n'
+
+def test_missing_section_raises_section_not_found(wikipedia_standin):
+    with pytest.raises(SectionNotFound, match='Section not found: Etymology'):
+        build_export(next(_titles), 'en', 'section', section='Etymology')
+
+def test_export_route_maps_only_missing_sections_to_404(wikipedia_standin, monkeypatch):
+    client = app_module.app.test_client()
+
+    response = client.get(f"/export/en/{next(_titles)}?part=section&section=Etymology")
+    assert response.status_code == 404
+    assert response.get_json() == {'error': 'Section not found: Etymology'}
+
+    # Any other lookup failure while building is a server error, not a missing section
+    def broken_build(**reference):
+        raise KeyError('lastrevid')
+    monkeypatch.setattr(app_module, 'build_export', broken_build)
+    assert client.get(f"/export/en/{next(_titles)}?part=full").status_code == 500
@@ -0,0 +1,96 @@
+import itertools
+
+import pytest
+
+import app as app_module
+import wikipedia_api
+from wikipedia_api import get_client, normalize_title
+from standin import StandInServer
+
+# Each test asks for a new title so nothing is answered from the article caches
+_titles = (f"Caching test {i}" for i in itertools.count())
+
+def answer_with(langlinks, failing):
+    def answer(method, path, params, body):
+        if params.get('prop') in failing or params.get('generator') in failing:
+            return 500, {}
+        if params.get('action') == 'parse' and params.get('prop') == 'sections':
+            return 200, {'parse': {'sections': [{'toclevel': 1, 'index': '1', 'line': 'History'}]}}
+        if params.get('action') == 'parse':
+            return 200, {'parse': {'text': '<p>Lead paragraph.</p><h2>History</h2><p>Founded long ago.</p>'}}
+        if params.get('generator') == 'images':
+            return 200, {'query': {'pages': []}}
+        if params.get('prop') == 'langlinks|info':
+            return 200, {'query': {'pages': [{'title': params['titles'], 'lastrevid': 42, 'langlinks': [
+                {'lang': code, 'title': link, 'langname': code} for code, link in langlinks.items()
+            ]}]}}
+        return 200, {'query': {'pages': [{
+            'pageid': 1, 'title': params['titles'], 'lastrevid': 42, 'touched': '2024-01-01T00:00:00Z',
+            'extract': 'Lead paragraph.', 'fullurl': 'https://en.wikipedia.org/wiki/Caching'
+        }]}}
+    return answer
+
+# Upstream parts the stand-in answers with a server error, by prop or generator
+_failing = set()
+
+@pytest.fixture
+def langlinks():
+    links = {'de': 'Zwischenspeicher'}
+    with StandInServer(answer_with(links, _failing)) as server:
+        get_client.cache_clear()
+        get_client('en').api_url = f"{server.url}/en/w/api.php"
+        yield links
+    get_client.cache_clear()
+    _failing.clear()
+
+def forget(title):
+    # Drop the cached article so the next view fetches it again
+    for key in [('en', normalize_title(title)), ('outline', 'en', normalize_title(title))]:
+        wikipedia_api.article_cache.delete(key)
+    wikipedia_api.langlinks_cache.delete(('en', normalize_title(title)))
+
+@pytest.mark.parametrize('lazy', ['0', '1'])
+def test_page_with_pending_flash_is_private_and_never_304(langlinks, lazy):
+    client = app_module.app.test_client()
+    url = f"/article/en/{next(_titles)}?lazy={lazy}"
+    etag = client.get(url).headers['ETag']
+
+    with client.session_transaction() as session:
+        session['_flashes'] = [('info', 'Saved to your reading list')]
+    response = client.get(url, headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert 'Saved to your reading list' in response.get_data(as_text=True)
+    assert response.headers['Cache-Control'] == 'private, no-store'
+    assert 'ETag' not in response.headers
+    assert 'Last-Modified' not in response.headers
+
+    # The message was shown once; the next view is cacheable again
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['Cache-Control'].startswith('public')
+
+@pytest.mark.parametrize('lazy', ['0', '1'])
+def test_etag_changes_with_language_links_at_the_same_revision(langlinks, lazy):
+    client = app_module.app.test_client()
+    title = next(_titles)
+    url = f"/article/en/{title}?lazy={lazy}"
+    etag = client.get(url).headers['ETag']
+
+    langlinks['fr'] = 'Antémémoire'
+    forget(title)
+    response = client.get(url, headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+@pytest.mark.parametrize('lazy, failing', [('0', 'images'), ('0', 'langlinks|info'), ('1', 'langlinks|info')])
+def test_degraded_page_is_revalidated_instead_of_shared(langlinks, lazy, failing):
+    _failing.add(failing)
+    response = app_module.app.test_client().get(f"/article/en/{next(_titles)}?lazy={lazy}")
+
+    assert response.status_code == 200
+    assert 'took too long to load' in response.get_data(as_text=True)
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert 'ETag' not in response.headers
+    assert 'Last-Modified' not in response.headers
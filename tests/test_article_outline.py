@@ -0,0 +1,69 @@
+import time
+import itertools
+
+import pytest
+
+import wikipedia_api
+from wikipedia_api import get_client, get_article_outline
+from standin import StandInServer
+
+# Each test asks for a new title so nothing is answered from the article or langlinks caches
+_titles = (f"Outline test {i}" for i in itertools.count())
+
+def outline_standin(delays):
+    def answer(method, path, params, body):
+        if params.get('action') == 'parse':
+            time.sleep(delays.get('toc', 0))
+            return 200, {'parse': {'title': params['page'], 'sections': [
+                {'toclevel': 1, 'index': '1', 'line': 'History'},
+                {'toclevel': 2, 'index': '2', 'line': 'Early years'},
+                {'toclevel': 1, 'index': '3', 'line': 'References'}
+            ]}}
+        if params.get('prop') == 'langlinks|info':
+            time.sleep(delays.get('langlinks', 0))
+            return 200, {'query': {'pages': [{'title': params['titles'], 'lastrevid': 7, 'langlinks': [
+                {'lang': 'de', 'title': 'Geschichte', 'langname': 'German'}
+            ]}]}}
+        time.sleep(delays.get('info', 0))
+        return 200, {'query': {'pages': [{
+            'pageid': 1, 'title': params['titles'], 'lastrevid': 7, 'extract': 'Summary.',
+            'fullurl': 'https://en.wikipedia.org/wiki/Outline'
+        }]}}
+    return StandInServer(answer)
+
+@pytest.fixture
+def standin_delays():
+    delays = {}
+    with outline_standin(delays) as server:
+        get_client.cache_clear()
+        get_client('en').api_url = f"{server.url}/en/w/api.php"
+        yield delays
+    get_client.cache_clear()
+
+def test_outline_lists_top_level_sections(standin_delays):
+    outline = get_article_outline(next(_titles), 'en', deadline=2)
+
+    assert outline['sections'] == [{'index': 0, 'title': 'Introduction'}, {'index': 1, 'title': 'History'}]
+    assert outline['langlinks'] == {'de': {'title': 'Geschichte', 'name': 'German'}}
+
+def test_slow_parts_share_one_deadline(standin_delays):
+    # Each part alone fits the deadline, but together they would not if each had its own
+    standin_delays.update(info=0.6, toc=0.6, langlinks=2)
+    title = next(_titles)
+
+    started = time.monotonic()
+    outline = get_article_outline(title, 'en', deadline=1)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 1.5
+    assert outline['langlinks'] == {}
+    # An outline missing its language links is retried on the next view
+    assert wikipedia_api.article_cache.get(('outline', 'en', title)) is None
+
+def test_missing_required_part_fails_at_the_deadline(standin_delays):
+    standin_delays.update(toc=2)
+
+    started = time.monotonic()
+    with pytest.raises(Exception, match='Timed out'):
+        get_article_outline(next(_titles), 'en', deadline=0.5)
+    assert time.monotonic() - started < 1
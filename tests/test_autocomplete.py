@@ -0,0 +1,41 @@
+import pytest
+
+import autocomplete
+from autocomplete import PrefixIndex, get_completions
+from wikipedia_api import get_client
+from standin import StandInServer
+
+TITLES = ['Ecology', 'Economics', 'École polytechnique', 'École normale supérieure']
+
+def fold(text):
+    return text.casefold().replace('é', 'e')
+
+def answer(method, path, params, body):
+    # Like prefixsearch, match titles with their accents folded
+    prefix = fold(params['pssearch'])
+    found = [title for title in TITLES if fold(title).startswith(prefix)][:int(params['pslimit'])]
+    return 200, {'query': {'prefixsearch': [{'title': title} for title in found]}}
+
+@pytest.fixture
+def wikipedia_standin(monkeypatch):
+    monkeypatch.setattr(autocomplete, '_prefix_index', PrefixIndex())
+    with StandInServer(answer) as server:
+        get_client.cache_clear()
+        get_client('en').api_url = f"{server.url}/en/w/api.php"
+        yield server
+    get_client.cache_clear()
+
+def test_literal_complete_list_answers_longer_prefixes_locally(wikipedia_standin):
+    assert get_completions('Econ') == ['Economics']
+    assert get_completions('Economi') == ['Economics']
+
+    assert len(wikipedia_standin.requests) == 1
+    assert autocomplete.get_autocomplete_stats()['derived_hits'] == 1
+
+def test_folded_matches_are_not_filtered_away(wikipedia_standin):
+    assert get_completions('ecole p') == ['École polytechnique']
+    assert get_completions('ecole po') == ['École polytechnique']
+
+    # The first list holds a title that does not start with the prefix as typed
+    assert len(wikipedia_standin.requests) == 2
+    assert autocomplete.get_autocomplete_stats()['derived_hits'] == 0
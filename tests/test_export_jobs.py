@@ -0,0 +1,85 @@
+import io
+import time
+import threading
+
+import pytest
+
+import app as app_module
+import export_jobs
+from export_jobs import ExportJobQueue, ExportQueueFull
+
+def sleepy_build(title, content):
+    # Runs in the spawned pool processes; the content is how long the build takes
+    time.sleep(float(content))
+    return f"{title}:{content}".encode('utf-8')
+
+@pytest.fixture
+def queue():
+    queue = ExportJobQueue(workers=1, max_queued=2, timeout=30)
+    yield queue
+    if queue._pool is not None:
+        queue._pool.shutdown(cancel_futures=True)
+
+def test_timed_out_build_stops_its_process(queue):
+    # Warm the pool up so the timeout only covers the build
+    assert queue.build('warm', '0', builder=sleepy_build) == b'warm:0'
+    pool = queue._pool
+    processes = list(pool._processes.values())
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        queue.build('slow', '30', timeout=0.5, builder=sleepy_build)
+    assert time.monotonic() - started < 2
+
+    for process in processes:
+        process.join(5)
+        assert not process.is_alive()
+    assert queue._pool is None
+
+    # The next build gets a fresh pool
+    assert queue.build('next', '0', builder=sleepy_build) == b'next:0'
+    assert queue._pool is not pool
+
+def test_direct_builds_count_against_max_queued(queue):
+    running = [threading.Thread(target=queue.build, args=(f"t{i}", '1'), kwargs={'builder': sleepy_build})
+               for i in range(2)]
+    for thread in running:
+        thread.start()
+    time.sleep(0.2)
+
+    assert queue.stats()['direct_builds'] == 2
+    with pytest.raises(ExportQueueFull):
+        queue.build('third', '0', builder=sleepy_build)
+    with pytest.raises(ExportQueueFull):
+        queue.submit(title='job', content='text')
+    assert queue.stats()['rejected'] == 2
+
+    for thread in running:
+        thread.join()
+    assert queue.stats()['direct_builds'] == 0
+
+def test_large_download_gets_503_when_the_queue_is_full(monkeypatch):
+    monkeypatch.setattr(export_jobs, 'EXPORT_SYNC_MAX_CHARS', 10)
+    monkeypatch.setattr(export_jobs.export_jobs, 'max_queued', 0)
+    client = app_module.app.test_client()
+
+    response = client.post('/download', data={'title': 'Queue full', 'content': f"Long content {time.time()}"})
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+    assert 'already queued' in response.get_json()['error']
+
+@pytest.mark.parametrize('path, content_type, body', [
+    ('/download', 'application/x-www-form-urlencoded', b'title=Big&content=' + b'a' * 4096),
+    ('/api/export/jobs', 'application/json', b'{"title": "Big", "content": "' + b'a' * 4096 + b'"}')
+], ids=['download', 'export_job'])
+def test_chunked_body_over_the_limit_gets_413(monkeypatch, path, content_type, body):
+    monkeypatch.setattr(app_module, 'DOWNLOAD_MAX_BODY_BYTES', 1024)
+    client = app_module.app.test_client()
+
+    # A chunked upload has no usable Content-Length; the server marks the input as terminated
+    response = client.post(path, input_stream=io.BytesIO(body), content_type=content_type,
+                           headers={'Transfer-Encoding': 'chunked'}, environ_overrides={'wsgi.input_terminated': True})
+
+    assert response.status_code == 413
+    assert 'too large' in response.get_json()['error']
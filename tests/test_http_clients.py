@@ -0,0 +1,35 @@
+import time
+
+import pytest
+
+import http_client
+import async_http_client
+from http_client import HttpClient
+from async_http_client import AsyncHttpClient, run_async
+from standin import StandInServer
+
+def throttled(method, path, params, body):
+    return 503, {'error': 'busy'}, {'Retry-After': '600'}
+
+@pytest.fixture
+def throttled_standin(monkeypatch):
+    monkeypatch.setattr(http_client, 'HTTP_RETRY_AFTER_MAX', 0.1)
+    monkeypatch.setattr(async_http_client, 'HTTP_RETRY_AFTER_MAX', 0.1)
+    with StandInServer(throttled) as server:
+        yield server
+
+def test_long_retry_after_is_capped(throttled_standin):
+    started = time.monotonic()
+    response = HttpClient(max_retries=2).get(f"{throttled_standin.url}/api")
+
+    assert response.status_code == 503
+    assert len(throttled_standin.requests) == 3
+    assert time.monotonic() - started < 2
+
+def test_long_retry_after_is_capped_on_the_event_loop(throttled_standin):
+    started = time.monotonic()
+    response = run_async(AsyncHttpClient(max_retries=2).get(f"{throttled_standin.url}/api"))
+
+    assert response.status_code == 503
+    assert len(throttled_standin.requests) == 3
+    assert time.monotonic() - started < 2
@@ -0,0 +1,48 @@
+import time
+
+import pytest
+
+import wikipedia_api
+from cache import LRUCache
+from wikipedia_api import get_client, get_langlinks
+from standin import StandInServer
+
+def answer_with(page):
+    def answer(method, path, params, body):
+        info = {'pageid': 1, 'title': params['titles'], 'lastrevid': 42, 'touched': page['touched']}
+        if params.get('prop') == 'langlinks|info':
+            info['langlinks'] = [{'lang': code, 'title': link, 'langname': code} for code, link in page['links'].items()]
+        return 200, {'query': {'pages': [info]}}
+    return answer
+
+@pytest.fixture
+def page(monkeypatch):
+    page = {'touched': '2024-01-01T00:00:00Z', 'links': {'de': 'Zwischenspeicher'}}
+    monkeypatch.setattr(wikipedia_api, 'langlinks_cache', LRUCache(1024 * 1024, ttl=0.05))
+    with StandInServer(answer_with(page)) as server:
+        get_client.cache_clear()
+        get_client('en').api_url = f"{server.url}/en/w/api.php"
+        page['server'] = server
+        yield page
+    get_client.cache_clear()
+
+def langlinks_requests(server):
+    return sum(params.get('prop') == 'langlinks|info' for _, _, params in server.requests)
+
+def test_unchanged_page_keeps_its_expired_links(page):
+    assert get_langlinks(['Cache'])['Cache'] == {'de': {'title': 'Zwischenspeicher', 'name': 'de'}}
+    time.sleep(0.1)
+
+    assert get_langlinks(['Cache'])['Cache'] == {'de': {'title': 'Zwischenspeicher', 'name': 'de'}}
+    assert langlinks_requests(page['server']) == 1
+
+def test_links_changed_on_wikidata_are_refetched_at_the_same_revision(page):
+    get_langlinks(['Cache'])
+    time.sleep(0.1)
+
+    # A new sitelink touches the page without a new revision
+    page['links']['fr'] = 'Antémémoire'
+    page['touched'] = '2024-02-01T00:00:00Z'
+
+    assert set(get_langlinks(['Cache'])['Cache']) == {'de', 'fr'}
+    assert langlinks_requests(page['server']) == 2
@@ -0,0 +1,137 @@
+import time
+
+import pytest
+
+import provider_scheduler
+import translation_api
+import translation_async
+from provider_scheduler import ProviderScheduler, CLOSED, OPEN, HALF_OPEN
+from async_http_client import run_async
+from standin import StandInServer
+
+class StandInProvider:
+    """Behaviour of one stand-in translation provider, changed by the tests as they go"""
+
+    def __init__(self, name):
+        self.name = name
+        self.delay = 0
+        self.status = 200
+
+    def answer(self, method, path, params, body):
+        time.sleep(self.delay)
+        if self.status != 200:
+            return self.status, {'error': 'unavailable'}
+        text = body['q'] if body else params['q']
+        translated = f"{self.name}:{text}"
+        if self.name == 'libre':
+            return 200, {'translatedText': translated}
+        return 200, [[[translated, text, None, None, 10]], None, params.get('sl')]
+
+@pytest.fixture
+def providers(monkeypatch):
+    # Hedge quickly, and open breakers after a few failures for a short cooldown
+    monkeypatch.setattr(provider_scheduler, 'HEDGE_MIN_DELAY', 0.1)
+    monkeypatch.setattr(provider_scheduler, 'HEDGE_MAX_DELAY', 0.2)
+    monkeypatch.setattr(provider_scheduler, 'PROVIDER_FAILURE_THRESHOLD', 3)
+    monkeypatch.setattr(provider_scheduler, 'PROVIDER_COOLDOWN', 0.3)
+
+    libre, google = StandInProvider('libre'), StandInProvider('google')
+    with StandInServer(libre.answer) as libre_server, StandInServer(google.answer) as google_server:
+        for module in (translation_api, translation_async):
+            monkeypatch.setattr(module, 'LIBRE_TRANSLATE_API', f"{libre_server.url}/translate")
+            monkeypatch.setattr(module, 'GOOGLE_TRANSLATE_API', f"{google_server.url}/translate_a/single")
+        libre.server, google.server = libre_server, google_server
+        yield libre, google
+
+@pytest.fixture
+def scheduler():
+    return ProviderScheduler(
+        [('libre', translation_api._translate_with_libre), ('google', translation_api._translate_with_google)],
+        max_workers=4
+    )
+
+def test_healthy_primary_is_not_hedged(providers, scheduler):
+    libre, google = providers
+
+    assert scheduler.call('Hello', 'en', 'de') == ('libre:Hello', 'libre')
+    assert not google.server.requests
+
+def test_slow_primary_is_hedged_to_the_next_provider(providers, scheduler):
+    libre, google = providers
+    libre.delay = 1
+
+    started = time.monotonic()
+    result = scheduler.call('Hello', 'en', 'de')
+
+    assert result == ('google:Hello', 'google')
+    assert time.monotonic() - started < 0.8
+    assert scheduler.health['google'].hedged_wins == 1
+    assert scheduler.health['libre'].hedged_wins == 0
+
+def test_async_calls_are_hedged_the_same_way(providers, scheduler):
+    libre, google = providers
+    libre.delay = 1
+    functions = {'libre': translation_async._translate_with_libre_async, 'google': translation_async._translate_with_google_async}
+
+    started = time.monotonic()
+    result = run_async(scheduler.call_async(functions, 'Hello', 'en', 'de'))
+
+    assert result == ('google:Hello', 'google')
+    assert time.monotonic() - started < 0.8
+    assert scheduler.health['google'].hedged_wins == 1
+
+def test_breaker_opens_half_opens_and_closes(providers, scheduler):
+    libre, google = providers
+    libre.status = 400
+    health = scheduler.health['libre']
+
+    # Failures fall through to the next provider until the breaker opens
+    for _ in range(3):
+        assert scheduler.call('Hello', 'en', 'de') == ('google:Hello', 'google')
+    assert health.state == OPEN
+    assert len(libre.server.requests) == 3
+
+    # While open, the provider is skipped without being called
+    assert scheduler.call('Hello', 'en', 'de') == ('google:Hello', 'google')
+    assert len(libre.server.requests) == 3
+    assert not health.is_available()
+
+    # After the cooldown one trial call goes through, and its success closes the breaker
+    libre.status = 200
+    time.sleep(0.35)
+    assert health.acquire()
+    assert health.state == HALF_OPEN
+    assert not health.acquire()
+    health.record(True, 0.01)
+    assert health.state == CLOSED
+
+    assert scheduler.call('Hello', 'en', 'de') == ('libre:Hello', 'libre')
+    assert scheduler.stats()['libre']['consecutive_failures'] == 0
+
+def test_failed_trial_reopens_the_breaker(providers, scheduler):
+    libre, google = providers
+    libre.status = 400
+    for _ in range(3):
+        scheduler.call('Hello', 'en', 'de')
+    assert scheduler.health['libre'].state == OPEN
+
+    # The trial call after the cooldown fails, so the breaker opens again for another cooldown
+    time.sleep(0.35)
+    assert scheduler.call('Hello', 'en', 'de') == ('google:Hello', 'google')
+    assert len(libre.server.requests) == 4
+    assert scheduler.health['libre'].state == OPEN
+
+    libre.status = 200
+    time.sleep(0.35)
+    assert scheduler.call('Hello', 'en', 'de') == ('libre:Hello', 'libre')
+    assert scheduler.health['libre'].state == CLOSED
+
+def test_all_breakers_open_fails_fast(providers, scheduler):
+    libre, google = providers
+    libre.status = google.status = 400
+    for _ in range(3):
+        with pytest.raises(Exception):
+            scheduler.call('Hello', 'en', 'de')
+
+    with pytest.raises(Exception, match='circuit breakers open'):
+        scheduler.call('Hello', 'en', 'de')
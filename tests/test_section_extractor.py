@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from section_extractor import extract_sections
+from legacy_sections import legacy_extract_sections
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Saved article HTML: parser output with current heading markup, older markup with a
+# table of contents and nested lists and tables, and a full skin page
+ARTICLE_FIXTURES = sorted(name for name in os.listdir(FIXTURES_DIR) if name.startswith('article_'))
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+@pytest.mark.parametrize('name', ARTICLE_FIXTURES)
+def test_matches_beautifulsoup_extraction(name):
+    html = read_fixture(name)
+    assert extract_sections(html) == legacy_extract_sections(html)
+
+@pytest.mark.parametrize('name', ARTICLE_FIXTURES)
+def test_truncated_article_matches(name):
+    html = read_fixture(name)
+    for cut in range(len(html) // 4, len(html), len(html) // 4):
+        assert extract_sections(html[:cut]) == legacy_extract_sections(html[:cut])
+
+def test_full_page_reads_only_the_content_div():
+    sections = extract_sections(read_fixture('article_full_page.html'))
+
+    assert list(sections) == ['Introduction', 'Name', 'Alpenrhein', 'Oberrhein']
+    assert not any('Navigationsmenü' in text or 'zuletzt bearbeitet' in text for text in sections.values())
+    assert sections['Oberrhein'].startswith("Table: Abschnitt | Länge (km)\n")
+
+def test_skipped_containers_and_headings():
+    sections = extract_sections(read_fixture('article_legacy_markup.html'))
+
+    assert 'Contents' not in sections
+    assert 'Notes' not in sections and 'References' not in sections
+    # Older markup keeps the edit link inside the heading, so it is part of the title
+    assert 'Work[edit]' in sections
+    # Content under a skipped heading stays with the previous section
+    assert 'Dates follow the Gregorian calendar.' in sections['Work[edit]']
+    assert 'needs additional citations' not in sections['Work[edit]']
+    assert 'Toole' not in ''.join(sections.values())
+
+@pytest.mark.parametrize('html', [
+    '<p>Before</p></div></span><p>After</p>',
+    '<div class="mw-parser-output"><p>Unclosed <b>bold<h2>Next</h2><p>Text',
+    '<p>Mentions mw-content-text but has no such div</p>',
+    '<ul><li>One<li>Two</ul><table><tr><td>A<td>B</table>',
+    '<h2>Only a heading</h2>',
+    ''
+])
+def test_malformed_html_matches(html):
+    assert extract_sections(html) == legacy_extract_sections(html)
@@ -0,0 +1,54 @@
+import pytest
+
+import translation_api
+import translation_async
+from translation_api import split_into_chunks, join_chunks, translate_text, translate_sections
+from translation_async import translate_text_async
+from translation_cache import TranslationCache
+from async_http_client import run_async
+from standin import StandInServer
+
+CHINESE = "长江是亚洲第一长河。全长约六千三百公里！它流经十一个省级行政区。长江流域是中国经济最发达的地区之一；沿岸有许多大城市。"
+JAPANESE = "富士山は日本最高峰の山である。標高は三七七六メートル。山梨県と静岡県にまたがる。"
+ENGLISH = "The Rhine rises in the Alps. It flows north through Germany! Does it reach the sea? It ends in the North Sea; its delta is large."
+
+@pytest.mark.parametrize('text, separator', [(CHINESE, ''), (JAPANESE, ''), (ENGLISH, ' ')])
+def test_chunks_keep_the_original_separators(text, separator):
+    chunks = split_into_chunks(text, 30)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 30 for chunk in chunks)
+    assert separator.join(chunks) == text
+
+def test_overlong_unspaced_sentence_is_cut_hard():
+    sentence = "长" * 70 + "。"
+    assert split_into_chunks(sentence, 30) == ["长" * 30, "长" * 30, "长" * 10 + "。"]
+
+@pytest.mark.parametrize('language, expected', [
+    ('zh', '一。二。'), ('zh-yue', '一。二。'), ('ja', '一。二。'), ('en', '一。 二。'), ('ko', '一。 二。')
+])
+def test_join_chunks_spaces_by_target_language(language, expected):
+    assert join_chunks(['一。', '二。'], language) == expected
+
+@pytest.fixture
+def echo_translation(monkeypatch):
+    # The stand-in LibreTranslate returns each chunk unchanged, so joins show up as the only difference
+    with StandInServer(lambda method, path, params, body: (200, {'translatedText': body['q']})) as server:
+        monkeypatch.setattr(translation_api, 'LIBRE_TRANSLATE_API', f"{server.url}/translate")
+        monkeypatch.setattr(translation_api, 'CHUNK_MAX_CHARS', 30)
+        monkeypatch.setattr(translation_api, 'translation_cache', TranslationCache(path=''))
+        yield server
+
+@pytest.mark.parametrize('text, source, target', [(CHINESE, 'zh', 'ja'), (JAPANESE, 'ja', 'zh'), (ENGLISH, 'en', 'de')])
+def test_translated_chunks_have_no_stray_spaces(echo_translation, monkeypatch, text, source, target):
+    assert translate_text(text, source, target) == text
+    assert len(echo_translation.requests) > 1
+
+    monkeypatch.setattr(translation_api, 'translation_cache', TranslationCache(path=''))
+    assert dict(translate_sections({'Intro': text}, source, target)) == {'Intro': text}
+
+def test_async_translation_joins_like_the_sync_one(echo_translation, monkeypatch):
+    monkeypatch.setattr(translation_async, 'CHUNK_MAX_CHARS', 30)
+    monkeypatch.setattr(translation_async, 'LIBRE_TRANSLATE_API', f"{echo_translation.url}/translate")
+
+    assert run_async(translate_text_async(CHINESE, 'zh', 'ja')) == CHINESE
@@ -0,0 +1,65 @@
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from wikipedia_api import get_client, search_wikipedia, WikipediaClient
+from standin import StandInServer
+
+LANGUAGES = ['en', 'de', 'fr', 'ru', 'ja', 'zh-yue']
+
+def answer(method, path, params, body):
+    # Echo the edition and the query back in the result so crossed answers show up
+    language = path.split('/')[1]
+    time.sleep(random.uniform(0, 0.005))
+    if params.get('list') == 'search':
+        return 200, {'query': {'search': [{'title': f"{language}|{params['srsearch']}"}]}}
+    return 200, {'query': {'pages': [{'title': params.get('titles', ''), 'lastrevid': len(language)}]}}
+
+@pytest.fixture
+def wikipedia_standin():
+    with StandInServer(answer) as server:
+        get_client.cache_clear()
+        for language in LANGUAGES:
+            get_client(language).api_url = f"{server.url}/{language}/w/api.php"
+        yield server
+    get_client.cache_clear()
+
+def test_clients_are_shared_per_language():
+    assert get_client('en') is get_client('en')
+    assert get_client('en') is not get_client('de')
+    with pytest.raises(ValueError):
+        WikipediaClient('en.evil.example/')
+
+def test_interleaved_languages_from_many_threads_never_cross(wikipedia_standin):
+    start = threading.Barrier(16)
+
+    def worker(worker_id):
+        start.wait()
+        mismatches = []
+        for i in range(60):
+            language = LANGUAGES[(worker_id + i) % len(LANGUAGES)]
+            query = f"q{worker_id}-{i}"
+            # Alternate between the raw client and the cached public function
+            if i % 2:
+                titles = get_client(language).search(query)
+            else:
+                titles = search_wikipedia(query, language)
+            if titles != [f"{language}|{query}"]:
+                mismatches.append((language, query, titles))
+        return mismatches
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(worker, range(16)))
+
+    assert [mismatch for result in results for mismatch in result] == []
+    assert len(wikipedia_standin.requests) == 16 * 60
+
+def test_every_edition_gets_its_own_requests(wikipedia_standin):
+    with ThreadPoolExecutor(max_workers=12) as executor:
+        list(executor.map(lambda language: get_client(language).search('x'), LANGUAGES * 10))
+    editions = [path.split('/')[1] for _, path, _ in wikipedia_standin.requests]
+    assert sorted(set(editions)) == sorted(LANGUAGES)
+    assert all(editions.count(language) == 10 for language in LANGUAGES)
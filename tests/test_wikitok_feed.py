@@ -0,0 +1,71 @@
+import time
+import itertools
+
+import pytest
+
+import wikitok_feed
+from wikitok_feed import get_feed_page
+
+@pytest.fixture
+def fake_random_articles(monkeypatch):
+    """Replace the upstream with numbered cards and count the calls"""
+    counter = itertools.count()
+    calls = []
+
+    def get_random_articles(language, limit, images_only=True):
+        calls.append((language, limit))
+        if language == 'slow':
+            time.sleep(0.3)
+        return [{'title': f"{language}-{next(counter)}", 'language': language} for _ in range(limit)]
+
+    monkeypatch.setattr(wikitok_feed, 'get_random_articles', get_random_articles)
+    monkeypatch.setattr(wikitok_feed, '_buffers', {})
+    # Background refills would add cards behind the test's back
+    monkeypatch.setattr(wikitok_feed.CardBuffer, 'schedule_refill', lambda self: None)
+    return calls
+
+def buffered_titles(language):
+    return [card['title'] for card in wikitok_feed._get_buffer(language, True).cards]
+
+def test_unused_cards_go_back_to_their_buffer(fake_random_articles):
+    articles, cursor = get_feed_page(['en', 'de'], limit=2)
+    assert [card['title'] for card in articles] == ['en-0', 'de-2']
+    assert buffered_titles('en') == ['en-1']
+    assert buffered_titles('de') == ['de-3']
+
+    # The next page is served from the returned cards without asking upstream again
+    articles, _ = get_feed_page(['en', 'de'], limit=2, cursor=cursor)
+    assert sorted(card['title'] for card in articles) == ['de-3', 'en-1']
+    assert len(fake_random_articles) == 2
+
+def test_late_cards_are_kept_for_the_next_page(fake_random_articles, monkeypatch):
+    monkeypatch.setattr(wikitok_feed, 'WIKITOK_FEED_DEADLINE', 0.05)
+    articles, _ = get_feed_page(['en', 'slow'], limit=2)
+    assert all(card['language'] == 'en' for card in articles)
+
+    time.sleep(0.5)
+    assert len(buffered_titles('slow')) == 2
+
+def test_put_back_keeps_order_and_skips_duplicates():
+    buffer = wikitok_feed.CardBuffer('en', True, depth=3)
+    buffer.cards.extend([{'title': 'c'}])
+    buffer.put_back([{'title': 'a'}, {'title': 'b'}, {'title': 'c'}])
+    assert [card['title'] for card in buffer.cards] == ['a', 'b', 'c']
+
+def cards_served(language):
+    return wikitok_feed._get_buffer(language, True).stats()['cards_served']
+
+def test_cards_served_counts_only_buffered_cards_that_were_served(fake_random_articles, monkeypatch):
+    # The first page misses the empty buffers; its spare cards were never counted
+    articles, cursor = get_feed_page(['en', 'de'], limit=2)
+    assert cards_served('en') == cards_served('de') == 0
+
+    # The second page comes from the returned cards, one per language
+    get_feed_page(['en', 'de'], limit=2, cursor=cursor)
+    assert cards_served('en') == cards_served('de') == 1
+
+    # Late cards fetched upstream go back to the buffer without touching the counter
+    monkeypatch.setattr(wikitok_feed, 'WIKITOK_FEED_DEADLINE', 0.05)
+    get_feed_page(['slow'], limit=1)
+    time.sleep(0.5)
+    assert cards_served('slow') == 0
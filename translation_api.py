@@ -1,10 +1,15 @@
 import os
-import requests
 import logging
 import json
 import html
 import re
+import itertools
 from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from http_client import http_client
+from translation_cache import TranslationCache, normalize_text
+from provider_scheduler import ProviderScheduler
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -17,6 +22,38 @@ LIBRE_TRANSLATE_API_KEY = os.environ.get("LIBRE_TRANSLATE_API_KEY", "")
 # 2. Google Translate API (through free proxy - simulated for demo)
 GOOGLE_TRANSLATE_API = "https://translate.googleapis.com/translate_a/single"
 
+# Online providers in order of preference; cached translations remember their provider
+PROVIDER_ORDER = ['libre', 'google']
+
+translation_cache = TranslationCache()
+
+# Request size limits in characters; Google takes the text in the query string
+PROVIDER_MAX_CHARS = {
+    'libre': int(os.environ.get("LIBRE_TRANSLATE_MAX_CHARS", 4000)),
+    'google': int(os.environ.get("GOOGLE_TRANSLATE_MAX_CHARS", 1800))
+}
+
+# Chunks must fit whichever provider ends up translating them
+CHUNK_MAX_CHARS = min(PROVIDER_MAX_CHARS.values())
+
+# Chunks are translated concurrently on a bounded pool and retried individually
+TRANSLATION_MAX_WORKERS = int(os.environ.get("TRANSLATION_MAX_WORKERS", 8))
+TRANSLATION_CHUNK_RETRIES = int(os.environ.get("TRANSLATION_CHUNK_RETRIES", 1))
+
+_chunk_executor = ThreadPoolExecutor(max_workers=TRANSLATION_MAX_WORKERS, thread_name_prefix='translate-chunk')
+
+# Short paragraphs are packed into one provider request, separated by blank lines;
+# the split of the answer is checked and the batch retried paragraph by paragraph if it does not match
+PARAGRAPH_SEPARATOR = '\n\n'
+PARAGRAPH_SPLIT_RE = re.compile(r'\n\s*\n')
+
+# Sentence ends: Latin punctuation followed by whitespace, or CJK punctuation; the group
+# keeps the separator so chunks are cut from the text without adding or losing spaces
+SENTENCE_BOUNDARY_RE = re.compile(r'((?<=[.!?;])\s+|(?<=[。！？；]))')
+
+# Languages written without spaces between sentences; translated chunks are joined without one
+UNSPACED_LANGUAGES = {'zh', 'ja', 'yue', 'wuu', 'lzh', 'th', 'lo', 'my', 'km', 'bo'}
+
 # Language name mapping for better error messages
 LANGUAGE_NAMES = {
     'en': 'English',
@@ -36,6 +73,10 @@ def translate_text(text, source_lang, target_lang):
     """
     Translate text from source language to target language
     Uses multiple translation services with fallback options
+    Paragraphs are translated and cached one by one, so a section that changed by
+    one paragraph reuses the translations of the others. Paragraphs that do not fit
+    a provider request are split on sentence boundaries, and all chunks are
+    translated concurrently
     
     Args:
         text (str): Text to translate
@@ -49,39 +90,55 @@ def translate_text(text, source_lang, target_lang):
     if source_lang == target_lang:
         return text
     
-    # Clean the text - remove excessive newlines and spaces
-    text = re.sub(r'\n+', '\n', text)
-    text = re.sub(r'\s+', ' ', text)
+    # Split into paragraphs and clean each one - remove excessive newlines and spaces
+    paragraphs = split_paragraphs(text)
     
-    # Try multiple translation services with fallbacks
-    translated_text = None
-    errors = []
+    # Serve what we can from the cache and split the rest into chunks
+    translated_paragraphs = []
+    futures = {}
+    for i, paragraph in enumerate(paragraphs):
+        translated = translation_cache.get(paragraph, source_lang, target_lang, PROVIDER_ORDER)
+        translated_paragraphs.append(translated)
+        if translated is None:
+            futures[i] = [
+                (chunk, _chunk_executor.submit(_translate_chunk, chunk, source_lang, target_lang))
+                for chunk in split_into_chunks(paragraph, CHUNK_MAX_CHARS)
+            ]
     
-    # Try LibreTranslate first
-    try:
-        translated_text = _translate_with_libre(text, source_lang, target_lang)
-        if translated_text:
-            return translated_text
-    except Exception as e:
-        errors.append(f"LibreTranslate error: {str(e)}")
-        logging.error(f"LibreTranslate error: {str(e)}")
-    
-    # Try Google Translate as fallback
-    try:
-        translated_text = _translate_with_google(text, source_lang, target_lang)
-        if translated_text:
-            return translated_text
-    except Exception as e:
-        errors.append(f"Google Translate error: {str(e)}")
-        logging.error(f"Google Translate error: {str(e)}")
+    # Reassemble in order; a chunk that still fails after its retries keeps its original text
+    failed_chunks = 0
+    for i, chunk_futures in futures.items():
+        pieces = []
+        providers = []
+        for chunk, future in chunk_futures:
+            try:
+                translated, provider = future.result()
+                pieces.append(translated)
+                providers.append(provider)
+            except Exception as e:
+                logging.error(f"Chunk translation error: {str(e)}")
+                pieces.append(chunk)
+                failed_chunks += 1
+        translated_paragraphs[i] = join_chunks(pieces, target_lang)
+        if len(providers) == len(chunk_futures):
+            # Label mixed results with the least preferred provider that contributed
+            provider = max(providers, key=PROVIDER_ORDER.index)
+            translation_cache.set(paragraphs[i], source_lang, target_lang, provider, translated_paragraphs[i])
     
+    total_chunks = sum(len(chunk_futures) for chunk_futures in futures.values())
+    if not total_chunks or failed_chunks < total_chunks:
+        return '\n\n'.join(translated_paragraphs)
+    return fallback_translation(text, source_lang, target_lang)
+
+def fallback_translation(text, source_lang, target_lang):
+    """Translate text when every online service failed for all of its chunks"""
     # If both services failed, use our simple translation table as last resort
+    text = normalize_text(text)
     try:
         translated_text = _simple_translation(text, source_lang, target_lang)
         if translated_text:
             return translated_text
     except Exception as e:
-        errors.append(f"Simple translation error: {str(e)}")
         logging.error(f"Simple translation error: {str(e)}")
     
     # If all methods failed, return the original text with an error message
@@ -90,8 +147,214 @@ def translate_text(text, source_lang, target_lang):
     
     return f"Translation from {source_name} to {target_name} failed. Please try again later.\n\nOriginal text:\n{text}"
 
+def translate_sections(sections, source_lang, target_lang):
+    """
+    Translate a whole article, yielding each section as soon as it is done
+    Paragraphs repeated anywhere in the article are translated once, and short
+    paragraphs are packed together into as few provider requests as the size
+    limits allow; all requests run concurrently
+    
+    Args:
+        sections (dict): Section titles mapped to their text
+        source_lang (str): Source language code (e.g., 'en')
+        target_lang (str): Target language code (e.g., 'es')
+        
+    Yields:
+        tuple: (section title, translated text), in order of completion
+    """
+    if source_lang == target_lang:
+        yield from sections.items()
+        return
+    
+    section_paragraphs = {title: split_paragraphs(text) for title, text in sections.items()}
+    
+    # Look up each distinct paragraph once; long ones are split into chunks as in translate_text
+    translations = {}
+    units = []
+    unit_owners = []
+    for paragraph in dict.fromkeys(p for paragraphs in section_paragraphs.values() for p in paragraphs):
+        translated = translation_cache.get(paragraph, source_lang, target_lang, PROVIDER_ORDER)
+        if translated is not None:
+            translations[paragraph] = translated
+            continue
+        for chunk in split_into_chunks(paragraph, CHUNK_MAX_CHARS):
+            units.append(chunk)
+            unit_owners.append(paragraph)
+    
+    # Pack the pieces into provider requests; each paragraph remembers where its pieces went
+    pieces = {}
+    futures = []
+    for batch in pack_paragraphs(list(range(len(units))), [len(unit) for unit in units], CHUNK_MAX_CHARS):
+        future = _chunk_executor.submit(_translate_batch, [units[i] for i in batch], source_lang, target_lang)
+        futures.append(future)
+        for position, i in enumerate(batch):
+            pieces.setdefault(unit_owners[i], []).append((units[i], future, position))
+    
+    def assemble(paragraph):
+        if paragraph not in translations:
+            results = [(chunk, future.result()[position]) for chunk, future, position in pieces[paragraph]]
+            translated = join_chunks([result[0] if result else chunk for chunk, result in results], target_lang)
+            if all(results):
+                provider = max((result[1] for _, result in results), key=PROVIDER_ORDER.index)
+                translation_cache.set(paragraph, source_lang, target_lang, provider, translated)
+            translations[paragraph] = translated
+        return translations[paragraph]
+    
+    # A section is ready once every request holding one of its paragraphs has finished
+    waiting = {
+        title: {future for p in paragraphs if p in pieces for _, future, _ in pieces[p]}
+        for title, paragraphs in section_paragraphs.items()
+    }
+    finished = set()
+    for completed in itertools.chain([None], as_completed(futures)):
+        finished.add(completed)
+        for title in [title for title, pending in waiting.items() if pending <= finished]:
+            del waiting[title]
+            yield title, '\n\n'.join(assemble(p) for p in section_paragraphs[title])
+
+def pack_paragraphs(items, sizes, max_chars):
+    """
+    Group items into batches whose combined size, separators included,
+    stays within max_chars; an oversized item gets a batch of its own
+    Returns a list of batches
+    """
+    batches = []
+    current = []
+    current_size = 0
+    for item, size in zip(items, sizes):
+        needed = size + (len(PARAGRAPH_SEPARATOR) if current else 0)
+        if current and current_size + needed > max_chars:
+            batches.append(current)
+            current = []
+            current_size = 0
+            needed = size
+        current.append(item)
+        current_size += needed
+    if current:
+        batches.append(current)
+    return batches
+
+def _translate_batch(texts, source_lang, target_lang):
+    """
+    Translate several paragraphs in one provider request, falling back to one
+    request per paragraph if the answer cannot be split back into as many paragraphs
+    Returns a list of (translated text, provider name) tuples, or None for failed paragraphs
+    """
+    if len(texts) > 1:
+        try:
+            translated, provider = _translate_chunk(PARAGRAPH_SEPARATOR.join(texts), source_lang, target_lang)
+            parts = split_paragraphs(translated)
+            if len(parts) == len(texts):
+                return [(part, provider) for part in parts]
+            logging.warning(f"Packed translation returned {len(parts)} paragraphs instead of {len(texts)}, retrying one by one")
+        except Exception as e:
+            logging.error(f"Packed translation error: {str(e)}")
+    
+    # Runs on the chunk pool already, so the paragraphs are translated in this thread
+    results = []
+    for text in texts:
+        try:
+            results.append(_translate_chunk(text, source_lang, target_lang))
+        except Exception as e:
+            logging.error(f"Chunk translation error: {str(e)}")
+            results.append(None)
+    return results
+
+def split_paragraphs(text):
+    """Split text into normalized paragraphs"""
+    # Paragraphs are separated by blank lines; whitespace inside them is collapsed
+    return [normalize_text(p) for p in PARAGRAPH_SPLIT_RE.split(text) if p.strip()]
+
+def split_into_chunks(text, max_chars):
+    """
+    Split a paragraph into chunks of at most max_chars, breaking on sentence
+    boundaries and only cutting inside a sentence that is longer than a chunk.
+    Sentences in a chunk keep the separator they had in the text
+    Returns a list of chunks
+    """
+    if len(text) <= max_chars:
+        return [text]
+    
+    chunks = []
+    current = ''
+    separator = ''
+    parts = SENTENCE_BOUNDARY_RE.split(text)
+    for sentence, following in itertools.zip_longest(parts[0::2], parts[1::2], fillvalue=''):
+        # Cut overlong sentences at the last space that fits, or hard at the limit
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if sentence:
+            candidate = f"{current}{separator}{sentence}" if current else sentence
+            if len(candidate) <= max_chars:
+                current = candidate
+            else:
+                chunks.append(current)
+                current = sentence
+            separator = ''
+        separator += following
+    if current:
+        chunks.append(current)
+    return chunks
+
+def join_chunks(pieces, language):
+    """
+    Join the translated chunks of one paragraph, with a space unless the
+    language is written without spaces between sentences
+    Returns the paragraph text
+    """
+    return ('' if language.split('-')[0] in UNSPACED_LANGUAGES else ' ').join(pieces)
+
+def _translate_chunk(text, source_lang, target_lang):
+    """
+    Translate one chunk, retrying it on its own when every provider fails
+    Returns a tuple of (translated text, provider name)
+    """
+    for attempt in range(TRANSLATION_CHUNK_RETRIES + 1):
+        try:
+            return _translate_with_providers(text, source_lang, target_lang)
+        except Exception as e:
+            if attempt == TRANSLATION_CHUNK_RETRIES:
+                raise
+            logging.warning(f"Retrying chunk translation after error: {str(e)}")
+
+def _translate_with_providers(text, source_lang, target_lang):
+    """
+    Translate one chunk with the online services in order of preference, hedging to
+    the next healthy service when the preferred one is slow and skipping services
+    whose circuit breaker is open
+    Returns a tuple of (translated text, provider name)
+    """
+    return translation_scheduler.call(text, source_lang, target_lang)
+
+def get_translation_cache_stats():
+    """
+    Get hit rate and bytes saved by the translation cache
+    Returns a dictionary
+    """
+    return translation_cache.stats()
+
+def get_provider_stats():
+    """
+    Get rolling latency, error rate and circuit breaker state of the translation providers
+    Returns a dictionary keyed by provider name
+    """
+    return translation_scheduler.stats()
+
 def _translate_with_libre(text, source_lang, target_lang):
     """Use LibreTranslate API for translation"""
+    # Make the translation request through the shared pooled client
+    response = http_client.post(LIBRE_TRANSLATE_API, json=libre_payload(text, source_lang, target_lang))
+    return libre_result(response)
+
+def libre_payload(text, source_lang, target_lang):
+    """Build the LibreTranslate request body"""
     # Prepare the request payload
     payload = {
         "q": text,
@@ -103,10 +366,13 @@ def _translate_with_libre(text, source_lang, target_lang):
     # Add API key if available
     if LIBRE_TRANSLATE_API_KEY:
         payload["api_key"] = LIBRE_TRANSLATE_API_KEY
-    
-    # Make the translation request with longer timeout
-    response = requests.post(LIBRE_TRANSLATE_API, json=payload, timeout=10)
-    
+    return payload
+
+def libre_result(response):
+    """
+    Get the translated text from a LibreTranslate response
+    Raises an exception when the request failed
+    """
     # Check if the request was successful
     if response.status_code == 200:
         result = response.json()
@@ -118,18 +384,26 @@ def _translate_with_libre(text, source_lang, target_lang):
 
 def _translate_with_google(text, source_lang, target_lang):
     """Use Google Translate API for translation"""
+    # Make the request through the shared pooled client
+    response = http_client.get(GOOGLE_TRANSLATE_API, params=google_params(text, source_lang, target_lang))
+    return google_result(response)
+
+def google_params(text, source_lang, target_lang):
+    """Build the Google Translate query parameters"""
     # Use the unofficial Google Translate API
-    params = {
+    return {
         'client': 'gtx',
         'sl': source_lang,
         'tl': target_lang,
         'dt': 't',
         'q': text
     }
-    
-    # Make the request with longer timeout
-    response = requests.get(GOOGLE_TRANSLATE_API, params=params, timeout=10)
-    
+
+def google_result(response):
+    """
+    Get the translated text from a Google Translate response
+    Raises an exception when the request failed
+    """
     if response.status_code == 200:
         # Parse the weird Google Translate response format
         result = response.json()
@@ -188,3 +462,10 @@ def _simple_translation(text, source_lang, target_lang):
     
     # If we don't have a dictionary for this language pair, add notice
     return f"{text}\n\n[This text would be translated from {source_lang} to {target_lang} with a proper API key]"
+
+# Providers are raced through one scheduler; hedged requests can put up to one call
+# per provider in flight for every chunk worker
+translation_scheduler = ProviderScheduler(
+    [('libre', _translate_with_libre), ('google', _translate_with_google)],
+    max_workers=TRANSLATION_MAX_WORKERS * len(PROVIDER_ORDER)
+)
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+
+from async_http_client import async_http_client
+import translation_api
+from translation_api import (
+    LIBRE_TRANSLATE_API, GOOGLE_TRANSLATE_API, PROVIDER_ORDER, CHUNK_MAX_CHARS,
+    TRANSLATION_MAX_WORKERS, TRANSLATION_CHUNK_RETRIES, split_into_chunks, join_chunks
+)
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+
+async def translate_text_async(text, source_lang, target_lang):
+    """
+    Translate text from source language to target language on the event loop
+    Same paragraph cache, chunking, provider hedging and fallbacks as translate_text;
+    chunks are translated concurrently, at most TRANSLATION_MAX_WORKERS at a time
+
+    Args:
+        text (str): Text to translate
+        source_lang (str): Source language code (e.g., 'en')
+        target_lang (str): Target language code (e.g., 'es')
+
+    Returns:
+        str: Translated text
+    """
+    # If source and target languages are the same, return the original text
+    if source_lang == target_lang:
+        return text
+
+    paragraphs = translation_api.split_paragraphs(text)
+
+    # The disk tier of the cache is SQLite, so lookups and stores run off the event loop
+    cache = translation_api.translation_cache
+    translated_paragraphs = await asyncio.to_thread(
+        lambda: [cache.get(paragraph, source_lang, target_lang, PROVIDER_ORDER) for paragraph in paragraphs]
+    )
+
+    limit = asyncio.Semaphore(TRANSLATION_MAX_WORKERS)
+    async def translate_chunk(chunk):
+        async with limit:
+            return await _translate_chunk_async(chunk, source_lang, target_lang)
+
+    chunks = {
+        i: split_into_chunks(paragraph, CHUNK_MAX_CHARS)
+        for i, paragraph in enumerate(paragraphs) if translated_paragraphs[i] is None
+    }
+    results = await asyncio.gather(
+        *(translate_chunk(chunk) for paragraph_chunks in chunks.values() for chunk in paragraph_chunks),
+        return_exceptions=True
+    )
+
+    # Reassemble in order; a chunk that still fails after its retries keeps its original text
+    failed_chunks = 0
+    to_cache = []
+    results = iter(results)
+    for i, paragraph_chunks in chunks.items():
+        pieces = []
+        providers = []
+        for chunk in paragraph_chunks:
+            result = next(results)
+            if isinstance(result, Exception):
+                logging.error(f"Chunk translation error: {str(result)}")
+                pieces.append(chunk)
+                failed_chunks += 1
+                continue
+            pieces.append(result[0])
+            providers.append(result[1])
+        translated_paragraphs[i] = join_chunks(pieces, target_lang)
+        if len(providers) == len(paragraph_chunks):
+            # Label mixed results with the least preferred provider that contributed
+            to_cache.append((paragraphs[i], max(providers, key=PROVIDER_ORDER.index), translated_paragraphs[i]))
+
+    if to_cache:
+        await asyncio.to_thread(
+            lambda: [cache.set(paragraph, source_lang, target_lang, provider, translated)
+                     for paragraph, provider, translated in to_cache]
+        )
+
+    total_chunks = sum(len(paragraph_chunks) for paragraph_chunks in chunks.values())
+    if not total_chunks or failed_chunks < total_chunks:
+        return '\n\n'.join(translated_paragraphs)
+    return translation_api.fallback_translation(text, source_lang, target_lang)
+
+async def _translate_chunk_async(text, source_lang, target_lang):
+    """
+    Translate one chunk, retrying it on its own when every provider fails
+    Returns a tuple of (translated text, provider name)
+    """
+    for attempt in range(TRANSLATION_CHUNK_RETRIES + 1):
+        try:
+            return await translation_api.translation_scheduler.call_async(_ASYNC_PROVIDERS, text, source_lang, target_lang)
+        except Exception as e:
+            if attempt == TRANSLATION_CHUNK_RETRIES:
+                raise
+            logging.warning(f"Retrying chunk translation after error: {str(e)}")
+
+async def _translate_with_libre_async(text, source_lang, target_lang):
+    """Use LibreTranslate API for translation"""
+    payload = translation_api.libre_payload(text, source_lang, target_lang)
+    response = await async_http_client.post(LIBRE_TRANSLATE_API, json=payload)
+    return translation_api.libre_result(response)
+
+async def _translate_with_google_async(text, source_lang, target_lang):
+    """Use Google Translate API for translation"""
+    params = translation_api.google_params(text, source_lang, target_lang)
+    response = await async_http_client.get(GOOGLE_TRANSLATE_API, params=params)
+    return translation_api.google_result(response)
+
+# Async counterparts of the scheduler's providers; health and breakers are shared with them
+_ASYNC_PROVIDERS = {
+    'libre': _translate_with_libre_async,
+    'google': _translate_with_google_async
+}
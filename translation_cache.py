@@ -0,0 +1,178 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+from cache import LRUCache
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+
+# In-memory tier size, on-disk tier location and size (an empty path disables the disk tier)
+TRANSLATION_MEMORY_CACHE_MAX_BYTES = int(os.environ.get("TRANSLATION_MEMORY_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+TRANSLATION_CACHE_PATH = os.environ.get("TRANSLATION_CACHE_PATH", os.path.join('instance', 'translation_cache.sqlite3'))
+TRANSLATION_CACHE_MAX_BYTES = int(os.environ.get("TRANSLATION_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+# When the disk tier is full, evict least recently used rows down to this fraction of the limit
+DISK_EVICTION_TARGET = 0.9
+DISK_EVICTION_CHECK_INTERVAL = 50
+
+def normalize_text(text):
+    """Collapse whitespace so trivially different copies of a paragraph share a cache entry"""
+    return ' '.join(text.split())
+
+def cache_key(text, source_lang, target_lang, provider):
+    """
+    Build the content address of a translation
+    Returns a hex digest of the normalized text, language pair and provider
+    """
+    material = '\0'.join([provider, source_lang, target_lang, normalize_text(text)])
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+class TranslationCache:
+    """
+    Two-tier, content-addressed translation cache: an in-memory LRU in front of
+    an SQLite store with size-based eviction, shared by all worker processes
+    """
+
+    def __init__(self, path=TRANSLATION_CACHE_PATH, max_bytes=TRANSLATION_CACHE_MAX_BYTES,
+                 memory_max_bytes=TRANSLATION_MEMORY_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.memory = LRUCache(memory_max_bytes)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._writes = 0
+
+        if self.path:
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                self._connection().execute(
+                    "CREATE TABLE IF NOT EXISTS translations ("
+                    " key TEXT PRIMARY KEY,"
+                    " translation TEXT NOT NULL,"
+                    " size INTEGER NOT NULL,"
+                    " last_used REAL NOT NULL)"
+                )
+                self._connection().execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+            except sqlite3.Error as e:
+                logging.error(f"Translation cache disabled: {str(e)}")
+                self.path = None
+
+    def _connection(self):
+        # SQLite connections cannot be shared between threads, so each thread opens its own,
+        # and a connection inherited across a worker fork is reopened
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, text, source_lang, target_lang, providers):
+        """
+        Look up a translation produced by any of the providers, in order of preference
+        Returns the translated text or None
+        """
+        keys = [cache_key(text, source_lang, target_lang, provider) for provider in providers]
+        saved = len(text.encode('utf-8'))
+
+        for key in keys:
+            translation = self.memory.get(key)
+            if translation is not None:
+                self._count(memory_hits=1, bytes_saved=saved)
+                return translation
+
+        if self.path:
+            try:
+                placeholders = ','.join('?' * len(keys))
+                rows = dict(self._connection().execute(
+                    f"SELECT key, translation FROM translations WHERE key IN ({placeholders})", keys
+                ).fetchall())
+                for key in keys:
+                    if key in rows:
+                        self._connection().execute(
+                            "UPDATE translations SET last_used = ? WHERE key = ?", (time.time(), key)
+                        )
+                        self.memory.set(key, rows[key])
+                        self._count(disk_hits=1, bytes_saved=saved)
+                        return rows[key]
+            except sqlite3.Error as e:
+                logging.error(f"Translation cache read error: {str(e)}")
+
+        self._count(misses=1)
+        return None
+
+    def set(self, text, source_lang, target_lang, provider, translation):
+        """Store a translation in both tiers"""
+        key = cache_key(text, source_lang, target_lang, provider)
+        self.memory.set(key, translation)
+        if not self.path:
+            return
+        try:
+            size = len(key) + len(translation.encode('utf-8'))
+            connection = self._connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO translations (key, translation, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, translation, size, time.time())
+            )
+            self._evict(connection)
+        except sqlite3.Error as e:
+            logging.error(f"Translation cache write error: {str(e)}")
+
+    def _evict(self, connection):
+        # Summing the store is a full scan, so the size is only checked every few writes
+        with self._lock:
+            self._writes += 1
+            if self._writes % DISK_EVICTION_CHECK_INTERVAL:
+                return
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM translations").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used rows until the store is back under the target size
+        excess = total - int(self.max_bytes * DISK_EVICTION_TARGET)
+        connection.execute(
+            "DELETE FROM translations WHERE key IN ("
+            " SELECT key FROM (SELECT key, size, SUM(size) OVER (ORDER BY last_used, key) AS running FROM translations)"
+            " WHERE running - size < ?)",
+            (excess,)
+        )
+
+    def _count(self, memory_hits=0, disk_hits=0, misses=0, bytes_saved=0):
+        with self._lock:
+            self.memory_hits += memory_hits
+            self.disk_hits += disk_hits
+            self.misses += misses
+            self.bytes_saved += bytes_saved
+
+    def stats(self):
+        """
+        Get hit rate and bytes saved for both tiers
+        Returns a dictionary
+        """
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            stats = {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                'bytes_saved': self.bytes_saved,
+                'memory': self.memory.stats()
+            }
+        if self.path:
+            try:
+                entries, size = self._connection().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM translations"
+                ).fetchone()
+                stats['disk'] = {'entries': entries, 'bytes': size, 'max_bytes': self.max_bytes}
+            except sqlite3.Error as e:
+                logging.error(f"Translation cache stats error: {str(e)}")
+        return stats
@@ -1,223 +1,713 @@
-import requests
+import os
+import re
+import html
+import time
 import logging
-import urllib.parse
-import wikipedia
-from bs4 import BeautifulSoup
+import functools
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from cache import LRUCache
+from http_client import http_client
+from section_extractor import extract_sections, SKIPPED_HEADING_PREFIXES
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 
+# Maximum number of titles a non-bot client may pass in one query
+MAX_TITLES_PER_QUERY = 50
+
+# Images narrower than this are not considered for the main article image
+MIN_MAIN_IMAGE_WIDTH = 200
+
+# Wikipedia language edition codes, e.g. 'en', 'zh-yue', 'be-tarask'
+LANGUAGE_CODE_RE = re.compile(r'^[a-z][a-z0-9]{1,11}(-[a-z0-9]{1,12})*$')
+
+# Random article batches: intro extracts are limited to 20 pages per query, and a
+# feed request sends at most this many batches before returning what it has
+RANDOM_BATCH_SIZE = 20
+MAX_RANDOM_BATCHES = 3
+RANDOM_THUMBNAIL_SIZE = 640
+
+# Parsed article cache: size bound in bytes and seconds before a revision check is needed
+ARTICLE_CACHE_MAX_BYTES = int(os.environ.get("ARTICLE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+ARTICLE_CACHE_TTL = float(os.environ.get("ARTICLE_CACHE_TTL", 300))
+
+article_cache = LRUCache(ARTICLE_CACHE_MAX_BYTES, ttl=ARTICLE_CACHE_TTL)
+
+# Interlanguage links per article: size bound in bytes and seconds before a revision check is needed
+LANGLINKS_CACHE_MAX_BYTES = int(os.environ.get("LANGLINKS_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+LANGLINKS_CACHE_TTL = float(os.environ.get("LANGLINKS_CACHE_TTL", 3600))
+
+langlinks_cache = LRUCache(LANGLINKS_CACHE_MAX_BYTES, ttl=LANGLINKS_CACHE_TTL)
+
+# Search results per language and normalized query: size bound in bytes and lifetime in seconds
+SEARCH_CACHE_MAX_BYTES = int(os.environ.get("SEARCH_CACHE_MAX_BYTES", 8 * 1024 * 1024))
+SEARCH_CACHE_TTL = float(os.environ.get("SEARCH_CACHE_TTL", 600))
+
+search_cache = LRUCache(SEARCH_CACHE_MAX_BYTES, ttl=SEARCH_CACHE_TTL)
+
+# Enriched search results: thumbnail width, extract length, and how many of the top
+# results have their article fetched in the background (0 disables pre-warming)
+SEARCH_THUMBNAIL_SIZE = 160
+SEARCH_EXTRACT_CHARS = 300
+SEARCH_PREWARM_COUNT = int(os.environ.get("SEARCH_PREWARM_COUNT", 3))
+
+# Pre-warming has its own small pool so it never competes with page requests for article workers
+_prewarm_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='article-prewarm')
+_prewarming = set()
+_prewarm_lock = threading.Lock()
+
+# Article parts are fetched concurrently on a bounded pool under one deadline in seconds
+ARTICLE_FETCH_WORKERS = int(os.environ.get("ARTICLE_FETCH_WORKERS", 16))
+ARTICLE_FETCH_DEADLINE = float(os.environ.get("ARTICLE_FETCH_DEADLINE", 8))
+
+_article_executor = ThreadPoolExecutor(max_workers=ARTICLE_FETCH_WORKERS, thread_name_prefix='article-fetch')
+
+# Optional article parts, with the factory of the empty value used when they are dropped
+OPTIONAL_BUNDLE_PARTS = {'images': list, 'langlinks': dict}
+
+# Count of optional article parts dropped for missing the deadline or failing
+_degraded_parts = Counter()
+_degraded_lock = threading.Lock()
+
+class WikipediaClient:
+    """
+    MediaWiki API client bound to a single language edition
+    It builds its own API URLs and holds no mutable state, so one instance
+    can be shared safely between threads
+    """
+
+    def __init__(self, language):
+        if not isinstance(language, str) or not LANGUAGE_CODE_RE.match(language):
+            raise ValueError(f"Invalid Wikipedia language code: {language!r}")
+        self.language = language
+        self.api_url = f"https://{language}.wikipedia.org/w/api.php"
+
+    def __repr__(self):
+        return f"WikipediaClient({self.language!r})"
+
+    def get(self, params):
+        """
+        Send one API request
+        Returns the decoded JSON response
+        """
+        response = http_client.get(self.api_url, params=dict(params, format='json', formatversion=2))
+        response.raise_for_status()
+        data = response.json()
+        if 'error' in data:
+            raise Exception(data['error'].get('info', 'MediaWiki API error'))
+        return data
+
+    def query_pages(self, params, aliases=None):
+        """
+        Run an action=query request, following continuation tokens
+        If an aliases dictionary is given, it collects the normalized and redirect
+        mappings as canonical title -> list of titles that resolved to it
+        Returns a list of page dictionaries with list properties merged across batches
+        """
+        params = dict(params, action='query')
+        pages = {}
+        order = []
+        continue_params = {}
+        
+        while True:
+            data = self.get({**params, **continue_params})
+            merge_query_pages(data, pages, order, aliases)
+            
+            if 'continue' not in data:
+                break
+            continue_params = data['continue']
+        
+        return [pages[key] for key in order]
+
+    def parse(self, params):
+        """
+        Run an action=parse request
+        Returns the parse result dictionary
+        """
+        return self.get(dict(params, action='parse'))['parse']
+
+    def search(self, query, limit=10):
+        """
+        Full-text search in this language edition
+        Returns a list of article titles
+        """
+        data = self.get(search_params(query, limit))
+        return [result['title'] for result in data.get('query', {}).get('search', [])]
+
+    def prefix_search(self, prefix, limit=10):
+        """
+        Titles starting with the prefix, in the order of the wiki's own suggestions
+        Returns a list of article titles
+        """
+        data = self.get({
+            'action': 'query',
+            'list': 'prefixsearch',
+            'pssearch': prefix,
+            'psnamespace': 0,
+            'pslimit': limit
+        })
+        return [result['title'] for result in data.get('query', {}).get('prefixsearch', [])]
+
+def search_params(query, limit=10):
+    """Build the list=search request for a full-text search"""
+    return {
+        'action': 'query',
+        'list': 'search',
+        'srsearch': query,
+        'srlimit': limit,
+        'srprop': ''
+    }
+
+def merge_query_pages(data, pages, order, aliases=None):
+    """
+    Add the pages of one action=query response to those already collected,
+    merging list properties (langlinks, imageinfo...) split across batches
+    """
+    query = data.get('query', {})
+    if aliases is not None:
+        for mapping in query.get('normalized', []) + query.get('redirects', []):
+            if mapping['from'] not in aliases.get(mapping['to'], []):
+                aliases.setdefault(mapping['to'], []).append(mapping['from'])
+    
+    for page in query.get('pages', []):
+        key = page.get('pageid', page.get('title'))
+        if key not in pages:
+            pages[key] = page
+            order.append(key)
+            continue
+        merged = pages[key]
+        for prop, value in page.items():
+            if isinstance(value, list) and isinstance(merged.get(prop), list):
+                merged[prop].extend(value)
+            else:
+                merged.setdefault(prop, value)
+
+@functools.lru_cache(maxsize=64)
+def get_client(language):
+    """
+    Get the shared client for a language edition
+    Returns a WikipediaClient
+    """
+    return WikipediaClient(language)
+
+def normalize_query(query):
+    """Collapse whitespace and case so equivalent queries share a cache entry"""
+    return ' '.join(query.split()).casefold()
+
 def search_wikipedia(query, language='en'):
     """
     Search Wikipedia for articles matching the query
+    Results are cached per language and query
     Returns a list of article titles
     """
-    # Set the Wikipedia language
-    wikipedia.set_lang(language)
-    
     try:
-        # Search for articles
-        search_results = wikipedia.search(query, results=10)
-        return search_results
+        key = (language, normalize_query(query))
+        search_results = search_cache.get(key)
+        if search_results is None:
+            # Search for articles
+            search_results = get_client(language).search(query, limit=10)
+            search_cache.set(key, search_results)
+        return list(search_results)
     except Exception as e:
         logging.error(f"Wikipedia search error: {str(e)}")
         raise Exception(f"Failed to search Wikipedia: {str(e)}")
 
-def get_article_summary(title, language='en'):
+def search_articles(query, language='en', limit=10):
+    """
+    Search Wikipedia and describe each of the top results in one request
+    Results are cached per language and query
+    Returns a list of dictionaries with title, extract, thumbnail, pageid and lastrevid
+    """
+    try:
+        key = (language, 'articles', limit, normalize_query(query))
+        results = search_cache.get(key)
+        if results is None:
+            data = get_client(language).get({
+                'action': 'query',
+                'generator': 'search',
+                'gsrsearch': query,
+                'gsrnamespace': 0,
+                'gsrlimit': limit,
+                'prop': 'extracts|pageimages|info',
+                'exintro': 1,
+                'explaintext': 1,
+                'exchars': SEARCH_EXTRACT_CHARS,
+                'exlimit': 'max',
+                'piprop': 'thumbnail',
+                'pithumbsize': SEARCH_THUMBNAIL_SIZE,
+                'pilimit': 'max'
+            })
+            # Generated pages are unordered; 'index' is the search rank
+            pages = sorted(data.get('query', {}).get('pages', []), key=lambda page: page.get('index', 0))
+            results = [{
+                'title': page['title'],
+                'extract': page.get('extract', ''),
+                'thumbnail': page.get('thumbnail', {}).get('source'),
+                'pageid': page.get('pageid'),
+                'lastrevid': page.get('lastrevid')
+            } for page in pages]
+            search_cache.set(key, results)
+        return [dict(result) for result in results]
+    except Exception as e:
+        logging.error(f"Wikipedia search error: {str(e)}")
+        raise Exception(f"Failed to search Wikipedia: {str(e)}")
+
+def prewarm_articles(results, language='en', count=SEARCH_PREWARM_COUNT):
+    """
+    Fetch the articles of the top search results in the background, so opening one
+    is served from the article cache; cached articles at the same revision are only
+    refreshed, without asking Wikipedia again
+    """
+    for result in results[:count]:
+        key = (language, normalize_title(result['title']))
+        cached = article_cache.get_stale(key)
+        if cached is not None and cached['lastrevid'] == result.get('lastrevid'):
+            article_cache.touch(key)
+            continue
+        
+        with _prewarm_lock:
+            if key in _prewarming:
+                continue
+            _prewarming.add(key)
+        _prewarm_executor.submit(_prewarm_article, key, result['title'], language)
+
+def _prewarm_article(key, title, language):
+    try:
+        get_article_bundle(title, language)
+    except Exception as e:
+        logging.error(f"Article pre-warm error for {title}: {str(e)}")
+    finally:
+        with _prewarm_lock:
+            _prewarming.discard(key)
+
+def get_search_cache_stats():
+    """
+    Get hit, miss and size counters of the search cache
+    Returns a dictionary
+    """
+    return search_cache.stats()
+
+def fetch_images(client, titles):
+    """
+    Get image info for every file used on the given pages, batching the page titles
+    up to the API title limit and following continuation tokens
+    Returns a list of dictionaries with url, width, height and mime, deduplicated by URL
+    """
+    images = []
+    seen_urls = set()
+    for start in range(0, len(titles), MAX_TITLES_PER_QUERY):
+        image_pages = client.query_pages(images_params(titles[start:start + MAX_TITLES_PER_QUERY]))
+        collect_images(image_pages, images, seen_urls)
+    return images
+
+def images_params(titles):
+    """Build the generator=images request for the image info of the given pages"""
+    return {
+        'generator': 'images',
+        'titles': '|'.join(titles),
+        'redirects': 1,
+        'gimlimit': MAX_TITLES_PER_QUERY,
+        'prop': 'imageinfo',
+        'iiprop': 'url|size|mime'
+    }
+
+def collect_images(image_pages, images, seen_urls):
+    """Add the images of one batch to images, skipping URLs already seen"""
+    # Keep the url, size and type of every image not seen yet
+    for image_page in image_pages:
+        for info in image_page.get('imageinfo', []):
+            img_url = info.get('url')
+            if not img_url or img_url in seen_urls:
+                continue
+            seen_urls.add(img_url)
+            images.append({
+                'url': img_url,
+                'width': info.get('width', 0),
+                'height': info.get('height', 0),
+                'mime': info.get('mime', '')
+            })
+
+def normalize_title(title):
+    """
+    Normalize a title the way MediaWiki does for the main namespace
+    Returns the normalized title
+    """
+    title = ' '.join(title.replace('_', ' ').split())
+    return title[:1].upper() + title[1:]
+
+def get_latest_revisions(titles, language='en'):
+    """
+    Get the current version of many pages with batched prop=info queries: the revision
+    id, and the touched time, which also moves when the page is re-rendered without an
+    edit, for example when its Wikidata language links change
+    Returns a dictionary of normalized title to (lastrevid, touched)
+    """
+    client = get_client(language)
+    titles = list(dict.fromkeys(normalize_title(t) for t in titles))
+    revisions = {}
+    for start in range(0, len(titles), MAX_TITLES_PER_QUERY):
+        data = client.get(revisions_params(titles[start:start + MAX_TITLES_PER_QUERY]))
+        collect_revisions(data, revisions)
+    return revisions
+
+def revisions_params(titles):
+    """Build the prop=info request for the current revision of the given pages"""
+    return {
+        'action': 'query',
+        'titles': '|'.join(titles),
+        'redirects': 1,
+        'prop': 'info'
+    }
+
+def page_version(page):
+    """
+    Get the version of a cached page, bundle or langlinks entry, as get_latest_revisions reports it
+    Returns a tuple of (lastrevid, touched)
+    """
+    return page.get('lastrevid'), page.get('touched')
+
+def collect_revisions(data, revisions):
+    """Add the version of every page in one response under each title it was requested as"""
+    query = data.get('query', {})
+    
+    # Map the canonical titles back to the titles that were asked for
+    aliases = {}
+    for mapping in query.get('normalized', []) + query.get('redirects', []):
+        aliases.setdefault(mapping['to'], []).append(mapping['from'])
+    
+    for page in query.get('pages', []):
+        if 'lastrevid' not in page:
+            continue
+        for name in _requested_names(page['title'], aliases):
+            revisions[name] = page_version(page)
+
+def _requested_names(title, aliases):
+    # A page's own title plus every title that was normalized or redirected to it
+    names = [title]
+    pending = list(aliases.get(title, []))
+    while pending:
+        name = pending.pop()
+        names.append(name)
+        pending.extend(aliases.get(name, []))
+    return names
+
+def get_langlinks(titles, language='en'):
+    """
+    Get the interlanguage links of many articles with batched prop=langlinks queries
+    Links are cached per article; expired entries are revalidated against the
+    current revision id and touched time and only re-fetched when either has changed
+    Returns a dictionary of requested title to {language code: {'title', 'name'}}
+    """
+    results, stale, missing = cached_langlinks(titles, language)
+    
+    if stale:
+        try:
+            revisions = get_latest_revisions(list(stale), language)
+        except Exception as e:
+            logging.error(f"Langlinks revalidation error: {str(e)}")
+            revisions = {}
+        revalidate_langlinks(stale, revisions, language, results, missing)
+    
+    if missing:
+        fetched = _fetch_langlinks_batch(get_client(language), [normalize_title(t) for t in missing])
+        store_langlinks(missing, fetched, language, results)
+    return results
+
+def cached_langlinks(titles, language):
+    """
+    Split the titles into those with fresh cached links, expired entries worth
+    revalidating and titles that have to be fetched
+    Returns a tuple of (results, stale entries by title, missing titles)
+    """
+    results = {}
+    stale = {}
+    missing = []
+    for title in dict.fromkeys(titles):
+        key = (language, normalize_title(title))
+        entry = langlinks_cache.get(key)
+        if entry is not None:
+            results[title] = entry['links']
+            continue
+        entry = langlinks_cache.get_stale(key)
+        if entry is not None and entry['lastrevid'] is not None:
+            stale[title] = entry
+        else:
+            missing.append(title)
+    return results, stale, missing
+
+def revalidate_langlinks(stale, revisions, language, results, missing):
+    """Keep the expired links of articles still at their cached version and queue the rest as missing"""
+    # Language links come from Wikidata and change without a new revision, but not without
+    # touching the page, so entries are only kept while both match
+    for title, entry in stale.items():
+        if revisions.get(normalize_title(title)) == page_version(entry):
+            langlinks_cache.touch((language, normalize_title(title)))
+            results[title] = entry['links']
+        else:
+            missing.append(title)
+
+def store_langlinks(missing, fetched, language, results):
+    """Cache the fetched links of the missing titles and add them to the results"""
+    for title in missing:
+        lastrevid, touched, links = fetched.get(normalize_title(title), (None, None, {}))
+        entry = {'lastrevid': lastrevid, 'touched': touched, 'links': links}
+        langlinks_cache.set((language, normalize_title(title)), entry)
+        results[title] = links
+
+def _fetch_langlinks_batch(client, titles):
+    """
+    Get the interlanguage links and version of many articles, resolving redirects
+    Returns a dictionary of requested title to (lastrevid, touched, links)
+    """
+    found = {}
+    titles = list(dict.fromkeys(titles))
+    for start in range(0, len(titles), MAX_TITLES_PER_QUERY):
+        aliases = {}
+        pages = client.query_pages(langlinks_params(titles[start:start + MAX_TITLES_PER_QUERY]), aliases=aliases)
+        collect_langlinks(pages, aliases, found)
+    return found
+
+def langlinks_params(titles):
+    """Build the prop=langlinks request for the given pages, with English language names"""
+    return {
+        'titles': '|'.join(titles),
+        'redirects': 1,
+        'prop': 'langlinks|info',
+        'lllimit': 'max',
+        'llprop': 'langname',
+        'llinlanguagecode': 'en'
+    }
+
+def collect_langlinks(pages, aliases, found):
+    """Add the links and version of every page under each title it was requested as"""
+    for page in pages:
+        links = {
+            link['lang']: {'title': link['title'], 'name': link.get('langname', link['lang'])}
+            for link in page.get('langlinks', [])
+        }
+        for name in _requested_names(page['title'], aliases):
+            found[name] = (*page_version(page), links)
+
+def get_article_bundle(title, language='en', deadline=None):
+    """
+    Get everything the article page needs, from the article cache when possible
+    Expired entries are revalidated against the current revision id and touched time
+    and only re-fetched and re-parsed when the article or its language links have changed
+    Returns a dictionary shared by the summary, content, images and languages views
+    """
+    key = (language, normalize_title(title))
+    bundle = article_cache.get(key)
+    if bundle is not None:
+        return bundle
+    
+    stale = article_cache.get_stale(key)
+    if stale is not None:
+        try:
+            revisions = get_latest_revisions([stale['title']], language)
+            if revisions.get(stale['title']) == page_version(stale):
+                article_cache.touch(key)
+                return stale
+        except Exception as e:
+            logging.error(f"Article revalidation error: {str(e)}")
+    
+    bundle = _fetch_article_bundle(title, language, deadline)
+    # Degraded bundles are not cached so the next view retries the missing parts
+    if not bundle['degraded']:
+        article_cache.set(key, bundle)
+    return bundle
+
+def get_article_cache_stats():
+    """
+    Get hit, miss and eviction counters of the article and langlinks caches
+    Returns a dictionary
+    """
+    with _degraded_lock:
+        degraded = dict(_degraded_parts)
+    return dict(article_cache.stats(), degraded_parts=degraded, langlinks=langlinks_cache.stats())
+
+def _fetch_page_info(client, title):
+    """Get the intro extract and page info of an article"""
+    return existing_page(client.query_pages(page_info_params(title)), title)
+
+def page_info_params(title):
+    """Build the request for the intro extract and page info of an article"""
+    return {
+        'titles': title,
+        'redirects': 1,
+        'prop': 'extracts|info',
+        'exintro': 1,
+        'explaintext': 1,
+        'inprop': 'url'
+    }
+
+def existing_page(pages, title):
+    """
+    Get the page from a page info response
+    Raises an exception when the article does not exist
+    """
+    if not pages or pages[0].get('missing') or pages[0].get('invalid'):
+        raise Exception(f"Page '{title}' does not exist")
+    return pages[0]
+
+def _fetch_sections(client, title):
+    """Get the rendered article HTML and split it into sections"""
+    parsed = client.parse(sections_params(title))
+    return extract_sections(parsed['text'])
+
+def sections_params(title):
+    """Build the action=parse request for the rendered article HTML"""
+    return {
+        'page': title,
+        'redirects': 1,
+        'prop': 'text',
+        'disableeditsection': 1
+    }
+
+def _fetch_langlinks(client, title):
+    """Get the interlanguage links of an article"""
+    return get_langlinks([title], client.language)[title]
+
+def _fetch_article_bundle(title, language, deadline=None):
+    """
+    Fetch the summary, sections, images and language links of an article
+    concurrently under one deadline. Summary and sections are required; images
+    and language links are dropped and listed in 'degraded' when they fail or
+    miss the deadline
+    Returns the article bundle with parsed sections
+    """
+    if deadline is None:
+        deadline = ARTICLE_FETCH_DEADLINE
+    try:
+        client = get_client(language)
+        started = time.monotonic()
+        futures = {
+            'info': _article_executor.submit(_fetch_page_info, client, title),
+            'sections': _article_executor.submit(_fetch_sections, client, title),
+            'images': _article_executor.submit(fetch_images, client, [title]),
+            'langlinks': _article_executor.submit(_fetch_langlinks, client, title)
+        }
+        
+        # Required parts may use the whole budget; optional parts get whatever is left
+        wait([futures['info'], futures['sections']], timeout=deadline)
+        remaining = max(0, deadline - (time.monotonic() - started))
+        wait([futures['images'], futures['langlinks']], timeout=remaining)
+        
+        return assemble_bundle(futures, deadline, language, title)
+    except Exception as e:
+        logging.error(f"Wikipedia article error: {str(e)}")
+        raise Exception(f"Failed to fetch article: {str(e)}")
+
+def assemble_bundle(parts, deadline, language, title):
+    """
+    Build the article bundle from the fetches of its parts, futures or asyncio tasks,
+    once they have finished or run out of time. Images and language links that failed
+    or are still running are cancelled, left empty and counted as degraded
+    Returns the article bundle
+    """
+    results = {}
+    degraded = []
+    for part, fetch in parts.items():
+        if part not in OPTIONAL_BUNDLE_PARTS:
+            if not fetch.done():
+                raise Exception(f"Timed out after {deadline}s fetching article {part}")
+            results[part] = fetch.result()
+            continue
+        try:
+            if not fetch.done():
+                fetch.cancel()
+                raise TimeoutError(f"missed the {deadline}s deadline")
+            results[part] = fetch.result()
+        except Exception as part_error:
+            logging.warning(f"Article {part} degraded for {language}:{title}: {str(part_error)}")
+            results[part] = OPTIONAL_BUNDLE_PARTS[part]()
+            degraded.append(part)
+    
+    if degraded:
+        with _degraded_lock:
+            _degraded_parts.update(degraded)
+    
+    page = results['info']
+    sections = results['sections']
+    # Make sure we have at least the Introduction
+    if not sections:
+        sections['Introduction'] = page.get('extract', '')
+    
+    return {
+        'title': page['title'],
+        'pageid': page['pageid'],
+        'lastrevid': page.get('lastrevid'),
+        'touched': page.get('touched'),
+        'url': page.get('fullurl'),
+        'summary': page.get('extract', ''),
+        'sections': sections,
+        'images': results['images'],
+        'langlinks': results['langlinks'],
+        'degraded': degraded
+    }
+
+def get_article_summary(title, language='en', bundle=None):
     """
     Get a summary of a Wikipedia article
     Returns a summary string
     """
-    # Set the Wikipedia language
-    wikipedia.set_lang(language)
-    
     try:
-        # Get article summary
-        summary = wikipedia.summary(title)
-        return summary
+        if bundle is None:
+            bundle = get_article_bundle(title, language)
+        return bundle['summary']
     except Exception as e:
         logging.error(f"Wikipedia summary error: {str(e)}")
         raise Exception(f"Failed to get article summary: {str(e)}")
 
-def get_article_content(title, language='en'):
+def get_article_content(title, language='en', bundle=None):
     """
     Get the full content of a Wikipedia article
     Returns a dictionary with section titles as keys and content as values
     """
-    # Set the Wikipedia language
-    wikipedia.set_lang(language)
-    
     try:
-        # Get full article content
-        page = wikipedia.page(title)
-        html_content = page.html()
-        
-        # Parse the HTML content
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Extract sections
-        sections = {}
-        current_section = 'Introduction'
-        sections[current_section] = ''
-        
-        # Get all content elements
-        content_div = soup.find('div', {'id': 'mw-content-text'})
-        if not content_div:
-            content_div = soup  # Fallback to the whole page if content div not found
-        
-        # Loop through all elements in content
-        elements = content_div.find_all(['h1', 'h2', 'h3', 'p', 'ul', 'ol', 'table'])
-        for element in elements:
-            # Skip navigation, references, and other non-content sections
-            if element.find_parent('div', {'class': ['toc', 'reflist', 'navbox']}):
-                continue
-                
-            # If we find a header, start a new section
-            if element.name in ['h1', 'h2', 'h3']:
-                section_text = element.get_text().strip()
-                # Skip empty or special sections
-                if section_text and not section_text.startswith(('See also', 'References', 'External links', 'Notes')):
-                    current_section = section_text
-                    if current_section not in sections:
-                        sections[current_section] = ''
-            # Add paragraph text to current section
-            elif element.name == 'p' and element.get_text().strip():
-                sections[current_section] += element.get_text().strip() + '\n\n'
-            # Add list items
-            elif element.name in ['ul', 'ol']:
-                list_text = ""
-                for li in element.find_all('li'):
-                    list_text += "• " + li.get_text().strip() + "\n"
-                if list_text:
-                    sections[current_section] += list_text + '\n'
-            # Add table data 
-            elif element.name == 'table':
-                # Skip infoboxes and navigational tables
-                if element.get('class') and any(c in ['infobox', 'navbox', 'metadata'] for c in element.get('class')):
-                    continue
-                table_text = "Table: "
-                # Extract some table data as text
-                for row in element.find_all('tr')[:5]:  # Limit to first few rows
-                    cells = row.find_all(['th', 'td'])
-                    if cells:
-                        row_text = " | ".join(cell.get_text().strip() for cell in cells)
-                        table_text += row_text + "\n"
-                sections[current_section] += table_text + "\n"
-        
-        # Remove any empty sections
-        sections = {k: v for k, v in sections.items() if v.strip()}
-        
-        # Make sure we have at least the Introduction
-        if not sections:
-            sections['Introduction'] = page.summary
-            
-        return sections
+        if bundle is None:
+            bundle = get_article_bundle(title, language)
+        # Hand out a copy so callers cannot modify the cached sections
+        return dict(bundle['sections'])
     except Exception as e:
         logging.error(f"Wikipedia content error: {str(e)}")
         raise Exception(f"Failed to get article content: {str(e)}")
 
-def get_article_images(title, language='en'):
+def get_article_images(title, language='en', bundle=None):
     """
     Get images from a Wikipedia article
-    Returns a list of image URLs with additional metadata
+    Returns a list of image URLs with width, height and a flag for the main image
     """
-    # Set the Wikipedia language
-    wikipedia.set_lang(language)
-    
     try:
-        # Get page images through Wikipedia library first
-        page = wikipedia.page(title)
-        images = []
+        if bundle is None:
+            bundle = get_article_bundle(title, language)
         
         # Filter images to exclude SVGs, icons, etc.
         valid_images = []
-        for img in page.images:
-            img_lower = img.lower()
+        for img in bundle['images']:
+            img_lower = img['url'].lower()
             # Skip small icons, logos, and SVGs which are usually not content images
             if (not img_lower.endswith(('.svg', '.png')) or 
                 'icon' not in img_lower and 
                 'logo' not in img_lower and
                 'flag' not in img_lower):
-                valid_images.append({
-                    'url': img,
-                    'is_main': False
-                })
-        
-        # If we found valid images, try to get thumbnail version for the first one
-        if valid_images:
-            # Mark the first non-SVG as main image
-            for i, img in enumerate(valid_images):
-                if not img['url'].lower().endswith('.svg'):
-                    valid_images[i]['is_main'] = True
-                    break
+                valid_images.append(dict(img, is_main=False))
         
-        # Use MediaWiki API to get better image data
-        try:
-            api_url = f"https://{language}.wikipedia.org/w/api.php"
-            params = {
-                'action': 'query',
-                'prop': 'images',
-                'titles': title,
-                'format': 'json'
-            }
-            response = requests.get(api_url, params=params)
-            data = response.json()
-            
-            # Extract images from API response
-            if 'query' in data and 'pages' in data['query']:
-                page_id = next(iter(data['query']['pages']))
-                if 'images' in data['query']['pages'][page_id]:
-                    api_images = data['query']['pages'][page_id]['images']
-                    
-                    # Get image URLs for each image
-                    for img_data in api_images:
-                        img_title = img_data['title']
-                        
-                        # Skip commons, icons, and other non-content images
-                        if ('File:Commons-' in img_title or 
-                            'icon' in img_title.lower() or 
-                            'logo' in img_title.lower() or
-                            img_title.lower().endswith('.svg')):
-                            continue
-                        
-                        # Get image info
-                        img_params = {
-                            'action': 'query',
-                            'titles': img_title,
-                            'prop': 'imageinfo',
-                            'iiprop': 'url|dimensions',
-                            'format': 'json'
-                        }
-                        img_response = requests.get(api_url, params=img_params)
-                        img_data = img_response.json()
-                        
-                        if 'query' in img_data and 'pages' in img_data['query']:
-                            for pid, page_data in img_data['query']['pages'].items():
-                                if 'imageinfo' in page_data:
-                                    for info in page_data['imageinfo']:
-                                        # Use only decent sized images
-                                        if 'width' in info and info['width'] > 200:
-                                            img_url = info['url']
-                                            # Add if not already in list
-                                            if not any(i['url'] == img_url for i in valid_images):
-                                                valid_images.append({
-                                                    'url': img_url,
-                                                    'is_main': False,
-                                                    'width': info.get('width', 0),
-                                                    'height': info.get('height', 0)
-                                                })
-        except Exception as img_api_error:
-            logging.error(f"Error fetching additional image data: {str(img_api_error)}")
+        # Mark the largest decent-sized raster image as main, falling back to the first non-SVG
+        candidates = [img for img in valid_images if img['mime'] != 'image/svg+xml']
+        if candidates:
+            large = [img for img in candidates if img['width'] > MIN_MAIN_IMAGE_WIDTH]
+            main = max(large, key=lambda img: img['width'] * img['height']) if large else candidates[0]
+            main['is_main'] = True
         
         # Make sure we have at least some images
-        if not valid_images and page.images:
+        if not valid_images:
             # Fallback to using the first non-svg image
-            for img in page.images:
-                if not img.lower().endswith('.svg'):
-                    valid_images.append({
-                        'url': img,
-                        'is_main': True
-                    })
+            for img in bundle['images']:
+                if img['mime'] != 'image/svg+xml':
+                    valid_images.append(dict(img, is_main=True))
                     break
         
         return valid_images
@@ -225,101 +715,197 @@ def get_article_images(title, language='en'):
         logging.error(f"Wikipedia images error: {str(e)}")
         return []  # Return empty list on error
 
-def get_article_languages(title, language='en'):
+def get_article_languages(title, language='en', bundle=None):
     """
     Get available languages for a Wikipedia article
     Returns a dictionary of language codes and names
     """
-    # Set the Wikipedia language
-    wikipedia.set_lang(language)
+    return {code: link['name'] for code, link in get_article_langlinks(title, language, bundle).items()}
+
+def get_article_langlinks(title, language='en', bundle=None):
+    """
+    Get the articles on the same subject in other languages
+    Uses the bundle when one is given, otherwise only the cached langlinks lookup
+    Returns a dictionary of language codes to {'title', 'name'}
+    """
+    try:
+        if bundle is not None:
+            return dict(bundle['langlinks'])
+        return dict(get_langlinks([title], language)[title])
+    except Exception as e:
+        logging.error(f"Wikipedia languages error: {str(e)}")
+        return {}  # Return empty dict on error
+
+def get_article_outline(title, language='en', deadline=None):
+    """
+    Get what the lazy article view needs up front: the summary, page info, language
+    links and the table of contents from action=parse&prop=sections, without
+    downloading or parsing the article body. All parts share one deadline; language
+    links are dropped when they fail or miss it and listed in 'degraded'
+    Returns a dictionary with the top-level sections as a list of index and title
+    """
+    key = ('outline', language, normalize_title(title))
+    outline = article_cache.get(key)
+    if outline is not None:
+        return outline
     
+    if deadline is None:
+        deadline = ARTICLE_FETCH_DEADLINE
     try:
-        # Get page languages
-        page = wikipedia.page(title)
-        # Try to get language links if available in the Wikipedia library
-        if hasattr(page, 'langlinks'):
-            return page.langlinks
+        client = get_client(language)
+        started = time.monotonic()
+        info = _article_executor.submit(_fetch_page_info, client, title)
+        toc = _article_executor.submit(client.parse, {'page': title, 'redirects': 1, 'prop': 'sections'})
+        langlinks = _article_executor.submit(_fetch_langlinks, client, title)
+        
+        # Page info and the table of contents may use the whole budget; language links get whatever is left
+        wait([info, toc], timeout=deadline)
+        if not (info.done() and toc.done()):
+            raise Exception(f"Timed out after {deadline}s fetching article outline")
+        remaining = max(0, deadline - (time.monotonic() - started))
+        wait([langlinks], timeout=remaining)
+        page = info.result()
         
-        # If not available via the library, we'll create a basic mapping
-        # This is a simplified approach as the actual Wikipedia API provides more details
-        return {
-            'en': 'English',
-            'es': 'Spanish',
-            'fr': 'French',
-            'de': 'German',
-            'ru': 'Russian',
-            'zh': 'Chinese',
-            'ja': 'Japanese'
+        # Each top-level section is loaded with its subsections; template sections have no numeric index
+        sections = [{'index': 0, 'title': 'Introduction'}]
+        for section in toc.result()['sections']:
+            section_title = html.unescape(re.sub(r'<[^>]+>', '', section['line'])).strip()
+            if (section['toclevel'] != 1 or not section['index'].isdigit() or
+                    not section_title or section_title.startswith(SKIPPED_HEADING_PREFIXES)):
+                continue
+            sections.append({'index': int(section['index']), 'title': section_title})
+        
+        degraded = False
+        try:
+            if not langlinks.done():
+                langlinks.cancel()
+                raise TimeoutError(f"missed the {deadline}s deadline")
+            links = langlinks.result()
+        except Exception as links_error:
+            logging.warning(f"Article langlinks degraded for {language}:{title}: {str(links_error)}")
+            links = {}
+            degraded = True
+        
+        outline = {
+            'title': page['title'],
+            'pageid': page['pageid'],
+            'lastrevid': page.get('lastrevid'),
+            'touched': page.get('touched'),
+            'url': page.get('fullurl'),
+            'summary': page.get('extract', ''),
+            'sections': sections,
+            'langlinks': links,
+            'degraded': ['langlinks'] if degraded else []
         }
+        # Like degraded bundles, an outline without its language links is not cached
+        if degraded:
+            with _degraded_lock:
+                _degraded_parts['langlinks'] += 1
+        else:
+            article_cache.set(key, outline)
+        return outline
     except Exception as e:
-        logging.error(f"Wikipedia languages error: {str(e)}")
-        return {}  # Return empty dict on error
+        logging.error(f"Wikipedia outline error: {str(e)}")
+        raise Exception(f"Failed to get article outline: {str(e)}")
+
+def get_article_section(title, index, language='en', revision=None):
+    """
+    Fetch and parse one top-level section of an article on demand, using the same
+    extraction rules as the full article. Passing the revision the table of contents
+    was built from keeps section indexes stable across edits
+    Returns a dictionary with section titles as keys and content as values
+    """
+    key = ('section', language, normalize_title(title), revision, index)
+    sections = article_cache.get(key)
+    if sections is not None:
+        return dict(sections)
+    
+    try:
+        params = {'prop': 'text', 'section': index, 'disableeditsection': 1}
+        if revision:
+            params['oldid'] = revision
+        else:
+            params.update(page=title, redirects=1)
+        parsed = get_client(language).parse(params)
+        sections = extract_sections(parsed['text'])
+        article_cache.set(key, sections)
+        return dict(sections)
+    except Exception as e:
+        logging.error(f"Wikipedia section error: {str(e)}")
+        raise Exception(f"Failed to get article section: {str(e)}")
 
 def get_random_articles(language='en', limit=10, images_only=True, offset=0):
     """
     Get random Wikipedia articles for WikiTok feed
+    Each batch is one generator=random query returning the intro extract,
+    thumbnail and URL together; another batch is only sent when too few qualify
     Returns a list of dictionaries with article info
     """
-    # Set the Wikipedia language
-    wikipedia.set_lang(language)
-    
     try:
-        # Get random articles
-        api_url = f"https://{language}.wikipedia.org/w/api.php"
-        
-        # Parameters for API request
-        params = {
-            'action': 'query',
-            'format': 'json',
-            'list': 'random',
-            'rnlimit': limit * 2,  # Request more than needed in case some don't have images
-            'rnnamespace': 0  # Main articles only
-        }
-        
-        response = requests.get(api_url, params=params)
-        data = response.json()
+        client = get_client(language)
         
         articles = []
-        for article in data['query']['random']:
-            title = article['title']
+        seen_titles = set()
+        for _ in range(MAX_RANDOM_BATCHES):
+            # Request more than needed in case some don't have images
+            wanted = limit - len(articles)
+            batch_size = min(RANDOM_BATCH_SIZE, wanted * 2 if images_only else wanted)
+            data = client.get(random_params(batch_size))
             
-            try:
-                # Get article summary and first image
-                page = wikipedia.page(title)
-                summary = page.summary
-                images = page.images
-                
-                # Filter out articles without images if requested
-                if images_only and not images:
-                    continue
-                
-                # Get the first image that's not an SVG (usually icons)
-                image_url = None
-                for img in images:
-                    if not img.lower().endswith('.svg'):
-                        image_url = img
-                        break
-                
-                if images_only and not image_url:
-                    continue
-                
-                articles.append({
-                    'title': title,
-                    'summary': summary[:300] + '...' if len(summary) > 300 else summary,
-                    'image': image_url,
-                    'language': language,
-                    'url': page.url
-                })
-                
-                # If we have enough articles, stop
-                if len(articles) >= limit:
-                    break
-                    
-            except Exception as e:
-                logging.error(f"Error getting article {title}: {str(e)}")
-                continue
+            # If we have enough articles, stop
+            if collect_random_articles(data, language, images_only, limit, articles, seen_titles):
+                return articles
         
         return articles
     except Exception as e:
         logging.error(f"Random articles error: {str(e)}")
         raise Exception(f"Failed to get random articles: {str(e)}")
+
+def random_params(batch_size):
+    """Build the generator=random request for a batch of article cards"""
+    return {
+        'action': 'query',
+        'generator': 'random',
+        'grnnamespace': 0,  # Main articles only
+        'grnlimit': batch_size,
+        'prop': 'extracts|pageimages|info',
+        'exintro': 1,
+        'explaintext': 1,
+        'exlimit': 'max',
+        'piprop': 'thumbnail|name',
+        'pithumbsize': RANDOM_THUMBNAIL_SIZE,
+        'pilimit': 'max',
+        'inprop': 'url'
+    }
+
+def collect_random_articles(data, language, images_only, limit, articles, seen_titles):
+    """
+    Add the qualifying pages of one random batch to the articles
+    Returns True once there are limit articles
+    """
+    for page in data.get('query', {}).get('pages', []):
+        title = page['title']
+        if title in seen_titles:
+            continue
+        seen_titles.add(title)
+        
+        # SVG page images are usually logos, maps or icons
+        image_url = None
+        if 'thumbnail' in page and not page.get('pageimage', '').lower().endswith('.svg'):
+            image_url = page['thumbnail']['source']
+        
+        # Filter out articles without images if requested
+        if images_only and not image_url:
+            continue
+        
+        summary = page.get('extract', '')
+        articles.append({
+            'title': title,
+            'summary': summary[:300] + '...' if len(summary) > 300 else summary,
+            'image': image_url,
+            'language': language,
+            'url': page.get('fullurl')
+        })
+        if len(articles) >= limit:
+            return True
+    return False
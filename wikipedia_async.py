@@ -0,0 +1,297 @@
+import time
+import asyncio
+import logging
+import functools
+
+from async_http_client import async_http_client
+from section_extractor import extract_sections
+import wikipedia_api
+from wikipedia_api import (
+    LANGUAGE_CODE_RE, MAX_TITLES_PER_QUERY, RANDOM_BATCH_SIZE, MAX_RANDOM_BATCHES,
+    ARTICLE_FETCH_DEADLINE, normalize_query, normalize_title, search_params, merge_query_pages
+)
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+
+class AsyncWikipediaClient:
+    """
+    Asyncio counterpart of WikipediaClient, bound to a single language edition
+    Requests go through the shared aiohttp client, so concurrent calls to one
+    host share its connection pool and concurrency bound
+    """
+
+    def __init__(self, language):
+        if not isinstance(language, str) or not LANGUAGE_CODE_RE.match(language):
+            raise ValueError(f"Invalid Wikipedia language code: {language!r}")
+        self.language = language
+        self.api_url = f"https://{language}.wikipedia.org/w/api.php"
+
+    def __repr__(self):
+        return f"AsyncWikipediaClient({self.language!r})"
+
+    async def get(self, params):
+        """
+        Send one API request
+        Returns the decoded JSON response
+        """
+        response = await async_http_client.get(self.api_url, params=dict(params, format='json', formatversion=2))
+        response.raise_for_status()
+        data = response.json()
+        if 'error' in data:
+            raise Exception(data['error'].get('info', 'MediaWiki API error'))
+        return data
+
+    async def query_pages(self, params, aliases=None):
+        """
+        Run an action=query request, following continuation tokens
+        Returns a list of page dictionaries with list properties merged across batches
+        """
+        params = dict(params, action='query')
+        pages = {}
+        order = []
+        continue_params = {}
+
+        while True:
+            data = await self.get({**params, **continue_params})
+            merge_query_pages(data, pages, order, aliases)
+
+            if 'continue' not in data:
+                break
+            continue_params = data['continue']
+
+        return [pages[key] for key in order]
+
+    async def parse(self, params):
+        """
+        Run an action=parse request
+        Returns the parse result dictionary
+        """
+        return (await self.get(dict(params, action='parse')))['parse']
+
+    async def search(self, query, limit=10):
+        """
+        Full-text search in this language edition
+        Returns a list of article titles
+        """
+        data = await self.get(search_params(query, limit))
+        return [result['title'] for result in data.get('query', {}).get('search', [])]
+
+@functools.lru_cache(maxsize=64)
+def get_async_client(language):
+    """
+    Get the shared async client for a language edition
+    Returns an AsyncWikipediaClient
+    """
+    return AsyncWikipediaClient(language)
+
+async def search_wikipedia_async(query, language='en'):
+    """
+    Search Wikipedia for articles matching the query
+    Shares the search cache with search_wikipedia
+    Returns a list of article titles
+    """
+    try:
+        key = (language, normalize_query(query))
+        search_results = wikipedia_api.search_cache.get(key)
+        if search_results is None:
+            search_results = await get_async_client(language).search(query, limit=10)
+            wikipedia_api.search_cache.set(key, search_results)
+        return list(search_results)
+    except Exception as e:
+        logging.error(f"Wikipedia search error: {str(e)}")
+        raise Exception(f"Failed to search Wikipedia: {str(e)}")
+
+async def get_latest_revisions_async(titles, language='en'):
+    """
+    Get the current version of many pages with batched prop=info queries
+    Returns a dictionary of normalized title to (lastrevid, touched)
+    """
+    client = get_async_client(language)
+    titles = list(dict.fromkeys(normalize_title(t) for t in titles))
+    revisions = {}
+    batches = [titles[start:start + MAX_TITLES_PER_QUERY] for start in range(0, len(titles), MAX_TITLES_PER_QUERY)]
+    for data in await asyncio.gather(*(client.get(wikipedia_api.revisions_params(batch)) for batch in batches)):
+        wikipedia_api.collect_revisions(data, revisions)
+    return revisions
+
+async def get_langlinks_async(titles, language='en'):
+    """
+    Get the interlanguage links of many articles with batched prop=langlinks queries
+    Shares the revision-checked langlinks cache with get_langlinks
+    Returns a dictionary of requested title to {language code: {'title', 'name'}}
+    """
+    results, stale, missing = wikipedia_api.cached_langlinks(titles, language)
+
+    if stale:
+        try:
+            revisions = await get_latest_revisions_async(list(stale), language)
+        except Exception as e:
+            logging.error(f"Langlinks revalidation error: {str(e)}")
+            revisions = {}
+        wikipedia_api.revalidate_langlinks(stale, revisions, language, results, missing)
+
+    if missing:
+        client = get_async_client(language)
+        titles = list(dict.fromkeys(normalize_title(t) for t in missing))
+        fetched = {}
+        for start in range(0, len(titles), MAX_TITLES_PER_QUERY):
+            aliases = {}
+            pages = await client.query_pages(
+                wikipedia_api.langlinks_params(titles[start:start + MAX_TITLES_PER_QUERY]), aliases=aliases
+            )
+            wikipedia_api.collect_langlinks(pages, aliases, fetched)
+        wikipedia_api.store_langlinks(missing, fetched, language, results)
+    return results
+
+async def get_article_bundle_async(title, language='en', deadline=None):
+    """
+    Get everything the article page needs, from the article cache when possible
+    Shares the article cache, revalidation and degradation rules with get_article_bundle
+    Returns the article bundle
+    """
+    key = (language, normalize_title(title))
+    bundle = wikipedia_api.article_cache.get(key)
+    if bundle is not None:
+        return bundle
+
+    stale = wikipedia_api.article_cache.get_stale(key)
+    if stale is not None:
+        try:
+            revisions = await get_latest_revisions_async([stale['title']], language)
+            if revisions.get(stale['title']) == wikipedia_api.page_version(stale):
+                wikipedia_api.article_cache.touch(key)
+                return stale
+        except Exception as e:
+            logging.error(f"Article revalidation error: {str(e)}")
+
+    bundle = await _fetch_article_bundle_async(title, language, deadline)
+    # Degraded bundles are not cached so the next view retries the missing parts
+    if not bundle['degraded']:
+        wikipedia_api.article_cache.set(key, bundle)
+    return bundle
+
+async def _fetch_images_async(client, titles):
+    images = []
+    seen_urls = set()
+    for start in range(0, len(titles), MAX_TITLES_PER_QUERY):
+        image_pages = await client.query_pages(wikipedia_api.images_params(titles[start:start + MAX_TITLES_PER_QUERY]))
+        wikipedia_api.collect_images(image_pages, images, seen_urls)
+    return images
+
+async def _fetch_page_info_async(client, title):
+    return wikipedia_api.existing_page(await client.query_pages(wikipedia_api.page_info_params(title)), title)
+
+async def _fetch_sections_async(client, title):
+    parsed = await client.parse(wikipedia_api.sections_params(title))
+    # Parsing the article HTML is CPU-bound, so it runs off the event loop
+    return await asyncio.to_thread(extract_sections, parsed['text'])
+
+async def _fetch_langlinks_async(client, title):
+    return (await get_langlinks_async([title], client.language))[title]
+
+async def _fetch_article_bundle_async(title, language, deadline=None):
+    """
+    Fetch the summary, sections, images and language links of an article
+    concurrently on the event loop under one deadline
+    Returns the article bundle with parsed sections
+    """
+    if deadline is None:
+        deadline = ARTICLE_FETCH_DEADLINE
+    tasks = {}
+    try:
+        client = get_async_client(language)
+        started = time.monotonic()
+        tasks = {
+            'info': asyncio.ensure_future(_fetch_page_info_async(client, title)),
+            'sections': asyncio.ensure_future(_fetch_sections_async(client, title)),
+            'images': asyncio.ensure_future(_fetch_images_async(client, [title])),
+            'langlinks': asyncio.ensure_future(_fetch_langlinks_async(client, title))
+        }
+
+        # Required parts may use the whole budget; optional parts get whatever is left
+        await asyncio.wait([tasks['info'], tasks['sections']], timeout=deadline)
+        remaining = max(0, deadline - (time.monotonic() - started))
+        await asyncio.wait([tasks['images'], tasks['langlinks']], timeout=remaining)
+
+        return wikipedia_api.assemble_bundle(tasks, deadline, language, title)
+    except Exception as e:
+        logging.error(f"Wikipedia article error: {str(e)}")
+        raise Exception(f"Failed to fetch article: {str(e)}")
+    finally:
+        # Nothing is left running on the loop once the deadline has passed
+        for task in tasks.values():
+            if not task.done():
+                task.cancel()
+
+async def get_article_summary_async(title, language='en'):
+    """
+    Get a summary of a Wikipedia article
+    Returns a summary string
+    """
+    try:
+        bundle = await get_article_bundle_async(title, language)
+    except Exception as e:
+        logging.error(f"Wikipedia summary error: {str(e)}")
+        raise Exception(f"Failed to get article summary: {str(e)}")
+    return wikipedia_api.get_article_summary(title, language, bundle=bundle)
+
+async def get_article_content_async(title, language='en'):
+    """
+    Get the full content of a Wikipedia article
+    Returns a dictionary with section titles as keys and content as values
+    """
+    try:
+        bundle = await get_article_bundle_async(title, language)
+    except Exception as e:
+        logging.error(f"Wikipedia content error: {str(e)}")
+        raise Exception(f"Failed to get article content: {str(e)}")
+    return wikipedia_api.get_article_content(title, language, bundle=bundle)
+
+async def get_article_images_async(title, language='en'):
+    """
+    Get images from a Wikipedia article
+    Returns a list of image URLs with width, height and a flag for the main image
+    """
+    try:
+        bundle = await get_article_bundle_async(title, language)
+    except Exception as e:
+        logging.error(f"Wikipedia images error: {str(e)}")
+        return []  # Return empty list on error
+    return wikipedia_api.get_article_images(title, language, bundle=bundle)
+
+async def get_article_languages_async(title, language='en'):
+    """
+    Get available languages for a Wikipedia article
+    Returns a dictionary of language codes and names
+    """
+    try:
+        links = (await get_langlinks_async([title], language))[title]
+    except Exception as e:
+        logging.error(f"Wikipedia languages error: {str(e)}")
+        return {}  # Return empty dict on error
+    return {code: link['name'] for code, link in links.items()}
+
+async def get_random_articles_async(language='en', limit=10, images_only=True):
+    """
+    Get random Wikipedia articles for WikiTok feed
+    Same batching as get_random_articles, with the requests sent from the event loop
+    Returns a list of dictionaries with article info
+    """
+    try:
+        client = get_async_client(language)
+
+        articles = []
+        seen_titles = set()
+        for _ in range(MAX_RANDOM_BATCHES):
+            # Request more than needed in case some don't have images
+            wanted = limit - len(articles)
+            batch_size = min(RANDOM_BATCH_SIZE, wanted * 2 if images_only else wanted)
+            data = await client.get(wikipedia_api.random_params(batch_size))
+            if wikipedia_api.collect_random_articles(data, language, images_only, limit, articles, seen_titles):
+                return articles
+
+        return articles
+    except Exception as e:
+        logging.error(f"Random articles error: {str(e)}")
+        raise Exception(f"Failed to get random articles: {str(e)}")
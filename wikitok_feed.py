@@ -0,0 +1,265 @@
+import os
+import json
+import math
+import time
+import zlib
+import base64
+import hashlib
+import logging
+import functools
+import threading
+from collections import deque, Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from wikipedia_api import get_random_articles
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+
+# Cards kept ready per (language, images_only) feed and the level that triggers a refill
+WIKITOK_BUFFER_DEPTH = int(os.environ.get("WIKITOK_BUFFER_DEPTH", 30))
+WIKITOK_LOW_WATER = int(os.environ.get("WIKITOK_LOW_WATER", 10))
+
+# Cards requested per upstream batch, and minimum seconds between batches of one feed
+WIKITOK_REFILL_BATCH = int(os.environ.get("WIKITOK_REFILL_BATCH", 10))
+WIKITOK_REFILL_INTERVAL = float(os.environ.get("WIKITOK_REFILL_INTERVAL", 1.0))
+
+# Background refills share a small pool so they cannot starve request threads
+WIKITOK_REFILL_WORKERS = int(os.environ.get("WIKITOK_REFILL_WORKERS", 4))
+
+_refill_executor = ThreadPoolExecutor(max_workers=WIKITOK_REFILL_WORKERS, thread_name_prefix='wikitok-refill')
+
+# Multi-language pages: one latency budget in seconds for all languages, and how many
+# card fingerprints the cursor remembers to keep later pages from repeating cards
+WIKITOK_FEED_DEADLINE = float(os.environ.get("WIKITOK_FEED_DEADLINE", 6))
+WIKITOK_CURSOR_MAX_SEEN = int(os.environ.get("WIKITOK_CURSOR_MAX_SEEN", 500))
+WIKITOK_FEED_WORKERS = int(os.environ.get("WIKITOK_FEED_WORKERS", 16))
+
+_feed_executor = ThreadPoolExecutor(max_workers=WIKITOK_FEED_WORKERS, thread_name_prefix='wikitok-feed')
+
+class CardBuffer:
+    """
+    Ring buffer of ready-to-serve WikiTok cards for one language and image filter,
+    refilled in the background whenever it drops below the low-water mark
+    """
+
+    def __init__(self, language, images_only, depth=WIKITOK_BUFFER_DEPTH, low_water=WIKITOK_LOW_WATER):
+        self.language = language
+        self.images_only = images_only
+        self.low_water = low_water
+        self.cards = deque(maxlen=depth)
+        self._lock = threading.Lock()
+        self._refilling = False
+        self._last_batch = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.cards_served = 0
+        self.refills = 0
+        self.refill_errors = 0
+
+    def take(self, limit):
+        """
+        Pop up to limit cards, fetching synchronously only when the buffer is empty
+        Callers report the buffered cards they actually serve with record_served
+        Returns a tuple of (list of cards, True if they came from the buffer)
+        """
+        with self._lock:
+            cards = [self.cards.popleft() for _ in range(min(limit, len(self.cards)))]
+            if cards:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        buffered = bool(cards)
+        if not buffered:
+            cards = get_random_articles(self.language, limit, self.images_only)
+
+        self.schedule_refill()
+        return cards, buffered
+
+    def record_served(self, count):
+        """Count cards taken from the buffer that reached a client"""
+        with self._lock:
+            self.cards_served += count
+
+    def put_back(self, cards):
+        """Return cards that were taken but not served to the front of the buffer, in order"""
+        with self._lock:
+            known_titles = {card['title'] for card in self.cards}
+            for card in reversed(cards):
+                if len(self.cards) >= self.cards.maxlen:
+                    break
+                if card['title'] not in known_titles:
+                    self.cards.appendleft(card)
+                    known_titles.add(card['title'])
+
+    def schedule_refill(self):
+        """Start a background refill if the buffer is low and none is running"""
+        with self._lock:
+            if self._refilling or len(self.cards) >= self.low_water:
+                return
+            self._refilling = True
+        _refill_executor.submit(self._refill)
+
+    def _refill(self):
+        try:
+            while True:
+                with self._lock:
+                    missing = self.cards.maxlen - len(self.cards)
+                    known_titles = {card['title'] for card in self.cards}
+                if missing <= 0:
+                    break
+
+                # Respect the refill rate so a busy feed cannot hammer Wikipedia
+                delay = self._last_batch + WIKITOK_REFILL_INTERVAL - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                self._last_batch = time.monotonic()
+
+                batch = get_random_articles(self.language, min(missing, WIKITOK_REFILL_BATCH), self.images_only)
+                if not batch:
+                    break
+                with self._lock:
+                    for card in batch:
+                        if card['title'] not in known_titles:
+                            self.cards.append(card)
+                            known_titles.add(card['title'])
+                    self.refills += 1
+        except Exception as e:
+            with self._lock:
+                self.refill_errors += 1
+            logging.error(f"WikiTok refill error for {self.language}: {str(e)}")
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'depth': len(self.cards),
+                'capacity': self.cards.maxlen,
+                'low_water': self.low_water,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'cards_served': self.cards_served,
+                'refills': self.refills,
+                'refill_errors': self.refill_errors,
+                'refilling': self._refilling
+            }
+
+_buffers = {}
+_buffers_lock = threading.Lock()
+
+def _get_buffer(language, images_only):
+    key = (language, images_only)
+    with _buffers_lock:
+        if key not in _buffers:
+            _buffers[key] = CardBuffer(language, images_only)
+        return _buffers[key]
+
+def get_feed_cards(language='en', limit=5, images_only=True):
+    """
+    Get WikiTok cards from the prefetch buffer of a language
+    Returns a list of dictionaries with article info
+    """
+    buffer = _get_buffer(language, images_only)
+    cards, buffered = buffer.take(limit)
+    if buffered:
+        buffer.record_served(len(cards))
+    return cards
+
+def get_feed_stats():
+    """
+    Get depth, hit ratio and refill counters of every feed buffer
+    Returns a dictionary keyed by 'language:images_only'
+    """
+    with _buffers_lock:
+        buffers = list(_buffers.values())
+    return {f"{buf.language}:{'images' if buf.images_only else 'all'}": buf.stats() for buf in buffers}
+
+def _card_fingerprint(card):
+    digest = hashlib.sha1(f"{card['language']}:{card['title']}".encode('utf-8')).hexdigest()
+    return digest[:10]
+
+def _decode_cursor(cursor):
+    """
+    Decode an opaque feed cursor; invalid or missing cursors start a new feed
+    Returns a tuple of (page number, list of seen card fingerprints)
+    """
+    if not cursor:
+        return 0, []
+    try:
+        data = json.loads(zlib.decompress(base64.urlsafe_b64decode(cursor.encode('ascii'))))
+        return int(data['p']), [str(seen) for seen in data['s']]
+    except Exception:
+        logging.warning("Ignoring invalid WikiTok cursor")
+        return 0, []
+
+def _encode_cursor(page, seen):
+    data = json.dumps({'p': page, 's': seen[-WIKITOK_CURSOR_MAX_SEEN:]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(zlib.compress(data.encode('utf-8'))).decode('ascii')
+
+def get_feed_page(languages, limit=10, images_only=True, cursor=None):
+    """
+    Get one page of WikiTok cards for several languages in a single call
+    Languages are fetched concurrently under one deadline and interleaved round-robin,
+    starting from a different language on every page; cards listed in the cursor
+    are never repeated
+    Returns a tuple of (list of cards, cursor for the next page)
+    """
+    page, seen = _decode_cursor(cursor)
+    seen_set = set(seen)
+    
+    # Ask each language for its share plus a little slack for already-seen cards;
+    # whatever the page does not use goes back to the language's buffer
+    per_language = math.ceil(limit / len(languages)) + 1
+    futures = {
+        language: _feed_executor.submit(_get_buffer(language, images_only).take, per_language)
+        for language in languages
+    }
+    wait(futures.values(), timeout=WIKITOK_FEED_DEADLINE)
+    
+    queues = []
+    for language, future in futures.items():
+        if not future.done():
+            logging.warning(f"WikiTok {language} cards missed the {WIKITOK_FEED_DEADLINE}s deadline")
+            # Late cards are kept for the next page instead of being dropped
+            future.add_done_callback(functools.partial(_put_back_late_cards, language, images_only))
+            continue
+        try:
+            cards, buffered = future.result()
+        except Exception as e:
+            logging.error(f"WikiTok {language} cards error: {str(e)}")
+            continue
+        cards = [card for card in cards if _card_fingerprint(card) not in seen_set]
+        queues.append((language, deque(cards), buffered))
+    
+    # Rotate the starting language so no language always leads the page
+    if queues:
+        rotation = page % len(queues)
+        queues = queues[rotation:] + queues[:rotation]
+    
+    articles = []
+    served = Counter()
+    while len(articles) < limit and any(queue for _, queue, _ in queues):
+        for language, queue, _ in queues:
+            if queue and len(articles) < limit:
+                card = queue.popleft()
+                articles.append(card)
+                seen.append(_card_fingerprint(card))
+                served[language] += 1
+    
+    for language, queue, buffered in queues:
+        buffer = _get_buffer(language, images_only)
+        if buffered:
+            buffer.record_served(served[language])
+        if queue:
+            buffer.put_back(list(queue))
+    
+    return articles, _encode_cursor(page + 1, seen)
+
+def _put_back_late_cards(language, images_only, future):
+    if not future.cancelled() and future.exception() is None:
+        _get_buffer(language, images_only).put_back(future.result()[0])